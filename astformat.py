@@ -0,0 +1,241 @@
+import sys
+import mmap
+import json
+import struct
+from array import array
+from bisect import bisect_right
+
+# Readers of the --format json and --format bin outputs of parse.py, standard library only
+# Both carry the elements and attributes of the XML output in the same order:
+#   json: one object per element, {"tag": name, attribute: value, ..., "children": [...]}, children left out when empty
+#   bin:  little-endian, every record length-prefixed, strings stored once in a table and referenced by index
+#     header     magic b"S25B", u16 version, u16 flags, u32 string count, u32 string table bytes, u32 node bytes
+#     strings    u32 offsets[count + 1] into the UTF-8 blob that follows, padded to 4 bytes
+#     nodes      preorder, each: u8 tag, u8 attribute count, u16 0, u32 child count, u32 bytes of the node and
+#                its descendants, then per attribute u32 name, u32 string index
+# BinaryDocument reads the bin format in place from bytes, a memoryview or an mmap, strings are decoded on access;
+# records() is the fast linear pass, BinaryElement gives random access by skipping subtrees by their length
+# --positions sidecars hold (start, end, element) source spans sorted by start, enclosing elements first; elements are
+# numbered in document order (root.iter() of ElementTree), offsets count characters and every span is [start, end)
+#   json: {"version": 1, "error": {"start", "end", "line", "column"} or null, "elements": [[start, end, element], ...]}
+#   bin:  little-endian header magic b"S25P", u16 version, u16 flags, u32 element count, i32 error start and end
+#         (-1 without one), then u32 start, u32 end, u32 element per element
+magic = b"S25B"
+version = 1
+header = struct.Struct("<4sHHIII")
+nodeHeader = struct.Struct("<BBHII")
+attributeRecord = struct.Struct("<II")
+tags = ("program", "class", "method", "block", "parameter", "assign", "var", "expr", "send", "arg", "literal")
+attributeNames = ("language", "description", "name", "parent", "selector", "arity", "order", "class", "value")
+positionsMagic = b"S25P"
+positionsVersion = 1
+positionsHeader = struct.Struct("<4sHHIii")
+positionRecord = struct.Struct("<III")
+tagIds = {tag: index for index, tag in enumerate(tags)}
+attributeIds = {name: index for index, name in enumerate(attributeNames)}
+
+
+class FormatError(Exception):
+    pass
+
+
+class BinaryElement:  # one node of a BinaryDocument, reads its record only when asked
+    __slots__ = ("document", "offset")
+
+    def __init__(self, document, offset):
+        self.document = document
+        self.offset = offset
+
+    @property
+    def tag(self):
+        return tags[self.document.view[self.offset]]
+
+    @property
+    def attributes(self):  # (name, value) pairs in the order of the XML attributes
+        view = self.document.view
+        count = view[self.offset + 1]
+        start = self.offset + nodeHeader.size
+        pairs = []
+        for position in range(start, start + count * attributeRecord.size, attributeRecord.size):
+            nameId, stringIndex = attributeRecord.unpack_from(view, position)
+            pairs.append((attributeNames[nameId], self.document.string(stringIndex)))
+        return pairs
+
+    def get(self, name, default=None):
+        for attributeName, value in self.attributes:
+            if attributeName == name:
+                return value
+        return default
+
+    def __len__(self):
+        return nodeHeader.unpack_from(self.document.view, self.offset)[3]
+
+    @property
+    def children(self):  # a subtree is skipped by its length, nothing below a child is read
+        view = self.document.view
+        _, attributeCount, _, childCount, _ = nodeHeader.unpack_from(view, self.offset)
+        position = self.offset + nodeHeader.size + attributeCount * attributeRecord.size
+        for _ in range(childCount):
+            yield BinaryElement(self.document, position)
+            position += nodeHeader.unpack_from(view, position)[4]
+
+
+class BinaryDocument:
+    def __init__(self, buffer):
+        self.view = memoryview(buffer)
+        if len(self.view) < header.size:
+            raise FormatError("Input too short for a SOL25 binary AST")
+        fileMagic, fileVersion, _, self.stringCount, stringBytes, nodeBytes = header.unpack_from(self.view, 0)
+        if fileMagic != magic or fileVersion != version:
+            raise FormatError(f"Not a version {version} SOL25 binary AST")
+        offsetsStart = header.size
+        self.blobStart = offsetsStart + 4 * (self.stringCount + 1)
+        self.nodesStart = self.blobStart + stringBytes + (-stringBytes % 4)
+        if self.nodesStart + nodeBytes != len(self.view):
+            raise FormatError("Section lengths do not match the input size")
+        offsets = self.view[offsetsStart:self.blobStart]
+        self.offsets = offsets.cast("I") if sys.byteorder == "little" else [value for value, in struct.iter_unpack("<I", offsets)]
+        self.strings = {}  # decoded strings by index
+
+    def string(self, index):
+        value = self.strings.get(index)
+        if value is None:
+            value = str(self.view[self.blobStart + self.offsets[index]:self.blobStart + self.offsets[index + 1]], "utf-8")
+            self.strings[index] = value
+        return value
+
+    @property
+    def root(self):
+        return BinaryElement(self, self.nodesStart)
+
+    def records(self):  # (tag, attributes, child count) of every element in preorder, one linear pass over the nodes
+        view = self.view
+        unpackNode = nodeHeader.unpack_from
+        unpackAttribute = attributeRecord.unpack_from
+        string = self.string
+        position = self.nodesStart
+        end = len(view)
+        while position < end:
+            tagId, attributeCount, _, childCount, _ = unpackNode(view, position)
+            position += nodeHeader.size
+            attributes = []
+            for _ in range(attributeCount):
+                nameId, stringIndex = unpackAttribute(view, position)
+                position += attributeRecord.size
+                attributes.append((attributeNames[nameId], string(stringIndex)))
+            yield tags[tagId], attributes, childCount
+
+    def release(self):  # the memoryviews have to be released before an mmap under them can be closed
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        self.view.release()
+
+
+def loads(data):  # element tree of a json or bin output given as bytes or str
+    if isinstance(data, str):
+        return json.loads(data)
+    if bytes(data[:4]) == magic:
+        return BinaryDocument(data).root
+    return json.loads(data)
+
+
+def load(path):  # bin files are mapped, not read, their elements stay valid while the returned root is referenced
+    with open(path, "rb") as file:
+        if file.read(4) != magic:
+            file.seek(0)
+            return json.load(file)
+        return BinaryDocument(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)).root
+
+
+def elementParts(element):  # (tag, attributes, children) of a json object or a BinaryElement
+    if isinstance(element, dict):
+        return element["tag"], [(name, value) for name, value in element.items() if name not in ("tag", "children")], element.get("children", ())
+    return element.tag, element.attributes, list(element.children)
+
+
+def escapeAttribute(value):
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def toXML(root):  # the XML document parse.py writes for the same program, built with a work stack like its writer
+    chunks = ['<?xml version="1.0" encoding="utf-8"?>\n']
+    work = [(root, 0)]
+    while work:
+        element, depth = work.pop()
+        if isinstance(element, str):
+            chunks.append(element)  # closing tag
+            continue
+        tag, attributes, children = elementParts(element)
+        indent = "  " * depth
+        chunks.append(indent + "<" + tag + "".join(f' {name}="{escapeAttribute(value)}"' for name, value in attributes))
+        if not children:
+            chunks.append("/>\n")
+            continue
+        chunks.append(">\n")
+        work.append((f"{indent}</{tag}>\n", None))
+        for child in reversed(children):
+            work.append((child, depth + 1))
+    return "".join(chunks)
+
+
+class PositionIndex:  # innermost element covering a source offset, one binary search per lookup
+    def __init__(self, elements, errorSpan=None):
+        self.elements = elements  # start, end, element, start, ... in the order of the sidecar
+        self.errorSpan = errorSpan  # (start, end) of the first error or None
+        self.parents = array("i", [-1]) * (len(elements) // 3)  # element -> innermost element around it, -1 for none
+        self.boundaries = array("q")  # offsets where the innermost element changes
+        self.owners = array("i")  # innermost element from each boundary on, -1 outside every element
+        enclosing = []  # (end, element) around the current offset, innermost last
+        for k in range(0, len(elements), 3):
+            start, end, element = elements[k], elements[k + 1], elements[k + 2]
+            self.close(enclosing, start)
+            if enclosing:
+                self.parents[element] = enclosing[-1][1]
+            enclosing.append((end, element))
+            self.mark(start, element)
+        self.close(enclosing, None)
+
+    def close(self, enclosing, offset):  # ends the elements before offset, all of them for None
+        while enclosing and (offset is None or enclosing[-1][0] <= offset):
+            end, _ = enclosing.pop()
+            self.mark(end, enclosing[-1][1] if enclosing else -1)
+
+    def mark(self, offset, owner):
+        if self.boundaries and self.boundaries[-1] == offset:
+            self.owners[-1] = owner  # an element ending or starting at the same offset, the last one holds
+        else:
+            self.boundaries.append(offset)
+            self.owners.append(owner)
+
+    def covering(self, offset):  # innermost element whose span contains offset, None when no element does
+        index = bisect_right(self.boundaries, offset) - 1
+        if index < 0 or self.owners[index] < 0:
+            return None
+        return self.owners[index]
+
+    def ancestors(self, element):  # the elements around element, innermost first
+        chain = []
+        element = self.parents[element]
+        while element >= 0:
+            chain.append(element)
+            element = self.parents[element]
+        return chain
+
+
+def loadPositions(path):  # PositionIndex of a --positions sidecar in either layout
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:4] != positionsMagic:
+        document = json.loads(data)
+        error = document.get("error")
+        elements = array("I", (value for element in document["elements"] for value in element))
+        return PositionIndex(elements, (error["start"], error["end"]) if error else None)
+    if len(data) < positionsHeader.size:
+        raise FormatError("Input too short for a SOL25 positions sidecar")
+    _, fileVersion, _, count, errorStart, errorEnd = positionsHeader.unpack_from(data, 0)
+    if fileVersion != positionsVersion or len(data) != positionsHeader.size + count * positionRecord.size:
+        raise FormatError(f"Not a version {positionsVersion} SOL25 positions sidecar")
+    elements = array("I", data[positionsHeader.size:]) if array("I").itemsize == 4 else array("q", (value for record in positionRecord.iter_unpack(data[positionsHeader.size:]) for value in record))
+    if sys.byteorder != "little" and elements.itemsize == 4:
+        elements.byteswap()
+    return PositionIndex(elements, (errorStart, errorEnd) if errorStart >= 0 else None)
@@ -0,0 +1,298 @@
+import sys
+import os
+import json
+import time
+import signal
+import asyncio
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import parse
+import server
+
+# asyncio front-end of parse.py for event-loop services: parses run on a bounded executor whose workers hold
+# pre-built parsers, a process pool by default or threads sharing one ParseSession. At most queueLimit parses
+# are handed to the executor at once, the others wait for a slot; the stream server stops reading a connection
+# with queueLimit requests open. Concurrent requests for the same source share one parse, queued or running.
+# A deadline covers the wait for a slot and the parse, a request past it gets the timeout exit code of server.py;
+# a parse nobody waits for any more is dropped while it is queued, a running one finishes and frees its slot.
+#   request:  {"id": any, "source": "SOL25 text", "timeout": seconds or null}
+#   response: {"id": any, "exitCode": int, "diagnostics": str or null, "xml": str or null, "seconds": float}
+# Responses of one connection come in the order their parses finish, the id tells them apart.
+maxLineBytes = 1 << 26  # longest request line the stream server reads
+helpMessage = """Usage: python asyncparse.py (--socket PATH | --port PORT) [options]
+
+  -s, --socket PATH        listen on a Unix socket at PATH
+  -p, --port PORT          listen on a TCP port
+      --host HOST          address of the TCP listener (default: 127.0.0.1)
+  -w, --workers N          number of executor workers (default: CPU count)
+      --threads            parse on a thread pool instead of a process pool
+  -q, --queue-limit N      parses admitted at once, further requests wait (default: 4 per worker)
+  -t, --timeout SECONDS    deadline of a request without its own 'timeout', 0 disables it (default: 10)
+  -h, --help               show this help message"""
+
+session = None  # ParseSession of a worker process
+
+
+def initWorker(settings):
+    global session
+    session = parse.ParseSession(**settings)
+    parse.getParser()  # fallback of the descent backend, built before the first request
+
+
+def parseInWorker(source):
+    return session.parse(source)
+
+
+def warmWorker():
+    return os.getpid()
+
+
+class Job:  # one parse of a source and the requests waiting for its result
+    __slots__ = ("task", "waiters")
+
+    def __init__(self):
+        self.task = None  # waits for a slot, then for the executor, see AsyncParser.run
+        self.waiters = 0
+
+
+class AsyncParser:  # bound to the event loop of its first request, settings as for parse.ParseSession
+    def __init__(self, workers=None, threads=False, queueLimit=None, timeout=None, **settings):
+        self.session = parse.ParseSession(**settings)  # checks the settings, and parses on the thread pool
+        self.workers = workers or os.cpu_count() or 1
+        self.queueLimit = queueLimit or self.workers * 4
+        self.timeout = timeout  # default deadline of a request in seconds, None or 0 waits as long as the parse takes
+        self.threads = threads
+        parse.getParser()  # forked workers inherit it built
+        if threads:
+            self.executor = ThreadPoolExecutor(self.workers)
+            self.call = self.session.parse
+        else:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=initWorker, initargs=(settings,))
+            self.call = parseInWorker
+        self.slots = asyncio.Semaphore(self.queueLimit)  # parses handed to the executor and not done yet
+        self.jobs = {}  # source -> Job of its parse, until the parse ends or nobody waits for it
+        self.counts = {"parsed": 0, "coalesced": 0, "timedOut": 0, "cancelled": 0}
+
+    async def start(self):  # starts every worker process so the first requests do not wait for them
+        if not self.threads:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, warmWorker) for _ in range(self.workers)))
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, lambda: self.executor.shutdown(True, cancel_futures=True))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exception):
+        await self.close()
+
+    async def parse(self, source, timeout=None):  # ParseResult as ParseSession.parse gives it, timeout in seconds
+        timeout = self.timeout if timeout is None else timeout
+        job = self.jobs.get(source)
+        if job is None:
+            job = self.jobs[source] = Job()
+            job.task = asyncio.ensure_future(self.run(source, job))
+        else:
+            self.counts["coalesced"] += 1
+        job.waiters += 1
+        try:
+            await asyncio.wait((job.task,), timeout=timeout or None)
+        except asyncio.CancelledError:
+            self.counts["cancelled"] += 1
+            raise
+        finally:
+            job.waiters -= 1
+            if not job.waiters and not job.task.done():
+                job.task.cancel()  # a queued parse is dropped, a running one finishes and frees its slot
+                self.forget(source, job)
+        if not job.task.done():
+            self.counts["timedOut"] += 1
+            return parse.ParseResult(server.timeoutExitCode, f"Request timed out after {timeout} s")
+        return job.task.result()
+
+    async def run(self, source, job):
+        try:
+            await self.slots.acquire()
+            try:
+                work = self.executor.submit(self.call, source)
+            except BaseException:
+                self.slots.release()
+                raise
+            loop = asyncio.get_running_loop()
+            work.add_done_callback(lambda work: loop.call_soon_threadsafe(self.finish, work))
+            return await asyncio.wrap_future(work, loop=loop)
+        finally:
+            self.forget(source, job)
+
+    def forget(self, source, job):  # later requests for the source start a new parse
+        if self.jobs.get(source) is job:
+            del self.jobs[source]
+
+    def finish(self, work):  # the executor is done with a parse, finished or cancelled before it started
+        if not work.cancelled():
+            self.counts["parsed"] += 1
+        self.slots.release()
+
+
+defaultParser = None  # AsyncParser of parseAsync, started on first use
+
+
+async def parseAsync(source, timeout=None):  # ParseResult of one source, parsed on the default process pool
+    global defaultParser
+    if defaultParser is None:
+        defaultParser = AsyncParser()
+    return await defaultParser.parse(source, timeout)
+
+
+def readRequest(line):  # (id, source, timeout) of a request line, raises ValueError, KeyError or TypeError
+    request = json.loads(line)
+    source = request["source"]
+    if not isinstance(source, str):
+        raise TypeError("'source' is not a string")
+    timeout = request.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or not timeout >= 0):
+        raise TypeError("'timeout' is not a number of seconds")
+    return request.get("id"), source, timeout
+
+
+async def answer(parser, requestId, source, timeout, writer):
+    start = time.perf_counter()
+    response = {"id": requestId}
+    try:
+        result = await parser.parse(source, timeout)
+        response.update(exitCode=result.exitCode, diagnostics=result.diagnostics, xml=result.xml)
+    except Exception as e:
+        response.update(exitCode=1, diagnostics="".join(traceback.format_exception_only(e)).strip(), xml=None)  # e.g. a broken process pool
+    response["seconds"] = round(time.perf_counter() - start, 6)
+    try:
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        await writer.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # client went away, serveConnection stops reading
+
+
+async def serveConnection(parser, reader, writer):
+    tasks = set()
+    try:
+        while True:
+            if len(tasks) >= parser.queueLimit:  # backpressure, the client waits until its requests are answered
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            try:
+                line = await reader.readline()
+            except ValueError:  # longer than maxLineBytes, the rest of the stream cannot be split into requests
+                writer.write(json.dumps({"id": None, "exitCode": 10, "diagnostics": "Invalid request: line too long", "xml": None, "seconds": 0.0}).encode("utf-8") + b"\n")
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                requestId, source, timeout = readRequest(line)
+            except (ValueError, KeyError, TypeError) as e:
+                writer.write(json.dumps({"id": None, "exitCode": 10, "diagnostics": f"Invalid request: {e}", "xml": None, "seconds": 0.0}).encode("utf-8") + b"\n")
+                continue
+            task = asyncio.ensure_future(answer(parser, requestId, source, timeout, writer))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)  # the client may close its side and still read the answers
+        await writer.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # client went away, its parses are cancelled below
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
+
+
+async def serve(socketPath, host, port, workers, threads, queueLimit, timeout):
+    async with AsyncParser(workers, threads, queueLimit, timeout) as parser:
+        handler = lambda reader, writer: serveConnection(parser, reader, writer)
+        if socketPath is not None:
+            if os.path.exists(socketPath):
+                os.remove(socketPath)  # stale socket of a previous server
+            listener = await asyncio.start_unix_server(handler, socketPath, limit=maxLineBytes)
+            address = socketPath
+        else:
+            listener = await asyncio.start_server(handler, host, port, limit=maxLineBytes)
+            address = f"{host}:{port}"
+        print(f"Listening on {address} with {parser.workers} {'threads' if threads else 'worker processes'}, {parser.queueLimit} parses at once", file=sys.stderr)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            async with listener:
+                await stop.wait()
+        finally:
+            if socketPath is not None and os.path.exists(socketPath):
+                os.remove(socketPath)
+
+
+def main():
+    arguments = sys.argv[1:]
+    socketPath = None
+    host = "127.0.0.1"
+    port = None
+    workers = os.cpu_count() or 1
+    threads = False
+    queueLimit = None
+    timeout = 10.0
+
+    optionsWithValue = {"-s", "--socket", "-p", "--port", "--host", "-w", "--workers", "-q", "--queue-limit", "-t", "--timeout"}
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument in ("-h", "--help"):
+            print(helpMessage)
+            sys.exit(0)
+        elif argument == "--threads":
+            threads = True
+            i += 1
+        elif argument in optionsWithValue:
+            if i + 1 >= len(arguments):
+                print(f"Missing value for '{argument}', use '--help' to show help message", file=sys.stderr)
+                sys.exit(10)
+            value = arguments[i + 1]
+            if argument in ("-s", "--socket"):
+                socketPath = value
+            elif argument == "--host":
+                host = value
+            elif argument in ("-t", "--timeout"):
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    timeout = -1.0
+                if not timeout >= 0:
+                    print(f"Invalid timeout '{value}'", file=sys.stderr)
+                    sys.exit(10)
+            else:
+                if not value.isdigit() or int(value) < 1 or (argument in ("-p", "--port") and int(value) > 65535):
+                    print(f"Invalid number '{value}' for '{argument}'", file=sys.stderr)
+                    sys.exit(10)
+                if argument in ("-p", "--port"):
+                    port = int(value)
+                elif argument in ("-w", "--workers"):
+                    workers = int(value)
+                else:
+                    queueLimit = int(value)
+            i += 2
+        else:
+            print(f"Unknown option '{argument}', use '--help' to show help message", file=sys.stderr)
+            sys.exit(10)
+
+    if (socketPath is None) == (port is None):
+        print("Exactly one of '--socket' and '--port' is required, use '--help' to show help message", file=sys.stderr)
+        sys.exit(10)
+    try:
+        asyncio.run(serve(socketPath, host, port, workers, threads, queueLimit, timeout))
+    except OSError as e:
+        print(f"Cannot listen on {'socket' if socketPath is not None else 'port'}: {e}", file=sys.stderr)
+        sys.exit(12)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import sys
+import os
+import io
+import glob
+import json
+import time
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import resultcache
+
+# Batch front-end of parse.py: many SOL25 sources per invocation, spread over a process pool
+# where every worker builds the Lark parser once and reuses it for all files it receives
+# parse.py is imported by the workers only, results served from the cache never load lark
+defaultPattern = "*.sol25"
+helpMessage = """Usage: python batch.py [options] PATH...
+PATH can be a SOL25 source file, a directory (searched recursively) or a glob pattern
+
+  -o, --output-dir DIR   write XML results into DIR instead of next to the sources
+  -j, --jobs N           number of worker processes (default: CPU count)
+  -s, --summary FILE     write the JSON summary into FILE instead of standard output
+  -p, --pattern GLOB     file pattern used when searching directories (default: *.sol25)
+  -c, --cache DIR        reuse results stored in DIR, keyed by source, grammar and parser version
+                         (default: $SOL25_CACHE, no cache when unset)
+      --cache-size MB    size bound of the cache, least recently used results are evicted (default: 256)
+  -h, --help             show this help message"""
+
+
+def collectSources(paths, pattern):  # returns (source, root) pairs, root is used to mirror paths in the output dir
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for match in sorted(glob.glob(os.path.join(path, "**", pattern), recursive=True)):
+                sources.append((match, path))
+        elif os.path.isfile(path):
+            sources.append((path, os.path.dirname(path)))
+        else:
+            for match in sorted(glob.glob(path, recursive=True)):
+                if os.path.isfile(match):
+                    sources.append((match, os.path.dirname(match)))
+    return sources
+
+
+def outputPathFor(source, root, outputDir):
+    base = os.path.splitext(source)[0] + ".xml"
+    if outputDir is None:
+        return base
+    return os.path.join(outputDir, os.path.relpath(base, root or "."))
+
+
+workerCache = None  # result cache of a worker process, every process opens its own connection
+
+
+def initWorker(cacheDir=None, cacheBytes=resultcache.defaultMaxBytes):
+    global workerCache
+    import parse  # deferred, see above
+
+    parse.getParser()  # warm the parser once per worker process
+    if cacheDir is not None:
+        workerCache = resultcache.ResultCache(cacheDir, cacheBytes)
+
+
+def readSource(source):  # (source bytes, text as a text-mode read returns it)
+    with open(source, "rb") as sourceFile:
+        sourceBytes = sourceFile.read()
+    return sourceBytes, sourceBytes.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def writeOutput(output, write):  # write(file) fills a partial file that is renamed once the whole document is written
+    partialOutput = output + ".partial"
+    try:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(partialOutput, "w", encoding="utf-8") as outputFile:
+            write(outputFile)
+        os.replace(partialOutput, output)
+    finally:
+        if os.path.exists(partialOutput):
+            os.remove(partialOutput)
+
+
+def parseFile(job):
+    import parse
+
+    source, output = job
+    result = {"source": source, "output": None, "exitCode": 0, "error": None, "seconds": 0.0, "cached": False}
+    start = time.perf_counter()
+    try:
+        sourceBytes, inputCode = readSource(source)
+    except (OSError, UnicodeDecodeError) as e:
+        result["exitCode"] = 11  # input file error
+        result["error"] = f"Cannot read input file: {e}"
+        result["seconds"] = round(time.perf_counter() - start, 6)
+        return result
+
+    diagnostics = io.StringIO()
+    xml = io.StringIO() if workerCache is not None else None  # kept for the cache, written to the file afterwards
+    try:
+        if xml is None:
+            writeOutput(output, lambda outputFile: runParse(parse, inputCode, outputFile, diagnostics))
+        else:
+            runParse(parse, inputCode, xml, diagnostics)
+            writeOutput(output, lambda outputFile: outputFile.write(xml.getvalue()))
+        result["output"] = output
+    except SystemExit as e:  # parse.py reports errors the same way as on the command line
+        result["exitCode"] = e.code if isinstance(e.code, int) else 1
+        result["error"] = diagnostics.getvalue().strip() or None
+    except OSError as e:
+        result["exitCode"] = 12  # output file error
+        result["error"] = f"Cannot write output file: {e}"
+    except Exception as e:
+        result["exitCode"] = 1  # same code an uncaught exception ends the CLI with
+        result["error"] = "".join(traceback.format_exception_only(e)).strip()
+    if workerCache is not None and result["exitCode"] != 12:  # output errors depend on the file system, not the source
+        workerCache.put(resultcache.cacheKey(sourceBytes), result["exitCode"], result["error"], xml.getvalue() if result["exitCode"] == 0 else None)
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def runParse(parse, inputCode, out, diagnostics):
+    with contextlib.redirect_stderr(diagnostics):
+        parse.parseProgram(inputCode, out)
+
+
+def serveCached(cache, job):  # result of a cache hit with its XML written, None on a miss or an unreadable source
+    source, output = job
+    start = time.perf_counter()
+    try:
+        sourceBytes, _ = readSource(source)
+    except (OSError, UnicodeDecodeError):
+        return None  # the worker reports it
+    cached = cache.get(resultcache.cacheKey(sourceBytes))
+    if cached is None:
+        return None
+    result = {"source": source, "output": None, "exitCode": cached.exitCode, "error": cached.diagnostics, "seconds": 0.0, "cached": True}
+    if cached.exitCode == 0:
+        try:
+            writeOutput(output, lambda outputFile: outputFile.write(cached.xml))
+            result["output"] = output
+        except OSError as e:
+            result["exitCode"] = 12  # output file error
+            result["error"] = f"Cannot write output file: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def runBatch(paths, outputDir=None, jobs=None, pattern=defaultPattern, cacheDir=None, cacheBytes=resultcache.defaultMaxBytes):
+    sources = collectSources(paths, pattern)
+    work = [(source, outputPathFor(source, root, outputDir)) for source, root in sources]
+    jobs = jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    results = [None] * len(work)
+    if cacheDir is not None:
+        cache = resultcache.ResultCache(cacheDir, cacheBytes)
+        for index, job in enumerate(work):
+            results[index] = serveCached(cache, job)
+        cache.close()  # closed before the workers fork, they open their own connections
+    misses = [index for index, result in enumerate(results) if result is None]
+    if misses:
+        chunkSize = max(1, min(64, len(misses) // (jobs * 4) or 1))  # amortize IPC without starving workers
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker, initargs=(cacheDir, cacheBytes)) as executor:
+            for index, result in zip(misses, executor.map(parseFile, [work[index] for index in misses], chunksize=chunkSize)):
+                results[index] = result
+    wallSeconds = time.perf_counter() - start
+
+    exitCodes = {}
+    for result in results:
+        exitCodes[str(result["exitCode"])] = exitCodes.get(str(result["exitCode"]), 0) + 1
+    summary = {
+        "files": len(results),
+        "jobs": jobs,
+        "wallSeconds": round(wallSeconds, 6),
+        "exitCodes": exitCodes,
+        "results": results,
+    }
+    if cacheDir is not None:
+        cache = resultcache.ResultCache(cacheDir, cacheBytes)
+        summary["cache"] = {"hits": len(work) - len(misses), "misses": len(misses), "totals": cache.stats()}
+        cache.close()
+    return summary
+
+
+def main():
+    arguments = sys.argv[1:]
+    paths = []
+    outputDir = None
+    summaryPath = None
+    jobs = None
+    pattern = defaultPattern
+    cacheDir = os.environ.get("SOL25_CACHE") or None
+    cacheBytes = resultcache.defaultMaxBytes
+
+    optionsWithValue = {"-o", "--output-dir", "-j", "--jobs", "-s", "--summary", "-p", "--pattern", "-c", "--cache", "--cache-size"}
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument in ("-h", "--help"):
+            print(helpMessage)
+            sys.exit(0)
+        elif argument in optionsWithValue:
+            if i + 1 >= len(arguments):
+                print(f"Missing value for '{argument}', use '--help' to show help message", file=sys.stderr)
+                sys.exit(10)
+            value = arguments[i + 1]
+            if argument in ("-o", "--output-dir"):
+                outputDir = value
+            elif argument in ("-s", "--summary"):
+                summaryPath = value
+            elif argument in ("-p", "--pattern"):
+                pattern = value
+            elif argument in ("-c", "--cache"):
+                cacheDir = value
+            elif argument == "--cache-size":
+                if not value.isdigit() or int(value) < 1:
+                    print(f"Invalid cache size '{value}'", file=sys.stderr)
+                    sys.exit(10)
+                cacheBytes = int(value) << 20
+            else:
+                if not value.isdigit() or int(value) < 1:
+                    print(f"Invalid number of jobs '{value}'", file=sys.stderr)
+                    sys.exit(10)
+                jobs = int(value)
+            i += 2
+        elif argument.startswith("-"):
+            print(f"Unknown option '{argument}', use '--help' to show help message", file=sys.stderr)
+            sys.exit(10)
+        else:
+            paths.append(argument)
+            i += 1
+
+    if not paths:
+        print("No input paths given, use '--help' to show help message", file=sys.stderr)
+        sys.exit(10)
+
+    try:
+        summary = runBatch(paths, outputDir, jobs, pattern, cacheDir, cacheBytes)
+    except (OSError, resultcache.sqlite3.Error) as e:
+        print(f"Cannot use result cache: {e}", file=sys.stderr)
+        sys.exit(12)
+    summaryJSON = json.dumps(summary, indent=2)
+    if summaryPath is None:
+        sys.stdout.write(summaryJSON + "\n")
+    else:
+        try:
+            with open(summaryPath, "w", encoding="utf-8") as summaryFile:
+                summaryFile.write(summaryJSON + "\n")
+        except OSError as e:
+            print(f"Cannot write summary file: {e}", file=sys.stderr)
+            sys.exit(12)
+    sys.exit(0 if all(result["exitCode"] == 0 for result in summary["results"]) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Memory per node and full-traversal speed of the slotted AST against lark Tree/Token parse trees
+# usage: python benchmarks/ast_nodes.py [CLASSES]
+import os
+import sys
+import tracemalloc
+
+from lark import Tree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf, generateProgram
+
+astFields = {
+    "program": ("classes",), "class": ("methods",), "method": ("block",), "block": ("assigns",),
+    "assign": ("expr",), "send": ("receiver", "args"), "primary": ("value",),
+}
+
+
+def walkTree(tree):  # every Tree and Token, the way the old visitors reached them
+    nodes = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        if isinstance(node, Tree):
+            stack.extend(node.children)
+    return nodes
+
+
+def walkAST(program):  # every AST node, lists and tuples of nodes are followed but not counted
+    nodes = 0
+    stack = [program]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        for field in astFields.get(node.kind, ()):
+            value = getattr(node, field)
+            if isinstance(value, (list, tuple)):
+                stack.extend(value)
+            else:
+                stack.append(value)
+    return nodes
+
+
+def retained(build):  # bytes still allocated by the result of build, and the result
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    inputCode = generateProgram(classCount)
+    treeParser = parse.buildParser()
+    astParser = parse.getParser()
+
+    treeBytes, tree = retained(lambda: treeParser.parse(inputCode))
+    astBytes, program = retained(lambda: astParser.parse(inputCode))
+    treeNodes = walkTree(tree)
+    astNodes = walkAST(program)
+    treeSeconds = bestOf(5, lambda: walkTree(tree))
+    astSeconds = bestOf(5, lambda: walkAST(program))
+    treeParseSeconds = bestOf(3, lambda: treeParser.parse(inputCode))
+    astParseSeconds = bestOf(3, lambda: astParser.parse(inputCode))
+
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source")
+    print(f"lark Tree/Token: {treeNodes} nodes, {treeBytes / 1e6:.1f} MB, {treeBytes / treeNodes:.0f} B/node, walk {treeSeconds * 1000:.1f} ms, parse {treeParseSeconds:.2f} s")
+    print(f"AST:             {astNodes} nodes, {astBytes / 1e6:.1f} MB, {astBytes / astNodes:.0f} B/node, walk {astSeconds * 1000:.1f} ms, parse {astParseSeconds:.2f} s")
+    print(f"AST holds the program in {astBytes / treeBytes:.0%} of the memory")
+
+
+if __name__ == "__main__":
+    main()
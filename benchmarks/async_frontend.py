@@ -0,0 +1,87 @@
+# Thousands of concurrent parseAsync-style requests through asyncparse.AsyncParser on a thread pool and on a
+# process pool, with many requests for the same sources (coalesced) and with every source distinct, against
+# parsing them one after another in process; also how long the event loop stalls while they run
+# usage: python benchmarks/async_frontend.py [REQUESTS] [DISTINCT] [WORKERS]
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncparse
+import parse
+from workload import errorCodes, generateWorkload
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def outcome(result):  # lark lists expected tokens in no fixed order
+    return result.exitCode, sorted((result.diagnostics or "").splitlines()), result.xml
+
+
+async def loopLag(stop, lags):  # largest delay of a 1 ms timer, the time the loop could not serve anything else
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(0.001)
+        lags.append(loop.time() - start - 0.001)
+
+
+async def drive(parser, requests):  # (wall seconds, latencies, results) of all requests started at once
+    latencies = []
+
+    async def request(inputCode):
+        start = time.perf_counter()
+        result = await parser.parse(inputCode)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(request(inputCode) for inputCode in requests))
+    return time.perf_counter() - start, latencies, results
+
+
+async def scenario(requests, workers, threads):
+    lags = []
+    stop = asyncio.Event()
+    async with asyncparse.AsyncParser(workers, threads) as parser:
+        ticker = asyncio.ensure_future(loopLag(stop, lags))
+        seconds, latencies, results = await drive(parser, requests)
+        stop.set()
+        await ticker
+        return seconds, latencies, results, dict(parser.counts), max(lags)
+
+
+def main():
+    requestCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    distinctCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    kinds = (None,) + errorCodes
+    sources = [generateWorkload(seed, kinds[seed % len(kinds)], classes=5) for seed in range(distinctCount)]
+    choice = random.Random(0).choice
+    workloads = {
+        "repeated": [choice(sources) for _ in range(requestCount)],  # about requestCount / distinctCount requests per source
+        "distinct": [sources[k % distinctCount] + " " * (k // distinctCount) for k in range(requestCount)],  # nothing to coalesce
+    }
+
+    session = parse.ParseSession()
+    print(f"{requestCount} concurrent requests, {distinctCount} distinct sources, {workers} workers, {os.cpu_count()} CPUs")
+    for name, requests in workloads.items():
+        start = time.perf_counter()
+        expected = [outcome(session.parse(inputCode)) for inputCode in requests]
+        sequentialSeconds = time.perf_counter() - start
+        print(f"{name}: sequential in process {requestCount / sequentialSeconds:8.0f} requests/s")
+        for threads in (True, False):
+            seconds, latencies, results, counts, lag = asyncio.run(scenario(requests, workers, threads))
+            same = [outcome(result) for result in results] == expected
+            label = "threads" if threads else "processes"
+            print(f"  {label:>9}: {requestCount / seconds:8.0f} requests/s, p50 {percentile(latencies, 0.5) * 1000:7.1f} ms, p99 {percentile(latencies, 0.99) * 1000:7.1f} ms, "
+                  f"{counts['parsed']} parsed, {counts['coalesced']} coalesced, loop stalled {lag * 1000:5.1f} ms at most, same results: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Conformance and speed of the parser backends: lark LALR, the hand-written descent parser and a pyparsing grammar
+# conformance is judged on workload programs and random mutations of them: same accept/reject decision as lark,
+# same AST, and the same exit code, stderr and XML through parseProgram
+# usage: python benchmarks/backend_comparison.py [CASES] [CLASSES]
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf, generateProgram
+from workload import errorCodes, generateWorkload
+
+mutationPieces = list("[]():=.|{}'\"+-_ aZ9\n") + ["class", " class ", "classA", " x:"]
+
+
+class PyparsingBackend:  # the grammar of parse.py written with pyparsing, parse actions build the AST
+    def __init__(self):
+        import pyparsing as pp
+
+        pp.ParserElement.set_default_whitespace_chars(" \t\f\r\n")
+        suppress = pp.Suppress
+        cid = pp.Regex(r"[A-Z][A-Za-z0-9_]*")
+        ident = pp.Regex(r"[a-z_][A-Za-z0-9_]*")
+        integer = pp.Regex(r"[+-]?[0-9]+(?![a-zA-Z_])")
+        string = pp.Regex(r"'([^'\]|\['\n])*'")
+        colon = suppress(pp.Regex(r":(?!=)"))
+
+        expr = pp.Forward()
+        block = pp.Forward()
+        exprBase = (
+            integer.copy().set_parse_action(lambda t: parse.Literal("Integer", t[0]))
+            | string.copy().set_parse_action(lambda t: parse.Literal("String", t[0][1:-1]))
+            | ident.copy().set_parse_action(lambda t: parse.Var(sys.intern(t[0])))
+            | cid.copy().set_parse_action(lambda t: parse.ClassRef(sys.intern(t[0])))
+            | block
+            | suppress("(") + expr + suppress(")")
+        )
+        keywordSend = pp.OneOrMore(pp.Group(ident + colon + exprBase))
+        unarySend = ident + ~colon
+        expr <<= exprBase + pp.Optional(pp.Group(keywordSend)("keyword") | unarySend("unary"))
+        expr.set_parse_action(self.expr)
+        assign = (ident + suppress(":=") + expr + suppress(".")).set_parse_action(lambda t: parse.Assign(sys.intern(t[0]), t[1]))
+        params = pp.Group(pp.ZeroOrMore(colon + ident))
+        block <<= (suppress("[") + params + suppress("|") + pp.Group(pp.ZeroOrMore(assign)) + suppress("]")).set_parse_action(
+            lambda t: parse.Block(tuple(sys.intern(name) for name in t[0]), list(t[1])))
+        selector = pp.Group(pp.OneOrMore(ident + colon))("keyword") | ident("unary")
+        method = (selector + block).set_parse_action(self.method)
+        classDef = (suppress("class") + cid + colon + cid + suppress("{") + pp.Group(pp.ZeroOrMore(method)) + suppress("}")).set_parse_action(
+            lambda t: parse.ClassDef(sys.intern(t[0]), sys.intern(t[1]), list(t[2])))
+        self.program = pp.ZeroOrMore(classDef).ignore(pp.Regex(r'"[^"]*"')) + pp.StringEnd()
+        self.error = pp.ParseBaseException
+
+    @staticmethod
+    def expr(tokens):
+        if len(tokens) == 1:
+            return parse.Primary(tokens[0])
+        if isinstance(tokens[1], str):
+            return parse.Send(tokens[0], (sys.intern(tokens[1]),), ())
+        pairs = tokens[1]
+        return parse.Send(tokens[0], tuple(sys.intern(pair[0]) for pair in pairs), tuple(pair[1] for pair in pairs))
+
+    @staticmethod
+    def method(tokens):
+        if isinstance(tokens[0], str):
+            return parse.Method((sys.intern(tokens[0]),), True, tokens[1])
+        return parse.Method(tuple(sys.intern(part) for part in tokens[0]), False, tokens[1])
+
+    def parse(self, inputCode, table=None):  # trees are never shared, parse actions build every node
+        try:
+            return parse.Program(list(self.program.parse_string(inputCode, parse_all=True)))
+        except (self.error, RecursionError):
+            return parse.LarkBackend().parse(inputCode)  # errors reported as lark reports them, like the descent backend
+
+
+def dump(node):  # comparable form of an AST, the comment found by the tokenizer and the reserved keyword hint are left out
+    if isinstance(node, (list, tuple)):
+        return [dump(item) for item in node]
+    if isinstance(node, (str, bool)):
+        return node
+    return (node.kind,) + tuple(dump(getattr(node, field)) for field in node.__slots__ if field not in ("comment", "reserved"))
+
+
+def mutate(rng, inputCode):
+    for _ in range(rng.randrange(1, 4)):
+        start = rng.randrange(len(inputCode) + 1)
+        end = min(len(inputCode), start + rng.randrange(3))
+        inputCode = inputCode[:start] + "".join(rng.choice(mutationPieces) for _ in range(rng.randrange(3))) + inputCode[end:]
+    return inputCode
+
+
+def own(backend, inputCode):  # AST of the backend itself, None when it rejects the input before the lark fallback
+    parser = parse.DescentParser().parse if isinstance(backend, parse.DescentBackend) else backend.program.parse_string
+    try:
+        result = parser(inputCode)
+    except Exception:
+        return None
+    return result if isinstance(result, parse.Program) else parse.Program(list(result))
+
+
+def run(name, inputCode):  # exit code, stderr lines and XML of parseProgram with the given backend
+    previous = parse.backendName
+    parse.backendName = name
+    out = io.StringIO()
+    err = io.StringIO()
+    exitCode = 0
+    try:
+        with contextlib.redirect_stderr(err):
+            parse.parseProgram(inputCode, out)
+    except SystemExit as e:
+        exitCode = e.code
+    except Exception:
+        exitCode = 1
+    finally:
+        parse.backendName = previous
+    return exitCode, sorted(err.getvalue().splitlines()), out.getvalue()  # lark lists expected tokens in any order
+
+
+def conformance(names, cases, seed=0):
+    rng = random.Random(seed)
+    stats = {name: {"agree": 0, "ownAccepts": 0, "onlyLarkAccepts": 0, "onlyOwnAccepts": 0, "astDiffers": 0, "outputDiffers": 0} for name in names}
+    larkParser = parse.getParser()
+    for case in range(cases):
+        inputCode = generateWorkload(case, rng.choice((None,) + errorCodes), classes=rng.randrange(5), depth=rng.randrange(4), arity=rng.randrange(1, 4))
+        if rng.random() < 0.6:
+            inputCode = mutate(rng, inputCode)
+        try:
+            expected = larkParser.parse(inputCode)
+        except parse.exceptions.LarkError:
+            expected = None
+        expectedOutput = run("lark", inputCode)
+        for name in names:
+            counts = stats[name]
+            program = own(parse.getBackend(name), inputCode)
+            if program is not None:
+                counts["ownAccepts"] += 1
+            if (program is None) != (expected is None):
+                counts["onlyLarkAccepts" if program is None else "onlyOwnAccepts"] += 1
+            elif program is not None and dump(program) != dump(expected):
+                counts["astDiffers"] += 1
+            elif run(name, inputCode) != expectedOutput:
+                counts["outputDiffers"] += 1
+            else:
+                counts["agree"] += 1
+    return stats
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    classCount = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    parse.registerBackend("pyparsing", PyparsingBackend)
+    names = ("descent", "pyparsing")
+
+    print(f"conformance against lark on {cases} workload programs, 60% of them mutated")
+    for name, counts in conformance(names, cases).items():
+        print(f"  {name:<10} " + ", ".join(f"{key} {value}" for key, value in counts.items()))
+
+    inputCode = generateProgram(classCount)
+    print(f"parse of {classCount} classes, {len(inputCode) / 1e6:.2f} MB source, best of 3")
+    parse.getParser()
+    larkSeconds = bestOf(3, lambda: parse.getBackend("lark").parse(inputCode))
+    print(f"  {'lark':<10} {larkSeconds:.3f} s")
+    for name in names:
+        backend = parse.getBackend(name)
+        seconds = bestOf(3, lambda: backend.parse(inputCode))
+        print(f"  {name:<10} {seconds:.3f} s, {larkSeconds / seconds:.1f}x lark")
+
+
+if __name__ == "__main__":
+    main()
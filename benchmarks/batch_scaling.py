@@ -0,0 +1,42 @@
+# Throughput of batch.py for an increasing number of worker processes
+# usage: python benchmarks/batch_scaling.py [FILES] [MAX_JOBS]
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import batch
+
+sampleProgram = """"sample program"
+class Main : Object {
+    run [ | x := 1. y := x plus: 2. z := [:a :b | c := a. d := b.]. ]
+    compute: with: [:a :b | r := a plus: b. s := (r plus: 1) plus: a. ]
+}
+class Counter : Object {
+    step: [:n | m := n plus: 1. ]
+}
+"""
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    maxJobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as sourceDir, tempfile.TemporaryDirectory() as outputDir:
+        for i in range(files):
+            with open(os.path.join(sourceDir, f"program{i}.sol25"), "w", encoding="utf-8") as sourceFile:
+                sourceFile.write(sampleProgram)
+
+        baseline = None
+        jobs = 1
+        while jobs <= maxJobs:
+            summary = batch.runBatch([sourceDir], outputDir, jobs)
+            throughput = summary["files"] / summary["wallSeconds"]
+            baseline = baseline or throughput
+            print(f"jobs={jobs}: {summary['files']} files in {summary['wallSeconds']:.3f} s, "
+                  f"{throughput:.0f} files/s, speedup {throughput / baseline:.2f}x")
+            jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
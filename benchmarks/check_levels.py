@@ -0,0 +1,32 @@
+# Time and peak memory of the analysis levels, --syntax-only, --check and the full XML output, on one program
+# usage: python benchmarks/check_levels.py [CLASSES]
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf, generateProgram
+
+
+def run(inputCode, level):
+    return parse.runProgram(inputCode, io.StringIO() if level == "xml" else None, level=level)
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    inputCode = generateProgram(classCount)
+    parse.getBackend()
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source")
+    for level, targets in parse.checkLevels.items():
+        seconds = bestOf(3, lambda: run(inputCode, level))
+        tracemalloc.start()
+        error = run(inputCode, level)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{level:>7}: {seconds * 1000:7.1f} ms, peak {peak / 1e6:6.1f} MB, passes {', '.join(parse.passOrder(targets))}, error {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# 'super' resolution through the class hierarchy index against the class list scans it replaced, and the
+# linear parent check on long inheritance chains with a cycle at the end
+# usage: python benchmarks/class_hierarchy.py [CLASSES]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf
+
+
+class ClassListAnalyzer(parse.SemanticAnalyzer):  # hierarchy kept as (class, [children]) lists, every lookup scans them
+    def __init__(self):
+        super().__init__()
+        self.classesSubclasses = [(className, []) for className in ("Object", "Nil", "True", "False", "Integer", "String", "Block")]
+
+    def declareClass(self, className, classParentName, methods):
+        for classInfo in self.classesSubclasses:
+            if classInfo[0] == classParentName:
+                classInfo[1].append(className)
+                break
+        super().declareClass(className, classParentName, methods)
+
+    def resolveSuper(self, node=None):
+        try:
+            classList = next(children for _, children in self.classesSubclasses if self.currentClassType in children)
+            classList.index(self.currentClassType)
+        except AttributeError:  # no class list holds the current class
+            self.errors[parse.declarationRank] = parse.unresolvedSuper(self.currentClassType)
+            self.firstRank = parse.declarationRank
+
+
+def superProgram(classCount):  # half the classes extend Object, the other half extend the last of them and use 'super'
+    half = classCount // 2
+    classes = [f"class Base{k} : Object {{ m{k} [ | ] }}" for k in range(half)]
+    classes += [f"class Sub{k} : Base{half - 1} {{ s{k} [ | x := super x. y := super y. ] }}" for k in range(half)]
+    classes.append("class Main : Object { run [ | ] }")
+    return "\n".join(classes)
+
+
+def chainHierarchy(classCount):  # Object <- C0 <- C1 ... and a two class cycle
+    hierarchy = parse.ClassHierarchy()
+    hierarchy.declareClass("C0", "Object")
+    for k in range(1, classCount):
+        hierarchy.declareClass(f"C{k}", f"C{k - 1}")
+    hierarchy.declareClass("Loop0", "Loop1")
+    hierarchy.declareClass("Loop1", "Loop0")
+    return hierarchy
+
+
+def check(analyzerClass, program):
+    analyzer = analyzerClass()
+    analyzer.visitProgram(program)
+    return analyzer.finishChecks()
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    program = parse.getParser().parse(superProgram(classCount))
+    same = repr(check(ClassListAnalyzer, program)) == repr(check(parse.SemanticAnalyzer, program))
+    listSeconds = bestOf(3, lambda: check(ClassListAnalyzer, program))
+    indexSeconds = bestOf(3, lambda: check(parse.SemanticAnalyzer, program))
+    print(f"{classCount} classes, {classCount} uses of 'super', same result: {same}")
+    print(f"  class lists: {listSeconds * 1000:8.1f} ms")
+    print(f"  index:       {indexSeconds * 1000:8.1f} ms, {listSeconds / indexSeconds:.1f}x")
+
+    for chainLength in (classCount * 10, classCount * 40):
+        hierarchy = chainHierarchy(chainLength)
+        start = time.perf_counter()
+        undefinedParents, _ = hierarchy.check()
+        seconds = time.perf_counter() - start
+        print(f"  parent check of a {chainLength} class chain: {seconds * 1000:6.1f} ms, {len(undefinedParents)} undefined parents, cycles {hierarchy.cycles}")
+
+
+if __name__ == "__main__":
+    main()
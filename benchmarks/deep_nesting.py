@@ -0,0 +1,87 @@
+# Stress run of every post-parse stage on deeply nested parentheses, blocks and keyword sends
+# each stage is timed at a quarter, half and the full depth, the growth shows whether time stays linear in depth;
+# XML indentation makes the output quadratic in depth, so serializing is timed per output byte at a smaller depth
+# usage: python benchmarks/deep_nesting.py [DEPTH] [XML_DEPTH]
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from xml_output import CountingSink
+
+shapes = {
+    "parentheses": lambda depth: "class Main : Object { run [ | x := " + "(" * depth + "1" + ")" * depth + ". ] }",
+    "blocks": lambda depth: "class Main : Object { run [ | " + "x := [ | " * depth + "x := 1. " + "] . " * depth + "] }",
+    "sends": lambda depth: "class Main : Object { run [ | x := " + "1 plus: (" * depth + "1" + ")" * depth + ". ] }",
+}
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def check(program):
+    semanticAnalyzer = parse.SemanticAnalyzer()
+    semanticAnalyzer.visitProgram(program)
+    semanticAnalyzer.finish()
+
+
+def pipeline(inputCode):  # exit code of parse.py without XML output
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            parse.parseProgram(inputCode)
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+def stages(inputCode, treeParser):  # seconds of each stage on one program
+    parseSeconds, program = timed(parse.getBackend().parse, inputCode)
+    treeSeconds, tree = timed(treeParser.parse, inputCode)
+    transformSeconds, _ = timed(parse.toAST, tree)
+    del tree
+    checkSeconds, _ = timed(check, program)
+    freeSeconds, _ = timed(lambda: program.classes.clear())  # frees the nested nodes
+    pipelineSeconds, exitCode = timed(pipeline, inputCode)
+    if exitCode != 0:
+        raise SystemExit(f"pipeline ended with exit code {exitCode}")
+    return {"parse": parseSeconds, "transform": transformSeconds, "check": checkSeconds, "free": freeSeconds, "pipeline": pipelineSeconds}
+
+
+def serializeRate(inputCode):  # seconds per MB of XML
+    program = parse.getBackend().parse(inputCode)
+    sink = CountingSink()
+    seconds, _ = timed(parse.XMLWriter(sink).program, program, inputCode)
+    return seconds / (sink.written / 1e6), sink.written
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    xmlDepth = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    treeParser = parse.buildParser()
+    parse.getParser()
+    failed = False
+    for name, shape in shapes.items():
+        try:
+            results = [(stageDepth, stages(shape(stageDepth), treeParser)) for stageDepth in (depth // 4, depth // 2, depth)]
+            rates = [(xmlStageDepth, serializeRate(shape(xmlStageDepth))) for xmlStageDepth in (xmlDepth // 2, xmlDepth)]
+        except RecursionError as e:
+            print(f"{name}: RecursionError {e}")
+            failed = True
+            continue
+        print(f"{name}, depth {depth // 4} / {depth // 2} / {depth}, growth per doubling in brackets")
+        for stage in results[0][1]:
+            seconds = [timings[stage] for _, timings in results]
+            growth = " ".join(f"{later / earlier:.1f}x" if earlier > 1e-4 else "-" for earlier, later in zip(seconds, seconds[1:]))
+            print(f"  {stage:<10} " + " / ".join(f"{value:7.3f} s" for value in seconds) + f"  ({growth})")
+        print("  serialize  " + " / ".join(f"depth {xmlStageDepth}: {written / 1e6:.0f} MB at {rate * 1000:.1f} ms/MB" for xmlStageDepth, (rate, written) in rates))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# One-line edits of a large program, IncrementalParser against parsing the whole edited source again
+# usage: python benchmarks/incremental_edit.py [CLASSES] [EDITS]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import incremental
+from semantic_passes import generateProgram
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    editCount = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    inputCode = generateProgram(classCount)
+
+    start = time.perf_counter()
+    incrementalParser = incremental.IncrementalParser(inputCode)
+    loadSeconds = time.perf_counter() - start
+
+    # alternate a literal inside a class in the middle, same length, then a changed declaration
+    target = inputCode.index(f"class C{classCount // 2} ")
+    literal = inputCode.index("plus: 1.", target) + len("plus: ")
+    selector = inputCode.index(f"n{classCount // 2}:", target)
+    edits = []
+    for i in range(editCount):
+        edits.append((literal, literal + 1, str(i % 10)))
+    edits.append((selector, selector + 1, "k"))
+
+    editSeconds = []
+    parsedBefore = incrementalParser.classesParsed
+    for start, end, text in edits:
+        editStart = time.perf_counter()
+        result = incrementalParser.edit(start, end, text)
+        editSeconds.append(time.perf_counter() - editStart)
+    parsedPerEdit = (incrementalParser.classesParsed - parsedBefore) / len(edits)
+
+    start = time.perf_counter()
+    reference = incremental.parseWhole(incrementalParser.source)
+    fullSeconds = time.perf_counter() - start
+    identical = (result.exitCode, result.diagnostics, result.xml) == (reference.exitCode, reference.diagnostics, reference.xml)
+
+    literalSeconds = sorted(editSeconds[:-1])[len(editSeconds[:-1]) // 2]
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.1f} MB source, identical to a full parse: {identical}")
+    print(f"full parse:                   {fullSeconds * 1000:.1f} ms")
+    print(f"incremental first load:       {loadSeconds * 1000:.1f} ms")
+    print(f"edit inside a method, median: {literalSeconds * 1000:.1f} ms ({fullSeconds / literalSeconds:.0f}x faster)")
+    print(f"edit of a declaration:        {editSeconds[-1] * 1000:.1f} ms")
+    print(f"classes reparsed per edit:    {parsedPerEdit:.0f}")
+
+
+if __name__ == "__main__":
+    main()
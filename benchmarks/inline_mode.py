@@ -0,0 +1,48 @@
+# Peak memory and time of parse.py building the whole parse tree against the --inline mode
+# usage: python benchmarks/inline_mode.py [CLASSES]
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+import inline
+from semantic_passes import generateProgram
+from xml_output import CountingSink
+
+
+def measure(inputCode, inlineMode):
+    start = time.perf_counter()
+    parse.parseProgram(inputCode, CountingSink(), inlineMode)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    parse.parseProgram(inputCode, CountingSink(), inlineMode)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    inputCode = generateProgram(classCount)
+    parse.getParser()
+    inline.getInlineParser()
+
+    treeOutput = io.StringIO()
+    inlineOutput = io.StringIO()
+    parse.parseProgram(inputCode, treeOutput)
+    parse.parseProgram(inputCode, inlineOutput, True)
+    identical = treeOutput.getvalue() == inlineOutput.getvalue()
+    del treeOutput, inlineOutput
+
+    treeSeconds, treePeak = measure(inputCode, False)
+    inlineSeconds, inlinePeak = measure(inputCode, True)
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source, identical output: {identical}")
+    print(f"parse tree: {treeSeconds:.2f} s, peak {treePeak / 1e6:.1f} MB")
+    print(f"inline:     {inlineSeconds:.2f} s, peak {inlinePeak / 1e6:.1f} MB ({inlinePeak / treePeak:.0%} of the tree mode)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Peak resident memory of parse.py on generated programs of hundreds of megabytes, reading standard input as
+# text against --large-input, next to the node count of the tree; the outputs of both runs have to be equal
+# and on a deeply nested program the descent parser leaves to lark
+# usage: python benchmarks/large_input.py [MEGABYTES] [LITERAL_KB] [DEPTH]
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# parse.py ignores standard input unless enableUserInput is set, the same switch the live version flips
+commandLine = [sys.executable, "-c", "import parse; parse.enableUserInput = parse.printTree = True; parse.main()"]
+literalText = "lorem <ipsum> & dolor sit amet, é ü ß "  # escaped and multi-byte characters in every literal
+
+
+def writeProgram(file, megabytes, literalBytes):  # (bytes written, AST nodes) of a program of about that size
+    literal = (literalText * (literalBytes // len(literalText) + 1))[:literalBytes]
+    statement = f"x := '{literal}'. ".encode("utf-8")
+    statementsPerClass = 16
+    size = 0
+    nodes = 1
+    k = 0
+    while size < megabytes * 1e6:
+        text = f"class C{k} : Object {{ m{k} [ | ".encode("ascii") + statement * statementsPerClass + b"] }\n"
+        file.write(text)
+        size += len(text)
+        nodes += 3 + 3 * statementsPerClass  # class, method, block; assign, primary, literal
+        k += 1
+    text = b"class Main : Object { run [ | ] }\n"
+    file.write(text)
+    return size + len(text), nodes + 3
+
+
+def writeNested(file, depth):  # parentheses nested deeper than the descent parser recurses, with a description
+    file.write(f"\"nested <{depth}>\" class Main : Object {{ run [ | x := {'(' * depth}1{')' * depth}. y := 'a & b'. ] }}\n".encode("utf-8"))
+
+
+def run(path, arguments):  # (peak RSS in bytes, seconds, SHA-256 of the output, exit code)
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    with open(path, "rb") as source:
+        process = subprocess.Popen(commandLine + arguments, stdin=source, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=repoDir)
+        for chunk in iter(lambda: process.stdout.read(1 << 20), b""):
+            digest.update(chunk)
+        _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return usage.ru_maxrss * 1024, time.perf_counter() - start, digest.hexdigest(), process.returncode
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    literalBytes = int(float(sys.argv[2]) * 1024) if len(sys.argv) > 2 else 64 * 1024
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 400
+    handle, path = tempfile.mkstemp(suffix=".sol")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            size, nodes = writeProgram(file, megabytes, literalBytes)
+        emptyPeak = run(os.devnull, [])[0]  # interpreter and parser tables, reading an empty input
+        print(f"{size / 1e6:.0f} MB source, {literalBytes // 1024} KB literals, {nodes} AST nodes, interpreter alone {emptyPeak / 1e6:.0f} MB")
+        results = {}
+        for label, arguments in (("text", []), ("--large-input", ["--large-input"])):
+            peak, seconds, digest, exitCode = run(path, arguments)
+            results[label] = digest
+            print(f"  {label:>13}: peak RSS {peak / 1e6:7.0f} MB ({(peak - emptyPeak) / size:5.2f}x the source), {seconds:6.2f} s, exit code {exitCode}")
+        print(f"  same output: {results['text'] == results['--large-input']}")
+
+        with open(path, "wb") as file:
+            writeNested(file, depth)
+        outcomes = {label: run(path, arguments)[2:] for label, arguments in (("text", []), ("--large-input", ["--large-input"]))}
+        print(f"{depth} nested parentheses: exit codes {outcomes['text'][1]} as text, {outcomes['--large-input'][1]} with --large-input, same output: {outcomes['text'] == outcomes['--large-input']}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Encode time, decode time and size of the xml, json and bin output formats on one generated program
+# decoding reads every element and attribute value, the way an interpreter loading the program would
+# usage: python benchmarks/output_formats.py [CLASSES]
+import io
+import json
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ElementTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+import astformat
+from semantic_passes import bestOf, generateProgram
+
+
+def encode(outputFormat, program, inputCode):
+    out = io.BytesIO() if outputFormat == "bin" else io.StringIO()
+    parse.writers[outputFormat](out).program(program, inputCode)
+    return out.getvalue()
+
+
+def walkXML(text):
+    elements = 0
+    stack = [ElementTree.fromstring(text.encode("utf-8"))]
+    while stack:
+        element = stack.pop()
+        elements += 1
+        for value in element.attrib.values():
+            len(value)
+        stack.extend(element)
+    return elements
+
+
+def walkJSON(text):
+    elements = 0
+    stack = [json.loads(text)]
+    while stack:
+        element = stack.pop()
+        elements += 1
+        for value in element.values():
+            if isinstance(value, str):
+                len(value)
+        stack.extend(element.get("children", ()))
+    return elements
+
+
+def walkBinary(data):  # records in preorder, no element objects
+    elements = 0
+    for _, attributes, _ in astformat.BinaryDocument(data).records():
+        elements += 1
+        for _, value in attributes:
+            len(value)
+    return elements
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    inputCode = generateProgram(classCount)
+    program = parse.getParser().parse(inputCode)
+    encoded = {outputFormat: encode(outputFormat, program, inputCode) for outputFormat in ("xml", "json", "bin")}
+    xmlText = encoded["xml"]
+    identical = astformat.toXML(astformat.loads(encoded["json"])) == xmlText and astformat.toXML(astformat.loads(encoded["bin"])) == xmlText
+    walks = {"xml": walkXML, "json": walkJSON, "bin": walkBinary}
+    elements = {outputFormat: walks[outputFormat](data) for outputFormat, data in encoded.items()}
+
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source, {elements['xml']} elements, read back as the same XML: {identical}")
+    xmlSize = len(xmlText.encode("utf-8"))
+    for outputFormat, data in encoded.items():
+        size = len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+        encodeSeconds = bestOf(3, lambda: encode(outputFormat, program, inputCode))
+        decodeSeconds = bestOf(3, lambda: walks[outputFormat](data))
+        print(f"{outputFormat:>4}: {size / 1e6:7.2f} MB ({size / xmlSize:4.0%} of xml), encode {encodeSeconds * 1000:7.1f} ms, decode {decodeSeconds * 1000:7.1f} ms")
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as binaryFile:
+        binaryFile.write(encoded["bin"])
+    try:
+        openSeconds = bestOf(3, lambda: astformat.load(binaryFile.name).tag)
+        print(f" bin: mapped and root read in {openSeconds * 1e6:.0f} us, elements are decoded only when visited")
+    finally:
+        os.remove(binaryFile.name)
+
+
+if __name__ == "__main__":
+    main()
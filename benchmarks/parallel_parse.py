@@ -0,0 +1,44 @@
+# Wall time of one large program parsed sequentially against the sharded parallel mode for 1..MAX_JOBS workers
+# usage: python benchmarks/parallel_parse.py [CLASSES] [MAX_JOBS]
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+import parallel
+from semantic_passes import generateProgram
+
+
+def timed(function):
+    out = io.StringIO()
+    start = time.perf_counter()
+    function(out)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    maxJobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    inputCode = generateProgram(classCount)
+    parse.getBackend()
+    with tempfile.TemporaryFile() as inputFile:
+        inputFile.write(inputCode.encode("utf-8"))
+        inputFile.flush()
+        data = parallel.mapInput(inputFile)
+
+        sequentialSeconds, expected = timed(lambda out: parse.parseProgram(inputCode, out))
+        print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source, {os.cpu_count()} CPUs")
+        print(f"sequential: {sequentialSeconds:.2f} s")
+        jobs = 1
+        while jobs <= maxJobs:
+            seconds, output = timed(lambda out: parallel.parseProgramParallel(data, out, jobs))
+            print(f"{jobs:>3} jobs:    {seconds:.2f} s, {sequentialSeconds / seconds:.2f}x sequential, identical output: {output == expected}")
+            jobs *= 2
+        data.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Reserved keyword checks made while parsing against the walk over every class they replaced, on keyword-heavy
+# programs: one using the reserved words only where they are legal and one with a misused keyword in its last class
+# usage: python benchmarks/reserved_keywords.py [CLASSES]
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf
+
+
+def keywordProgram(classCount, misused):  # self, nil, true, false, 'from:' and builtin classes in every statement
+    classes = ["class Main : Object { run [ | x := self. ] }"]
+    for i in range(classCount):
+        last = misused and i == classCount - 1
+        classes.append(f"""class C{i} : Object {{
+    r{i} [ | h := [ | i := {"nil" if last else "self"}. j := String from: {"self" if last else "i"}. ]. ]
+    m{i}: [:a | s := self. n := nil. t := true. f := false. v := String from: a. w := [:b | u := true. o := [ | p := nil. ]. ]. ]
+    k{i}: with{i}: [:a :b | c := String from: (Integer from: b). d := a. e := self. g := false. ]
+}}""")
+    return "\n".join(classes)
+
+
+def everyClassWalked(program):  # what the checks cost when every class went through the keyword walk
+    for classDef in program.classes:
+        classDef.reserved = True
+    return program
+
+
+def check(program, level):
+    context = parse.PassContext(None, None, None, None, None, False)
+    context.program = program
+    error = parse.keywordsPass(context)
+    if error is None and level == "check":
+        parse.checkPass(context)
+        error = parse.finishPass(context)
+    return error
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    backend = parse.getBackend()
+    for name, misused in (("legal keywords", False), ("misused in last class", True)):
+        inputCode = keywordProgram(classCount, misused)
+        program = backend.parse(inputCode)
+        flagged = sum(classDef.reserved for classDef in program.classes)
+        parseSeconds = bestOf(3, lambda: backend.parse(inputCode))
+        print(f"{name}: {classCount} classes, {len(inputCode) / 1e6:.2f} MB source, {flagged} flagged by the parser, parse {parseSeconds * 1000:.1f} ms")
+        walked = everyClassWalked(backend.parse(inputCode))
+        for level in ("syntax", "check"):
+            walkSeconds = bestOf(3, lambda: check(walked, level))
+            flagSeconds = bestOf(3, lambda: check(program, level))
+            same = check(walked, level) == check(program, level)
+            print(f"  {level:>6}: walk every class {walkSeconds * 1000:7.1f} ms, flagged only {flagSeconds * 1000:7.1f} ms, same result: {same}, {check(program, level)}")
+
+
+if __name__ == "__main__":
+    main()
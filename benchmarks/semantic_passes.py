@@ -0,0 +1,51 @@
+# Fused SemanticAnalyzer against the original six-walk visitor pipeline on one large generated program
+# usage: python benchmarks/semantic_passes.py [CLASSES] [REPEATS]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from visitor_pipeline import runVisitorPipeline
+
+
+def generateProgram(classCount):  # valid program, every check runs to the end
+    classes = ["class Main : Object { run [ | x := 1. ] }"]
+    for i in range(classCount):
+        classes.append(f"""class C{i} : Object {{
+    m{i}: [:a | x := a plus: 1. y := (x plus: a) plus: 2. z := [:b :c | w := b plus: c. q := w.]. s := 'text'. o := C{i} new. ]
+    n{i}: with{i}: [:a :b | r := a equalTo: b. t := [:c | u := c concatenateWith: 'x'. ]. ]
+}}""")
+    return "\n".join(classes)
+
+
+def bestOf(repeats, function):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    inputCode = generateProgram(classCount)
+    tree = parse.buildParser().parse(inputCode)  # the visitors walk lark trees
+    program = parse.getParser().parse(inputCode)
+
+    def runAnalyzer():
+        semanticAnalyzer = parse.SemanticAnalyzer()
+        semanticAnalyzer.visitProgram(program)
+        semanticAnalyzer.finish()
+
+    visitorSeconds = bestOf(repeats, lambda: runVisitorPipeline(tree))
+    analyzerSeconds = bestOf(repeats, runAnalyzer)
+    print(f"{classCount} classes, best of {repeats}")
+    print(f"visitor pipeline:  {visitorSeconds * 1000:.1f} ms")
+    print(f"SemanticAnalyzer:  {analyzerSeconds * 1000:.1f} ms ({visitorSeconds / analyzerSeconds:.2f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
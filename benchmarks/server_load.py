@@ -0,0 +1,104 @@
+# Load generator for server.py, reports p50/p99 request latency, optionally against spawning parse.py per request
+# usage: python benchmarks/server_load.py SOCKET [CONNECTIONS] [REQUESTS] [CLASSES] [SPAWNS]
+# start the server first, e.g. python server.py --socket /tmp/sol25.sock --workers 4
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from semantic_passes import generateProgram
+
+parseScript = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "parse.py")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Connection:  # reconnects when a worker recycles and closes the connection
+    def __init__(self, path):
+        self.path = path
+        self.stream = None
+        self.reconnects = 0
+
+    def request(self, payload):
+        for _ in range(2):
+            if self.stream is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.path)
+                self.stream = sock.makefile("rwb")
+                sock.close()  # the file object keeps the socket open
+            try:
+                self.stream.write(payload)
+                self.stream.flush()
+                line = self.stream.readline()
+            except (BrokenPipeError, ConnectionResetError):
+                line = b""
+            if line:
+                return json.loads(line)
+            try:
+                self.stream.close()
+            except OSError:
+                pass  # unsent data of the closed connection
+            self.stream = None
+            self.reconnects += 1
+        raise ConnectionError("server closed the connection twice in a row")
+
+
+def runClient(path, requestCount, payloads, latencies, exitCodes, reconnects):
+    connection = Connection(path)
+    for i in range(requestCount):
+        start = time.perf_counter()
+        response = connection.request(payloads[i % len(payloads)])
+        latencies.append(time.perf_counter() - start)
+        exitCodes[response["exitCode"]] = exitCodes.get(response["exitCode"], 0) + 1
+    reconnects.append(connection.reconnects)
+
+
+def spawnLatencies(count, source):  # the cost server mode removes: a fresh interpreter and parser per request
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, parseScript], input=source.encode("utf-8"), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python benchmarks/server_load.py SOCKET [CONNECTIONS] [REQUESTS] [CLASSES] [SPAWNS]", file=sys.stderr)
+        sys.exit(10)
+    path = sys.argv[1]
+    connectionCount = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    requestCount = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    classCount = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    spawnCount = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+
+    sources = [generateProgram(classCount), "class Main : Object { run [ | x := y. ] }", "class Main : Object { run [ | "]
+    payloads = [(json.dumps({"id": i, "source": source}) + "\n").encode("utf-8") for i, source in enumerate(sources)]
+
+    latencies = []
+    exitCodes = {}
+    reconnects = []
+    threads = [threading.Thread(target=runClient, args=(path, requestCount // connectionCount, payloads, latencies, exitCodes, reconnects)) for _ in range(connectionCount)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wallSeconds = time.perf_counter() - start
+
+    print(f"{len(latencies)} requests over {connectionCount} connections, {len(latencies) / wallSeconds:.0f} requests/s, exit codes {exitCodes}, reconnects {sum(reconnects)}")
+    print(f"server      p50 {percentile(latencies, 0.5) * 1000:.2f} ms   p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    if spawnCount:
+        spawned = spawnLatencies(spawnCount, sources[0])
+        print(f"spawn/run   p50 {percentile(spawned, 0.5) * 1000:.2f} ms   p99 {percentile(spawned, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
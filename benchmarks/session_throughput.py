@@ -0,0 +1,58 @@
+# Programs per second of in-process parses through ParseSession, sequential and from a thread pool,
+# against one parse.py process per program; every path has to give the same exit codes, messages and XML
+# usage: python benchmarks/session_throughput.py [PROGRAMS] [THREADS]
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from workload import errorCodes, generateWorkload
+
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# parse.py ignores standard input unless enableUserInput is set, the same switch the live version flips
+commandLine = [sys.executable, "-c", "import parse; parse.enableUserInput = parse.printTree = True; parse.main()"]
+
+
+def runProcess(inputCode):
+    completed = subprocess.run(commandLine, input=inputCode.encode("utf-8"), capture_output=True, cwd=repoDir, check=False)
+    if completed.returncode != 0:
+        return parse.ParseResult(completed.returncode, completed.stderr.decode("utf-8").rstrip("\n") or None)
+    return parse.ParseResult(0, None, completed.stdout.decode("utf-8"))
+
+
+def outcome(result):  # lark lists expected tokens in no fixed order
+    return result.exitCode, sorted((result.diagnostics or "").splitlines()), result.xml
+
+
+def timed(function, programs):
+    start = time.perf_counter()
+    results = function(programs)
+    return time.perf_counter() - start, [outcome(result) for result in results]
+
+
+def main():
+    programCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    kinds = (None,) + errorCodes
+    programs = [generateWorkload(seed, kinds[seed % len(kinds)]) for seed in range(programCount)]
+    session = parse.ParseSession()
+    session.parse(programs[0])  # builds the shared parser outside the timings
+
+    def threadPool(programs):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(session.parse, programs))
+
+    sequentialSeconds, expected = timed(lambda programs: [session.parse(inputCode) for inputCode in programs], programs)
+    poolSeconds, poolResults = timed(threadPool, programs)
+    processSeconds, processResults = timed(lambda programs: [runProcess(inputCode) for inputCode in programs], programs)
+
+    print(f"{programCount} programs, {sum(map(len, programs)) / 1e6:.2f} MB source, {os.cpu_count()} CPUs, {parse.backendName} backend")
+    for name, seconds, results in (("in process", sequentialSeconds, expected), (f"{threads} threads", poolSeconds, poolResults), ("subprocess", processSeconds, processResults)):
+        print(f"{name:>11}: {programCount / seconds:8.1f} programs/s, {seconds / programCount * 1000:7.2f} ms each, same results: {results == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Time and peak memory of a full run with source positions off and on, size of the sidecars and the cost of
+# "which element covers offset N" lookups through astformat.PositionIndex
+# usage: python benchmarks/source_positions.py [CLASSES] [LOOKUPS]
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import astformat
+import parse
+from semantic_passes import bestOf, generateProgram
+
+
+def run(inputCode, positions):
+    parse.runProgram(inputCode, io.StringIO(), positions=parse.SourcePositions(inputCode) if positions else None)
+
+
+def peakBytes(inputCode, positions):
+    tracemalloc.start()
+    run(inputCode, positions)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def sidecarBytes(positions, extension):
+    handle, path = tempfile.mkstemp(suffix=extension)
+    os.close(handle)
+    try:
+        parse.writePositions(path, positions)
+        return os.path.getsize(path)
+    finally:
+        os.unlink(path)
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    lookupCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    inputCode = generateProgram(classCount)
+    parse.getBackend()
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.2f} MB source")
+    for positions in (False, True):
+        seconds = bestOf(3, lambda: run(inputCode, positions))
+        print(f"  positions {'on ' if positions else 'off'}: {seconds * 1000:7.1f} ms, peak {peakBytes(inputCode, positions) / 1e6:6.1f} MB")
+
+    positions = parse.SourcePositions(inputCode)
+    parse.runProgram(inputCode, None, level="check", positions=positions)
+    print(f"  {len(positions.elements) // 3} elements, sidecar {sidecarBytes(positions, '.json') / 1e6:.2f} MB json, {sidecarBytes(positions, '.bin') / 1e6:.2f} MB bin")
+    start = time.perf_counter()
+    index = astformat.PositionIndex(positions.elements)
+    buildSeconds = time.perf_counter() - start
+    offsets = [random.Random(k).randrange(len(inputCode)) for k in range(lookupCount)]
+    start = time.perf_counter()
+    for offset in offsets:
+        index.covering(offset)
+    lookupSeconds = time.perf_counter() - start
+    print(f"  index built in {buildSeconds * 1000:.1f} ms, {lookupCount} lookups in {lookupSeconds * 1000:.1f} ms ({lookupSeconds / lookupCount * 1e6:.2f} us each)")
+
+
+if __name__ == "__main__":
+    main()
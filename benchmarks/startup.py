@@ -0,0 +1,40 @@
+# Measures cold-start wall time of parse.py runs, optionally against other versions of the script
+# usage: python benchmarks/startup.py [--runs N] [script ...]
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timeRun(script):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def main():
+    arguments = sys.argv[1:]
+    runs = 30
+    if len(arguments) >= 2 and arguments[0] == "--runs":
+        runs = int(arguments[1])
+        arguments = arguments[2:]
+    scripts = arguments or [os.path.join(repoDir, "parse.py")]
+
+    for script in scripts:  # warm-up run also fills the grammar table cache
+        timeRun(script)
+    timings = {script: [] for script in scripts}
+    for _ in range(runs):  # interleaved so machine noise hits every script equally
+        for script in scripts:
+            timings[script].append(timeRun(script))
+
+    for script in scripts:
+        samples = timings[script]
+        print(f"{script}: median {statistics.median(samples) * 1000:.1f} ms, "
+              f"min {min(samples) * 1000:.1f} ms over {runs} runs")
+
+
+if __name__ == "__main__":
+    main()
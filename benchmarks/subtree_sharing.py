@@ -0,0 +1,80 @@
+# Time, peak memory and node count of parsing and writing XML with and without structural sharing (--share)
+# on a repetitive generated program and on a less repetitive seeded workload
+# usage: python benchmarks/subtree_sharing.py [CLASSES]
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import bestOf, generateProgram
+from workload import generateWorkload
+from xml_output import CountingSink
+
+
+def parseAndWrite(inputCode, share):  # (program, shared nodes, write seconds) like runProgram, without the checks
+    writer = parse.XMLWriter(CountingSink())
+    sharedNodes = 0
+    if share:
+        table = parse.SubtreeTable()
+        program = parse.getBackend().parse(inputCode, table)
+        sharedNodes = len(table)
+        writer.shareText(table.repeated)
+        del table  # runProgram drops the keys before writing as well
+    else:
+        program = parse.getBackend().parse(inputCode)
+    start = time.perf_counter()
+    writer.program(program, inputCode)
+    return program, sharedNodes, time.perf_counter() - start
+
+
+def peakBytes(inputCode, share):
+    tracemalloc.start()
+    parseAndWrite(inputCode, share)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def distinctNodes(program):  # node objects reachable from the program, shared ones counted once
+    seen = set()
+    work = [block for classDef in program.classes for block in (method.block for method in classDef.methods)]
+    while work:
+        node = work.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        kind = node.kind
+        if kind == "block":
+            work.extend(assign.expr for assign in node.assigns)
+        elif kind == "send":
+            work.append(node.receiver)
+            work.extend(node.args)
+        elif kind == "primary":
+            work.append(node.value)
+    return len(seen)
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpora = {
+        "repetitive": generateProgram(classCount),
+        "workload": generateWorkload(0, None, classes=classCount),
+    }
+    for name, inputCode in corpora.items():
+        plain, _, _ = parseAndWrite(inputCode, False)
+        shared, sharedNodes, _ = parseAndWrite(inputCode, True)
+        plainXML = parse.parseSource(inputCode).xml
+        identical = plainXML == parse.parseSource(inputCode, share=True).xml
+        print(f"{name}: {classCount} classes, {len(inputCode) / 1e6:.2f} MB source, identical XML: {identical}")
+        print(f"  nodes: {distinctNodes(plain)} built, {distinctNodes(shared)} with sharing, table held {sharedNodes}")
+        for share in (False, True):
+            label = "shared" if share else "plain "
+            totalSeconds = bestOf(3, lambda: parseAndWrite(inputCode, share))
+            writeSeconds = min(parseAndWrite(inputCode, share)[2] for _ in range(3))
+            print(f"  {label}: parse and write {totalSeconds * 1000:7.1f} ms, write {writeSeconds * 1000:7.1f} ms, peak {peakBytes(inputCode, share) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
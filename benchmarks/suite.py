@@ -0,0 +1,190 @@
+# Benchmark suite of the parser pipeline on synthetic workloads: every phase timed and memory-profiled on its
+# own, one scaling curve per workload size, results stored as JSON so runs can be compared
+# usage: python benchmarks/suite.py [--quick] [--seed N] [--repeats N] [-o FILE]
+#        python benchmarks/suite.py --compare BASE.json NEW.json
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import lark
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from workload import defaults, errorCodes, generateWorkload
+from xml_output import CountingSink
+
+# values each size runs through while the other sizes stay at their defaults
+curves = {
+    "classes": [5, 10, 20, 40, 80, 160],
+    "methods": [1, 2, 4, 8, 16, 32],
+    "statements": [1, 2, 4, 8, 16, 32],
+    "arity": [1, 2, 4, 8, 16],
+    "depth": [0, 1, 2, 3, 4, 5],
+    "literalSize": [1, 16, 256, 4096],
+}
+quickCurves = {size: values[:3] for size, values in curves.items()}
+phaseNames = ("parse", "check", "finish", "serialize", "pipeline", "lark parse", "lark transform")
+
+
+def runPhases(inputCode, treeParser):  # each phase on the result of the previous one, returns (name, seconds) pairs;
+    # parse is the default backend building the AST, lark parse and lark transform the tree and toAST of the fallback
+    timings = []
+
+    def timed(name, function):
+        start = time.perf_counter()
+        result = function()
+        timings.append((name, time.perf_counter() - start))
+        return result
+
+    program = timed("parse", lambda: parse.getBackend().parse(inputCode))
+    semanticAnalyzer = parse.SemanticAnalyzer()
+    timed("check", lambda: semanticAnalyzer.visitProgram(program))
+    timed("finish", semanticAnalyzer.finish)
+    timed("serialize", lambda: parse.XMLWriter(CountingSink()).program(program, inputCode))
+    timed("pipeline", lambda: parse.parseProgram(inputCode, CountingSink()))
+    tree = timed("lark parse", lambda: treeParser.parse(inputCode))
+    timed("lark transform", lambda: parse.toAST(tree))
+    return timings
+
+
+def phasePeaks(inputCode, treeParser):  # peak memory of each phase above what the earlier phases hold
+    peaks = {}
+
+    def traced(name, function):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = function()
+        peaks[name] = tracemalloc.get_traced_memory()[1] - base
+        return result
+
+    tracemalloc.start()
+    try:
+        program = traced("parse", lambda: parse.getBackend().parse(inputCode))
+        semanticAnalyzer = parse.SemanticAnalyzer()
+        traced("check", lambda analyzer=semanticAnalyzer, program=program: analyzer.visitProgram(program))
+        traced("finish", semanticAnalyzer.finish)
+        traced("serialize", lambda program=program: parse.XMLWriter(CountingSink()).program(program, inputCode))
+        del program, semanticAnalyzer  # the later phases start without the tree
+        traced("pipeline", lambda: parse.parseProgram(inputCode, CountingSink()))
+        tree = traced("lark parse", lambda: treeParser.parse(inputCode))
+        traced("lark transform", lambda: parse.toAST(tree))
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def measure(inputCode, treeParser, repeats):
+    best = {}
+    for _ in range(repeats):
+        for name, seconds in runPhases(inputCode, treeParser):
+            best[name] = min(best.get(name, seconds), seconds)
+    peaks = phasePeaks(inputCode, treeParser)
+    return {name: {"seconds": round(best[name], 6), "peakBytes": peaks[name]} for name in phaseNames}
+
+
+def checkErrorCodes(seed):  # every invalid variant has to end with its own exit code
+    results = []
+    for errorCode in errorCodes:
+        inputCode = generateWorkload(seed, errorCode, classes=5)
+        exitCode = 0
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                parse.parseProgram(inputCode, CountingSink())
+        except SystemExit as e:
+            exitCode = e.code
+        except Exception:
+            exitCode = 1
+        results.append({"expected": errorCode, "exitCode": exitCode})
+    return results
+
+
+def runSuite(seed=0, repeats=3, quick=False):
+    treeParser = parse.buildParser()
+    parse.getParser()
+    results = []
+    for size, values in (quickCurves if quick else curves).items():
+        for value in values:
+            inputCode = generateWorkload(seed, **{size: value})
+            phases = measure(inputCode, treeParser, repeats)
+            results.append({"size": size, "value": value, "sourceBytes": len(inputCode), "phases": phases})
+            print(f"{size:>11} {value:>5} {len(inputCode):>9} B  " + "  ".join(f"{name} {phases[name]['seconds'] * 1000:8.2f} ms" for name in phaseNames), file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "lark": lark.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeats": repeats,
+            "defaults": defaults,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "errorCodes": checkErrorCodes(seed),
+        "results": results,
+    }
+
+
+def compareRuns(basePath, newPath):
+    with open(basePath, encoding="utf-8") as baseFile, open(newPath, encoding="utf-8") as newFile:
+        base = json.load(baseFile)
+        new = json.load(newFile)
+    baseResults = {(result["size"], result["value"]): result["phases"] for result in base["results"]}
+    print(f"{'size':>11} {'value':>5}  " + "  ".join(f"{name:>14}" for name in phaseNames) + "   (new time / base time)")
+    for result in new["results"]:
+        key = (result["size"], result["value"])
+        if key not in baseResults:
+            continue
+        ratios = []
+        for name in phaseNames:
+            baseSeconds = baseResults[key].get(name, {}).get("seconds")
+            newSeconds = result["phases"].get(name, {}).get("seconds")
+            ratios.append(f"{newSeconds / baseSeconds:14.2f}" if baseSeconds and newSeconds is not None else f"{'-':>14}")
+        print(f"{key[0]:>11} {key[1]:>5}  " + "  ".join(ratios))
+
+
+def main():
+    arguments = sys.argv[1:]
+    if arguments[:1] == ["--compare"]:
+        if len(arguments) != 3:
+            print("usage: python benchmarks/suite.py --compare BASE.json NEW.json", file=sys.stderr)
+            sys.exit(10)
+        compareRuns(arguments[1], arguments[2])
+        return
+
+    seed = 0
+    repeats = 3
+    quick = False
+    outputPath = "suite-results.json"
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument == "--quick":
+            quick = True
+            i += 1
+        elif argument in ("--seed", "--repeats", "-o") and i + 1 < len(arguments):
+            if argument == "-o":
+                outputPath = arguments[i + 1]
+            elif argument == "--seed":
+                seed = int(arguments[i + 1])
+            else:
+                repeats = int(arguments[i + 1])
+            i += 2
+        else:
+            print(f"Unknown or incomplete option '{argument}'", file=sys.stderr)
+            sys.exit(10)
+
+    suite = runSuite(seed, repeats, quick)
+    with open(outputPath, "w", encoding="utf-8") as outputFile:
+        json.dump(suite, outputFile, indent=2)
+        outputFile.write("\n")
+    wrongCodes = [result for result in suite["errorCodes"] if result["exitCode"] != result["expected"]]
+    print(f"results written to {outputPath}, error workloads: {len(errorCodes) - len(wrongCodes)}/{len(errorCodes)} end with their exit code", file=sys.stderr)
+    sys.exit(1 if wrongCodes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# The original multi-visitor semantic pipeline of parse.py (six visit_topdown walks over the tree),
+# kept as the reference the fused SemanticAnalyzer is benchmarked and cross-checked against
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lark import Visitor
+from parse import (reservedKeywords, builtinConstructors, builtinWParamConstructors, builtinClasses, specialMethods,
+                   availableIdentifiers, availableIdentifierObjects, builtinMethods, builtinMethodsWParams)
+
+class ReservedKeywordsUse(Visitor):
+    def block_stat(self, tree):
+        i = 0
+        while i < len(tree.children):
+            if len(tree.children[i].children) > 0:
+                firstIdName = tree.children[i].children[0].value
+                if firstIdName in reservedKeywords | builtinConstructors | builtinWParamConstructors:
+                    print("Syntactic Error: Reserved keyword in assignment", file=sys.stderr)
+                    sys.exit(22)
+            i += 2
+
+    def block_par(self, tree):
+        for child in tree.children:
+            paramName = child.children[0].value
+            if paramName in reservedKeywords | builtinConstructors | builtinWParamConstructors:
+                print("Syntactic Error: Reserved keyword in parameter", file=sys.stderr)
+                sys.exit(22)
+
+    def expr_sel(self, tree):
+        for i in range(0, len(tree.children), 2):
+            idPart = tree.children[i].children[0].value
+            basePart = tree.children[i + 1].children[0]
+
+            if idPart in reservedKeywords | builtinConstructors:
+                print("Syntactic Error: Reserved keyword in selector id ", file=sys.stderr)
+                sys.exit(22)
+            if basePart.data not in {'block', 'expr'}:
+                basePartFinal = basePart.children[0].value
+                if basePartFinal in reservedKeywords | builtinConstructors | builtinWParamConstructors:
+                    print("Syntactic Error: Reserved keyword in selector base", file=sys.stderr)
+                    sys.exit(22)
+
+    def expr_tail(self, tree):
+        tailPart = tree.children[0]
+        if tailPart.data == "id":
+            tailId = tailPart.children[0].value
+            if tailId in reservedKeywords | builtinWParamConstructors:
+                print("Syntactic Error: Reserved keyword in expression tale", file=sys.stderr)
+                sys.exit(22)
+
+    def selector(self, tree):
+        selectorPart = tree.children[0]
+        if selectorPart.data == "id":
+            selectorId = selectorPart.children[0].value
+            if selectorId in reservedKeywords | builtinConstructors | builtinWParamConstructors:
+                print("Syntactic Error: Reserved keyword in method selector", file=sys.stderr)
+                sys.exit(22)
+
+        if selectorPart.data == "selector_tail":
+            for child in selectorPart.children:
+                selectorId = child.children[0].value
+                if selectorId in reservedKeywords | builtinConstructors | builtinWParamConstructors:
+                    print("Syntactic Error: Reserved keyword in method selector tail", file=sys.stderr)
+                    sys.exit(22)
+class ClassMainRun(Visitor):  # check Main with its first id being instance method run
+    def __init__(self):
+        self.insideMain = False
+        self.runInMain = False
+        self.methodCount = 0
+
+    def class_def(self, tree):
+        cidTree = tree.children[0]
+        className = cidTree.children[0].value
+        if className == "Main":
+            self.insideMain = True
+
+    def method_def(self, tree):
+        if len(tree.children) > 0:
+            selectorTree = tree.children[0]
+            selectorTreeChild = selectorTree.children[0]
+            if selectorTreeChild.data == "id":
+                firstIdName = selectorTreeChild.children[0].value
+                if self.insideMain and firstIdName == "run":
+                    self.runInMain = True
+
+    def runInMainConfirm(self):
+        if not self.runInMain:
+            print("Semantic Error Missing 'Main' class with 'run' instance method", file=sys.stderr)
+            sys.exit(31)
+class ArityBlockSelector(Visitor):
+    def method_def(self, tree):
+        selectorTailIdCount = 0
+        blockParCount = 0
+        for child in tree.children:
+            if child.data == "selector":
+                if child.children[0].data == "selector_tail":
+                    selectorTailIdTree = child.children[0]
+                    selectorTailIdCount = len(selectorTailIdTree.children)
+
+            if child.data == "block":
+                blockParTree = child.children[0]
+                blockParCount = len(blockParTree.children)
+        if selectorTailIdCount != blockParCount:
+            print("Semantic Error: Incorrect arity in method definition", file=sys.stderr)
+            sys.exit(33)
+class CollisionVariable(Visitor):
+    def block(self, tree):
+        blockParametersSaved = set()
+        blockDefinedVariablesSaved = set()
+        blockParTree = tree.children[0]
+        blockParams = blockParTree.children
+
+        for param in blockParams:
+            paramName = param.children[0].value
+            if paramName in blockParametersSaved:
+                print("Semantic Error: Duplicate parameter in block", file=sys.stderr)
+                sys.exit(35)
+            blockParametersSaved.add(paramName)
+
+        blockStatTree = tree.children[1]
+        for statement in blockStatTree.children:
+            if statement.data == "id":
+                variableName = statement.children[0].value
+                blockDefinedVariablesSaved.add(variableName)
+
+        if blockParametersSaved & blockDefinedVariablesSaved:  # intersection
+            print("Semantic Error: Variable collision in block", file=sys.stderr)
+            sys.exit(34)
+
+firstDefinedPassthrough = True
+definedClasses = set()
+definedMethods = set()  # callable before declaration
+definedMethodsWParams = set()  # callable before declaration
+classesSubclasses = [
+    ("Object", []),
+    ("Nil", []),
+    ("True", []),
+    ("False", []),
+    ("Integer", []),
+    ("String", []),
+    ("Block", [])
+]
+
+# 1st passthrough to save classes and methods
+class DefinedElementsAndTypes(Visitor):  # check defined variables, parameters, classes and class methods
+    # first interpretable expression base apart from 'expr' defines the type of id assigned id : == expr_base expr_tail
+    # self refers to current class, super to the parent of current class
+    # variables visible only within block exclusively, methods usable outside
+    def __init__(self):
+        self.currentClassType = None  # string
+        self.currentIdType = None  # string or None
+        self.currentIdIndex = 0  # helper for indexes of multi-level methods
+        self.classesSaved = set()
+        self.methodsSaved = set()
+        self.methodsWParamsSaved = set()
+        self.definedVariables = set()  # specific for block
+
+    def addToClassList(self, className, parentClass):
+        for classInfo in classesSubclasses:
+            if classInfo[0] == parentClass:
+                classInfo[1].append(className)
+                return
+
+    def findClassList(self, className):
+        for classInfo in classesSubclasses:
+            if className in classInfo[1]:
+                return classInfo[1]
+        return None
+
+    def findParentClass(self, className):
+        classList = self.findClassList(className)
+        index = classList.index(className)
+        if index > 0:
+            parentClass = classList[index - 1]
+            return parentClass
+        return classList[0]
+
+    # Class
+    def class_def(self, tree):
+        className = tree.children[0].children[0]
+        classParentName = tree.children[1].children[0]
+        self.currentClassType = classParentName
+        self.addToClassList(className, classParentName)
+
+        if firstDefinedPassthrough:
+            if className in self.classesSaved:
+                print(f"Semantic Error: Class redefinition '{className}'", file=sys.stderr)
+                sys.exit(35)
+            definedClasses.add(className)
+            self.classesSaved.add(className)
+        elif not firstDefinedPassthrough:
+            if classParentName not in definedClasses | builtinClasses:
+                print(f"Semantic Error: Undefined class parent used{classParentName}", file=sys.stderr)
+                sys.exit(32)
+
+
+    # Block
+    def block(self, tree):
+            self.definedVariables = set()  # reset defined variables
+            for child in tree.children:
+                if child.data == "block_par":
+                    for param in child.children:
+                        paramId = param.children[0].value
+                        self.definedVariables.add((paramId, None))
+
+            for child in tree.children:
+                if child.data == "block_stat":
+                    for statement in child.children:
+                        if statement.data == "id":
+                            if len(statement.children) > 0:
+                                varId = statement.children[0].value
+                                self.currentIdType = None  # reset stat
+                                self.definedVariables.add((varId, self.currentIdType))  # adding tuple
+                        if statement.data == "expr":
+                            self.exprCheck(statement)
+
+    def idCheckHelper(self, element, type):
+        idName = element.children[0].value
+        methodWParams = set(part for var in definedMethodsWParams for part in var.split(':'))
+        builtinMethodWParams = set(part for var in builtinMethodsWParams for part in var.split(':'))
+        if type == 'selector':
+            if idName not in (methodWParams | builtinMethodWParams | builtinConstructors | availableIdentifiers):
+                print(f"Semantic Error: Undefined method variable in expression selector '{idName}'",file=sys.stderr)
+                sys.exit(32)
+        elif type == 'tail':
+            if idName not in (
+                    {var[0] for var in self.definedVariables} | availableIdentifiers | builtinConstructors):
+                print(f"Semantic Error: Undefined method variable in expression tail '{idName}'",
+                      file=sys.stderr)
+                sys.exit(32)
+        elif idName not in {var[0] for var in self.definedVariables} | availableIdentifiers | builtinConstructors:
+            print(f"Semantic Error: Undefined variable in expression '{idName}'", file=sys.stderr)
+            sys.exit(32)
+        elif idName in availableIdentifierObjects:
+            if idName == 'true':
+                self.currentIdType = 'True'
+            elif idName == 'false':
+                self.currentIdType = 'False'
+            elif idName == 'nil':
+                self.currentIdType = 'Nil'
+        elif idName == 'self':
+            self.currentIdType = self.currentClassType
+        elif idName == 'super':
+            self.currentIdType = self.findParentClass(self.currentClassType)
+
+    def exprCheck(self, tree):
+        exprBase = tree.children[0].children[0]
+        self.exprBaseCheck(exprBase)
+        exprTail = tree.children[1].children[0]
+        self.exprTailCheck(exprTail)
+
+    def exprBaseCheck(self, element):
+        if element.data == 'int':
+            if self.currentIdType is None:
+                self.currentIdType = 'Integer'
+        elif element.data == 'str':
+            if self.currentIdType is None:
+                self.currentIdType = 'String'
+        elif element.data == 'id':
+            self.idCheckHelper(element, 'base')
+        elif element.data == 'cid':
+            cidName = element.children[0].value
+            if cidName not in definedClasses | builtinClasses:
+                print(f"Semantic Error: Undefined class '{cidName}'", file=sys.stderr)
+                sys.exit(32)
+            self.currentIdType = cidName
+        elif element.data == 'block':
+            self.currentIdType = 'Block'
+            self.block(element)
+        elif element.data == 'expr':
+            self.exprCheck(element)
+
+    def exprTailCheck(self, tree):
+        if tree.data == "id":  # method without parameters
+            self.idCheckHelper(tree, 'tail')
+        elif tree.data == "expr_sel":
+            self.exprSelCheck(tree)  # method with parameter(s)
+
+    def exprSelCheck(self, tree):
+        for index, element in enumerate(tree.children):
+            if element.data == "id":
+                self.idCheckHelper(element, 'selector')
+            elif element.data == "expr_base":
+                exprBase = element.children[0]
+                self.exprBaseCheck(exprBase)
+
+    # method
+    def method_def(self, tree):
+        if firstDefinedPassthrough:
+            for element in tree.children:
+                if element.data == "selector":
+                    selectorPart = element.children[0]
+                    if selectorPart.data == "id":
+                        methodName = selectorPart.children[0].value
+                        if methodName not in specialMethods:
+                            if methodName in self.methodsSaved | builtinMethods:
+                                print(f"Semantic Error: method redefinition {methodName}", file=sys.stderr)
+                                sys.exit(35)
+                            definedMethods.add(methodName)
+                            self.methodsSaved.add(methodName)
+                    elif selectorPart.data == "selector_tail":
+                        selectorTail = element.children[0].children
+                        if len(selectorTail) == 1:
+                            methodName = selectorTail[0].children[0].value
+                            if methodName in self.methodsSaved | builtinMethods:
+                                print(f"Semantic Error: method redefinition {methodName}", file=sys.stderr)
+                                sys.exit(35)
+                            definedMethodsWParams.add(methodName)
+                            self.methodsSaved.add(methodName)
+                        elif len(selectorTail) > 1:
+                            methodIds = [methodId.children[0].value for methodId in selectorTail]
+                            methodNameJoined = ":".join(methodIds)
+                            if methodNameJoined in self.methodsWParamsSaved | builtinMethods:
+                                print(f"Semantic Error: method redefinition {methodNameJoined}", file=sys.stderr)
+                                sys.exit(35)
+                            definedMethodsWParams.add(methodNameJoined)
+                            self.methodsWParamsSaved.add(methodNameJoined)
+
+
+def runVisitorPipeline(tree):  # same order as parse.py ran the visitors, exits on the first error
+    global firstDefinedPassthrough
+    firstDefinedPassthrough = True
+    definedClasses.clear()
+    definedMethods.clear()
+    definedMethodsWParams.clear()
+    classesSubclasses[:] = [(className, []) for className in ("Object", "Nil", "True", "False", "Integer", "String", "Block")]
+
+    ReservedKeywordsUse().visit_topdown(tree)  # Error 22
+    semanticClassMainRun = ClassMainRun()
+    semanticClassMainRun.visit_topdown(tree)  # Error 31
+    semanticClassMainRun.runInMainConfirm()
+    semanticDefinedElements = DefinedElementsAndTypes()
+    semanticDefinedElements.visit_topdown(tree)
+    firstDefinedPassthrough = False
+    semanticDefinedElements.visit_topdown(tree)  # Error 32
+    ArityBlockSelector().visit_topdown(tree)  # Error 33
+    CollisionVariable().visit_topdown(tree)  # Error 34, 35
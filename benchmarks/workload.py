@@ -0,0 +1,121 @@
+# Seeded generator of synthetic SOL25 programs for the benchmark suite
+# every size can be scaled on its own, programs are valid unless an error code is asked for
+import random
+import string
+
+defaults = {
+    "classes": 20,  # user classes next to Main
+    "methods": 4,  # methods per class, unary ones first and keyword ones last
+    "statements": 4,  # assignments per block
+    "arity": 2,  # keyword selector parts of a method and the largest send
+    "depth": 2,  # nesting of keyword sends inside an expression
+    "literalSize": 8,  # characters of string literals and digits of integer literals
+}
+errorCodes = (21, 22, 31, 32, 33, 34, 35)
+# builtin selector parts usable in any keyword send
+builtinParts = ("plus", "minus", "equalTo", "greaterThan", "concatenateWith", "startsWith", "endsBefore", "identicalTo", "and", "or", "from")
+stringCharacters = string.ascii_letters + string.digits + " .,:;!?"
+
+
+class WorkloadGenerator:
+    def __init__(self, seed=0, **sizes):
+        unknown = set(sizes) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown workload sizes {sorted(unknown)}")
+        self.sizes = dict(defaults, **sizes)
+        self.random = random.Random(seed)
+        self.selectorParts = list(builtinParts)  # grows with every declared keyword method
+        self.classNames = []
+
+    def literal(self):
+        size = max(1, self.sizes["literalSize"])
+        if self.random.random() < 0.5:
+            return str(self.random.randint(1, 9)) + "".join(self.random.choice(string.digits) for _ in range(size - 1))
+        return "'" + "".join(self.random.choice(stringCharacters) for _ in range(size)) + "'"
+
+    def argument(self, variables, depth):  # selector arguments may not be reserved names
+        choice = self.random.random()
+        if depth > 0 and choice < 0.4:
+            return "(" + self.expression(variables, depth - 1) + ")"
+        if variables and choice < 0.7:
+            return self.random.choice(variables)
+        if self.classNames and choice < 0.8:
+            return self.random.choice(self.classNames)
+        return self.literal()
+
+    def receiver(self, variables, depth):
+        choice = self.random.random()
+        if choice < 0.2:
+            return self.random.choice(("self", "nil", "true", "false", "Integer", "String"))
+        return self.argument(variables, depth)
+
+    def expression(self, variables, depth):
+        if depth <= 0 or self.random.random() < 0.2:
+            if variables and self.random.random() < 0.3:
+                return self.receiver(variables, 0) + " " + self.random.choice(variables)  # unary sends name variables
+            return self.receiver(variables, 0)
+        partCount = self.random.randint(1, max(1, self.sizes["arity"]))
+        parts = [self.random.choice(self.selectorParts) for _ in range(partCount)]
+        arguments = " ".join(f"{part}: {self.argument(variables, depth - 1)}" for part in parts)
+        return f"{self.receiver(variables, depth - 1)} {arguments}"
+
+    def block(self, params, extraStatements=()):
+        variables = list(params)
+        statements = list(extraStatements)
+        for i in range(self.sizes["statements"]):
+            statements.append(f"v{i} := {self.expression(variables, self.sizes['depth'])}.")
+            variables.append(f"v{i}")  # used from the next statement on
+        header = " ".join(f":{param}" for param in params)
+        return f"[{header} | " + " ".join(statements) + " ]"
+
+    def classDef(self, index, extraMethods=()):
+        name = f"C{index}"
+        parent = self.random.choice(self.classNames) if self.classNames and self.random.random() < 0.5 else "Object"
+        self.classNames.append(name)
+
+        methodCount = self.sizes["methods"]
+        keywordCount = methodCount // 2 if self.sizes["arity"] > 0 else 0
+        selectors = []
+        for i in range(methodCount - keywordCount):
+            selectors.append((f"u{index}x{i}", ()))
+        for i in range(methodCount - keywordCount, methodCount):
+            parts = [f"k{index}x{i}p{j}" for j in range(self.sizes["arity"])]
+            selectors.append(("".join(part + ": " for part in parts).strip(), [f"a{j}" for j in range(len(parts))]))
+            self.selectorParts.extend(parts)  # declared when the class starts, usable in its own blocks
+
+        methods = list(extraMethods)
+        for selector, params in selectors:
+            methods.append(f"    {selector} {self.block(params)}")
+        return f"class {name} : {parent} {{\n" + "\n".join(methods) + "\n}"
+
+    def program(self, errorCode=None):  # valid program, or one whose first error has the given exit code
+        mainStatements = []
+        mainName = "Main"
+        if errorCode == 21:
+            mainStatements.append("x := 1 # 2.")
+        elif errorCode == 22:
+            mainStatements.append("self := 1.")
+        elif errorCode == 31:
+            mainName = "Start"
+        elif errorCode == 32:
+            mainStatements.append("x := undefinedVariable.")
+        elif errorCode is not None and errorCode not in errorCodes:
+            raise ValueError(f"No workload for error code {errorCode}")
+
+        classes = [f"class {mainName} : Object {{\n    run {self.block((), mainStatements)}\n}}"]
+        for index in range(self.sizes["classes"]):
+            extraMethods = ()
+            if errorCode == 34 and index == 0:  # unary in front of other methods, so the arity check still passes
+                extraMethods = ["    collide [:p | p := 1. ]" if self.sizes["methods"] else "    collide: [:p | p := 1. ]"]
+            classes.append(self.classDef(index, extraMethods))
+        if errorCode == 33:
+            classes.append("class Arity : Object {\n    wrong: [ | ]\n}")
+        elif errorCode == 34 and not self.sizes["classes"]:
+            classes.append("class Collide : Object {\n    collide: [:p | p := 1. ]\n}")
+        elif errorCode == 35:
+            classes.append("class Main : Object {\n}")
+        return "\n".join(classes) + "\n"
+
+
+def generateWorkload(seed=0, errorCode=None, **sizes):
+    return WorkloadGenerator(seed, **sizes).program(errorCode)
@@ -0,0 +1,59 @@
+# Streaming XMLWriter against the original ElementTree/minidom output stage on a multi-megabyte program
+# usage: python benchmarks/xml_output.py [CLASSES]
+import copy
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+from semantic_passes import generateProgram
+from xml_reference import transformToXML
+
+
+class CountingSink:  # stands in for stdout, keeps only the number of characters written
+    def __init__(self):
+        self.written = 0
+
+    def write(self, text):
+        self.written += len(text)
+
+
+def measure(function, tree):  # CodeTransformer retypes the tokens it visits, so every run gets a fresh copy
+    treeCopy = copy.deepcopy(tree)
+    start = time.perf_counter()
+    function(treeCopy)
+    seconds = time.perf_counter() - start
+    treeCopy = copy.deepcopy(tree)
+    tracemalloc.start()
+    function(treeCopy)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    classCount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    inputCode = generateProgram(classCount)
+    tree = parse.buildParser().parse(inputCode)  # the reference transforms lark trees
+    program = parse.getParser().parse(inputCode)
+
+    streamed = io.StringIO()
+    parse.XMLWriter(streamed).program(program, inputCode)
+    identical = streamed.getvalue() == transformToXML(copy.deepcopy(tree), inputCode)
+    del streamed
+
+    referenceSeconds, referencePeak = measure(lambda treeCopy: transformToXML(treeCopy, inputCode), tree)
+    writerSeconds, writerPeak = measure(lambda programCopy: parse.XMLWriter(CountingSink()).program(programCopy, inputCode), program)
+    sink = CountingSink()
+    parse.XMLWriter(sink).program(program, inputCode)
+
+    print(f"{classCount} classes, {len(inputCode) / 1e6:.1f} MB source, {sink.written / 1e6:.1f} MB XML, identical output: {identical}")
+    print(f"ElementTree + minidom: {referenceSeconds:.2f} s, peak {referencePeak / 1e6:.1f} MB above the parse tree")
+    print(f"XMLWriter:             {writerSeconds:.2f} s, peak {writerPeak / 1e6:.1f} MB above the parse tree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# The original ElementTree -> tostring -> minidom output stage of parse.py,
+# kept as the reference XMLWriter output is benchmarked and compared against
+import re
+import xml.etree.ElementTree as ET
+from lark import Transformer
+
+classLiterals: set = {"Integer", "String", "Nil", "True", "False"}
+
+
+class CodeTransformer(Transformer):
+    def __init__(self, inputCode):
+        super().__init__()
+        self.inputCode = inputCode  # description comment is searched in the raw source
+
+    def getFirstComment(self):
+        blockComment = re.search(r'"([^"]*)"', self.inputCode)
+        if blockComment:
+            comment = blockComment.group(1)
+            return comment
+        else:
+            return None
+
+    def program(self, items):
+        programElem = ET.Element('program', language='SOL25')
+
+        comment = self.getFirstComment()
+        if comment:
+            programElem.set('description', comment)
+
+        for item in items:
+            programElem.append(item)
+
+        return programElem
+
+    def class_def(self, items):
+        className = items[0]
+        parentName = items[1]
+        methods = items[2]
+        classElem = ET.Element('class', name=className, parent=parentName)
+
+        if isinstance(methods, list):
+            for method in methods:
+                if method.attrib.get('selector') or len(method) > 0:
+                    classElem.append(method)
+        else:
+            if methods.attrib.get('selector') or len(methods) > 0:
+                classElem.append(methods)
+        return classElem
+
+    def selector(self, items):
+        return items[0]
+
+    def selector_tail(self, items):
+        return items[0]
+
+    def method_def(self, items):
+        methodElem = ET.Element('method')
+        for i in range(0, len(items), 2):
+            methodElem.set('selector', items[i])
+            blockElem = items[i + 1]
+            methodElem.append(blockElem)
+        return methodElem
+
+    def block(self, items):
+        blockElem = ET.Element('block', arity=str(len(items[0])))
+        if items[0]:
+            for paramElem in items[0]:
+                blockElem.append(paramElem)
+
+        if len(items) > 1:
+            for stat in items[1]:
+                blockElem.append(stat)
+
+        return blockElem
+
+    def helperDetermineExp(self, item):
+        exprElem = ET.Element('expr')
+
+        if not item or (isinstance(item, str) and item.strip() == ""):
+            return item
+
+        if isinstance(item, str):
+            if item.type == "id":
+                if item == "true":
+                    literalElem = ET.Element('literal')
+                    literalElem.set('class', 'True')
+                    literalElem.set('value', item)
+                    exprElem.append(literalElem)
+                elif item == "false":
+                    literalElem = ET.Element('literal')
+                    literalElem.set('class', 'False')
+                    literalElem.set('value', item)
+                    exprElem.append(literalElem)
+                elif item == "nil":
+                    literalElem = ET.Element('literal')
+                    literalElem.set('class', 'Nil')
+                    literalElem.set('value', item)
+                    exprElem.append(literalElem)
+                else:
+                    varElem = ET.Element('var', name=item)
+                    exprElem.append(varElem)
+            elif item.type == "int":
+                literalElem = ET.Element('literal')
+                literalElem.set('class', 'Integer')
+                literalElem.set('value', item)
+                exprElem.append(literalElem)
+            elif item.type == "str":
+                literalElem = ET.Element('literal')
+                literalElem.set('class', 'String')
+                literalElem.set('value', item[1:-1])
+                exprElem.append(literalElem)
+            elif item.type == "cid":
+                if item in classLiterals:
+                    literalElem = ET.Element('literal')
+                    literalElem.set('class', "class")
+                    literalElem.set('value', item)
+                    exprElem.append(literalElem)
+                else:
+                    varElem = ET.Element('var', name=item)
+                    exprElem.append(varElem)
+        else:
+            exprElem.append(item)
+        return exprElem
+
+    def expr(self, items):
+        baseItem = items[0]
+        tailItem = items[1]
+
+        exprElem = self.helperDetermineExp(baseItem)
+        if not tailItem:
+            return exprElem
+
+        sendElem = ET.Element('send')
+        sendElem.append(exprElem)
+
+        selParts = []
+        argIndex = 0
+
+        if isinstance(tailItem, str):
+            selParts.append(tailItem)
+        elif isinstance(tailItem, list):
+            i = 0
+            while i < len(tailItem):
+                sel = tailItem[i]
+                selParts.append(f"{sel}:")
+
+                if i + 1 < len(tailItem):
+                    arg = tailItem[i + 1]
+                    argIndex += 1
+                    argExpElem = self.helperDetermineExp(arg)
+                    argElem = ET.Element('arg', order=str(argIndex))
+                    argElem.append(argExpElem)
+                    sendElem.append(argElem)
+                i += 2
+
+        selectorStr = "".join(selParts)
+        sendElem.set('selector', selectorStr)
+        outExprElem = ET.Element('expr')
+        outExprElem.append(sendElem)
+
+        return outExprElem
+
+    def expr_base(self, items):
+        if len(items) == 1:
+            return items[0]
+        return items
+
+    def expr_tail(self, items):
+        return items[0]
+
+    def expr_sel(self, items):
+        return items
+
+    def block_par(self, items):
+        parameters = []
+        for i, param in enumerate(items, start=1):
+            paramElem = ET.Element('parameter', name=param, order=str(i))
+            parameters.append(paramElem)
+
+        return parameters
+
+    def block_stat(self, items):
+        assigns = []
+        order = 1
+
+        for i in range(0, len(items), 2):
+            varName = items[i]
+            exprElem = items[i + 1]
+
+            assignElem = ET.Element('assign', order=str(order))
+            varElem = ET.Element('var', name=varName)
+            assignElem.append(varElem)
+            assignElem.append(exprElem)
+            assigns.append(assignElem)
+            order += 1
+        return assigns
+
+    def id(self, token):
+        token[0].type = "id"
+        return token[0]
+
+    def cid(self, token):
+        token[0].type = "cid"  # access with token 0
+        return token[0]
+
+    def int(self, token):
+        token[0].type = "int"
+        return token[0]
+
+    def str(self, token):
+        token[0].type = "str"
+        return token[0]
+
+
+def prettyPrintXML(xmlRoot):
+    from xml.dom import minidom
+    xmlString = ET.tostring(xmlRoot, encoding="utf-8").decode("utf-8")
+    xmlHeader = '<?xml version="1.0" encoding="UTF-8"?>'
+    finalXML = xmlHeader + xmlString
+
+    domXML = minidom.parseString(finalXML)
+    return domXML.toprettyxml(indent="  ", encoding="utf-8").decode("utf-8")
+
+
+def transformToXML(tree, inputCode):
+    return prettyPrintXML(CodeTransformer(inputCode).transform(tree))
@@ -0,0 +1,277 @@
+import sys
+import os
+import json
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+
+# Conformance and performance runner over golden corpora: every case is a SOL25 source with its expected
+# exit code in NAME.rc (0 when missing) and, for exit code 0, its expected XML in NAME.out or NAME.xml.
+# Cases run in a process pool, every worker parses in process through one ParseSession. XML is compared as
+# element trees, attribute order and whitespace around elements do not matter. Parse times are compared
+# with a baseline saved by an earlier run, a case is a regression when it gets slower than the threshold allows.
+defaultPattern = "*.src"
+defaultThreshold = 0.25  # allowed slowdown relative to the baseline
+defaultSlack = 0.002  # seconds every case may lose on top, timer noise of tiny cases
+helpMessage = """Usage: python conformance.py [options] PATH...
+PATH can be a corpus directory (searched recursively), a source file or a glob pattern
+a case NAME.src expects the exit code in NAME.rc (default 0) and, on success, the XML in NAME.out or NAME.xml
+
+  -j, --jobs N            number of worker processes (default: CPU count), use 1 for stable timings
+  -p, --pattern GLOB      source file pattern used when searching directories (default: *.src)
+  -r, --repeat N          parse every case N times and keep the fastest (default: 1)
+  -b, --baseline FILE     compare parse times with the ones saved in FILE
+  -s, --save-baseline FILE
+                          save the parse times of this run into FILE
+  -t, --threshold RATIO   allowed slowdown against the baseline, 0.25 is 25 % (default: 0.25)
+      --slack MS          milliseconds every case may lose on top of the threshold (default: 2)
+      --backend NAME      parser backend of parse.py (default: descent)
+      --json FILE         write the report of every case as JSON into FILE
+  -h, --help              show this help message"""
+
+session = None  # ParseSession of a worker process
+
+
+def initWorker(backendName):
+    global session
+    import parse  # deferred, the parent only collects cases and compares results
+
+    session = parse.ParseSession(backendName)
+    parse.getParser()  # fallback of the descent backend
+
+
+def expectedFiles(source):  # (exit code file, XML file or None)
+    base = os.path.splitext(source)[0]
+    for extension in (".out", ".xml"):
+        if os.path.isfile(base + extension):
+            return base + ".rc", base + extension
+    return base + ".rc", None
+
+
+def readExpected(source):  # (expected exit code, expected XML text or None)
+    codePath, xmlPath = expectedFiles(source)
+    exitCode = 0
+    if os.path.isfile(codePath):
+        with open(codePath, encoding="utf-8") as codeFile:
+            exitCode = int(codeFile.read().strip())
+    xml = None
+    if xmlPath is not None:
+        with open(xmlPath, encoding="utf-8") as xmlFile:
+            xml = xmlFile.read()
+    return exitCode, xml
+
+
+def normalizedText(text):
+    return (text or "").strip()
+
+
+def compareXML(expected, actual):  # None when both documents have the same elements, else where they differ first
+    try:
+        expectedRoot = ElementTree.fromstring(expected.encode("utf-8"))
+    except ElementTree.ParseError as e:
+        return f"expected XML is not well-formed: {e}"
+    try:
+        actualRoot = ElementTree.fromstring(actual.encode("utf-8"))
+    except ElementTree.ParseError as e:
+        return f"output is not well-formed: {e}"
+    work = [(expectedRoot, actualRoot, "/" + expectedRoot.tag)]
+    while work:
+        expectedElement, actualElement, path = work.pop()
+        if expectedElement.tag != actualElement.tag:
+            return f"{path}: element <{actualElement.tag}> instead of <{expectedElement.tag}>"
+        if expectedElement.attrib != actualElement.attrib:
+            for name in sorted(set(expectedElement.attrib) | set(actualElement.attrib)):
+                if expectedElement.get(name) != actualElement.get(name):
+                    return f"{path}: attribute {name} is {actualElement.get(name)!r} instead of {expectedElement.get(name)!r}"
+        if normalizedText(expectedElement.text) != normalizedText(actualElement.text):
+            return f"{path}: text {normalizedText(actualElement.text)!r} instead of {normalizedText(expectedElement.text)!r}"
+        if len(expectedElement) != len(actualElement):
+            return f"{path}: {len(actualElement)} child elements instead of {len(expectedElement)}"
+        children = []
+        positions = {}  # tag -> count so far, paths number elements among siblings of the same tag
+        for expectedChild, actualChild in zip(expectedElement, actualElement):
+            positions[expectedChild.tag] = positions.get(expectedChild.tag, 0) + 1
+            children.append((expectedChild, actualChild, f"{path}/{expectedChild.tag}[{positions[expectedChild.tag]}]"))
+        work.extend(reversed(children))
+    return None
+
+
+def runCase(job):
+    source, name, repeat = job
+    result = {"case": name, "source": source, "status": "pass", "exitCode": None, "expectedExitCode": None, "seconds": None, "detail": None}
+    try:
+        _, inputCode = batch.readSource(source)
+        expectedExitCode, expectedXML = readExpected(source)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        result["status"] = "error"
+        result["detail"] = f"Cannot read case: {e}"
+        return result
+    result["expectedExitCode"] = expectedExitCode
+
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = session.parse(inputCode)
+        seconds.append(time.perf_counter() - start)
+    result["seconds"] = round(min(seconds), 6)
+    result["exitCode"] = parsed.exitCode
+    if parsed.exitCode != expectedExitCode:
+        result["status"] = "fail"
+        result["detail"] = f"exit code {parsed.exitCode} instead of {expectedExitCode}" + (f": {parsed.diagnostics}" if parsed.diagnostics else "")
+    elif expectedExitCode == 0 and expectedXML is not None:
+        difference = compareXML(expectedXML, parsed.xml)
+        if difference is not None:
+            result["status"] = "fail"
+            result["detail"] = difference
+    return result
+
+
+def checkTimings(results, baseline, threshold, slack):  # marks passing cases slower than the baseline allows
+    for result in results:
+        baselineSeconds = baseline.get(result["case"])
+        result["baselineSeconds"] = baselineSeconds
+        if baselineSeconds is None or result["status"] != "pass":
+            continue
+        if result["seconds"] > baselineSeconds * (1 + threshold) + slack:
+            result["status"] = "regression"
+            result["detail"] = f"{result['seconds'] * 1000:.3f} ms against {baselineSeconds * 1000:.3f} ms in the baseline"
+
+
+def caseName(source, root):  # path relative to the corpus without the extension, the key of the baseline
+    return os.path.splitext(os.path.relpath(source, root or "."))[0].replace(os.sep, "/")
+
+
+def runCorpus(paths, jobs=None, pattern=defaultPattern, repeat=1, backendName="descent", baseline=None, threshold=defaultThreshold, slack=defaultSlack):
+    sources = batch.collectSources(paths, pattern)
+    work = [(source, caseName(source, root), repeat) for source, root in sources]
+    jobs = jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    chunkSize = max(1, min(32, len(work) // (jobs * 4) or 1))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker, initargs=(backendName,)) as executor:
+        results = list(executor.map(runCase, work, chunksize=chunkSize))
+    wallSeconds = time.perf_counter() - start
+    if baseline is not None:
+        checkTimings(results, baseline, threshold, slack)
+
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    return {
+        "cases": len(results),
+        "jobs": jobs,
+        "wallSeconds": round(wallSeconds, 6),
+        "parseSeconds": round(sum(result["seconds"] or 0 for result in results), 6),
+        "statuses": statuses,
+        "results": results,
+    }
+
+
+def main():
+    arguments = sys.argv[1:]
+    paths = []
+    jobs = None
+    pattern = defaultPattern
+    repeat = 1
+    baselinePath = None
+    savePath = None
+    threshold = defaultThreshold
+    slack = defaultSlack
+    backendName = os.environ.get("SOL25_BACKEND") or "descent"
+    jsonPath = None
+
+    optionsWithValue = {"-j", "--jobs", "-p", "--pattern", "-r", "--repeat", "-b", "--baseline", "-s", "--save-baseline", "-t", "--threshold", "--slack", "--backend", "--json"}
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument in ("-h", "--help"):
+            print(helpMessage)
+            sys.exit(0)
+        elif argument in optionsWithValue:
+            if i + 1 >= len(arguments):
+                print(f"Missing value for '{argument}', use '--help' to show help message", file=sys.stderr)
+                sys.exit(10)
+            value = arguments[i + 1]
+            if argument in ("-p", "--pattern"):
+                pattern = value
+            elif argument in ("-b", "--baseline"):
+                baselinePath = value
+            elif argument in ("-s", "--save-baseline"):
+                savePath = value
+            elif argument == "--backend":
+                backendName = value
+            elif argument == "--json":
+                jsonPath = value
+            elif argument in ("-t", "--threshold", "--slack"):
+                try:
+                    number = float(value)
+                except ValueError:
+                    number = -1.0
+                if not number >= 0:
+                    print(f"Invalid value '{value}' for '{argument}'", file=sys.stderr)
+                    sys.exit(10)
+                if argument == "--slack":
+                    slack = number / 1000
+                else:
+                    threshold = number
+            else:
+                if not value.isdigit() or int(value) < 1:
+                    print(f"Invalid value '{value}' for '{argument}'", file=sys.stderr)
+                    sys.exit(10)
+                if argument in ("-r", "--repeat"):
+                    repeat = int(value)
+                else:
+                    jobs = int(value)
+            i += 2
+        elif argument.startswith("-"):
+            print(f"Unknown option '{argument}', use '--help' to show help message", file=sys.stderr)
+            sys.exit(10)
+        else:
+            paths.append(argument)
+            i += 1
+
+    if not paths:
+        print("No corpus paths given, use '--help' to show help message", file=sys.stderr)
+        sys.exit(10)
+    import parse  # for the backend names only
+
+    if backendName not in parse.backends:
+        print(f"Unknown parser backend '{backendName}', available: {', '.join(sorted(parse.backends))}", file=sys.stderr)
+        sys.exit(10)
+
+    baseline = None
+    if baselinePath is not None:
+        try:
+            with open(baselinePath, encoding="utf-8") as baselineFile:
+                baseline = json.load(baselineFile)["seconds"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Cannot read baseline file: {e}", file=sys.stderr)
+            sys.exit(11)
+
+    report = runCorpus(paths, jobs, pattern, repeat, backendName, baseline, threshold, slack)
+    for result in report["results"]:
+        if result["status"] != "pass":
+            print(f"{result['status'].upper()} {result['case']}: {result['detail']}")
+    statuses = ", ".join(f"{count} {status}" for status, count in sorted(report["statuses"].items()))
+    print(f"{report['cases']} cases, {report['jobs']} jobs, {report['wallSeconds']:.2f} s wall, {report['parseSeconds']:.2f} s parsing: {statuses or 'none found'}")
+
+    try:
+        if savePath is not None:
+            seconds = {result["case"]: result["seconds"] for result in report["results"] if result["seconds"] is not None}
+            with open(savePath, "w", encoding="utf-8") as baselineFile:
+                json.dump({"backend": backendName, "repeat": repeat, "seconds": seconds}, baselineFile, indent=2, sort_keys=True)
+                baselineFile.write("\n")
+        if jsonPath is not None:
+            with open(jsonPath, "w", encoding="utf-8") as jsonFile:
+                json.dump(report, jsonFile, indent=2)
+                jsonFile.write("\n")
+    except OSError as e:
+        print(f"Cannot write output file: {e}", file=sys.stderr)
+        sys.exit(12)
+    sys.exit(0 if all(result["status"] == "pass" for result in report["results"]) else 1)
+
+
+if __name__ == "__main__":
+    main()
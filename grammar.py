@@ -0,0 +1,32 @@
+# SOL25 grammar of the lark parser, kept free of imports so the result cache can key on it without loading lark
+parserVersion = "1"  # part of the result cache key, raise it when checks or output change without a grammar change
+
+# A:(B C)* creates flat list with B, C
+# A: D*, D: B C create individual trees
+grammar = ''' 
+%import common.WS
+%ignore WS
+%import common.NEWLINE
+%ignore NEWLINE
+%ignore /"[^"]*"/
+
+program: class*                             
+class: "class" cid ":" cid "{" method "}"   -> class_def
+method: ( selector block )*                 -> method_def
+selector: id | selector_tail         
+selector_tail: ( id ":" )+
+
+block: "[" block_par "|" block_stat "]"
+block_par: ( ":" id )*
+block_stat: ( id ":=" expr "." )*
+
+expr: expr_base expr_tail
+expr_tail: id | expr_sel
+expr_sel: ( id ":" expr_base )*
+expr_base: int | str | id | cid | block | "(" expr ")"
+
+cid: /[A-Z][A-Za-z0-9_]*/
+id: /[a-z_][A-Za-z0-9_]*/
+int: /[+-]?[0-9]+(?![a-zA-Z_])/
+str: /'([^'\\]|\\['\\n])*'/
+'''
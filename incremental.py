@@ -0,0 +1,323 @@
+import io
+import re
+import traceback
+
+import parse
+
+# Incremental front-end of parse.py for editors: the source is kept as a list of class segments and an edit
+# only reparses the classes it touches. Classes are independent for the grammar, the semantic checks keep
+# per-class facts and combine them in declaration order, and every class caches its own XML element.
+# Anything that cannot be segmented or does not parse falls back to a whole-program parse, so results and
+# diagnostics always equal the ones parse.py reports for the full source.
+
+gapPattern = re.compile(r'(?:[ \t\f\r\n]+|"[^"]*")*')  # whitespace and comments between classes
+classPattern = re.compile(r"""class(?:[^"'}]|"[^"]*"|'[^'\]|\[\n]*')*\}""")  # up to the first '}' outside comments and strings
+compareStep = 1 << 12
+unreached = float("inf")
+
+
+EditResult = parse.ParseResult  # outcome of one parse, same exit code, diagnostics and XML as parse.py for the full source
+
+
+class ClassFacts(parse.SemanticAnalyzer):  # checks of one class that need no other class, the rest is recorded
+    def __init__(self, classDef):
+        super().__init__()
+        self.className = classDef.name
+        self.parentName = classDef.parent
+        self.declarations = ()  # (kind, name, selector parts) in declaration order
+        self.events = []  # lookups depending on earlier classes, in the order the checks make them
+        methods = classDef.methods
+        self.startsWithRun = bool(methods) and methods[0].unary and methods[0].parts[0] == "run"
+        self.visitClass(classDef)
+        self.symbols = None  # only the recorded facts are kept, segments of large programs stay small
+        self.hierarchy = None
+        self.errorPlaces = {}  # AST nodes the errors are about, positions are not tracked per segment
+        self.classNode = None
+        self.classNodes = None
+
+    def signature(self):  # everything other classes can see of this one
+        return (self.className, self.parentName, self.declarations)
+
+    def error(self, rank, message, exitCode, node=None, index=None):
+        if rank == parse.declarationRank and rank < self.firstRank:
+            self.events.append(("error", (message, exitCode)))  # undefined variables end the class in any context
+        super().error(rank, message, exitCode, node, index)
+
+    def declareClass(self, className, classParentName, methods):
+        declarations = []
+        for method in methods:
+            if method.unary:
+                if method.parts[0] not in parse.specialMethods:
+                    declarations.append(("method", method.parts[0], ()))
+            elif len(method.parts) == 1:
+                declarations.append(("method", method.parts[0], method.parts))
+            else:
+                declarations.append(("methodWParams", ":".join(method.parts), method.parts))
+        self.declarations = tuple(declarations)
+
+    def isClassDeclared(self, className):
+        self.events.append(("class", className))
+        return True
+
+    def isSelectorDeclared(self, idName):
+        self.events.append(("selector", idName))
+        return True
+
+    def resolveSuper(self, node=None):
+        self.events.append(("super", None))
+
+
+class ClassSegment:  # one class definition of the source and everything derived from it
+    def __init__(self, start, end, facts, xml):
+        self.start = start
+        self.end = end
+        self.facts = facts
+        self.xml = xml  # class element text or the ValueError writing it raised
+        self.declarationError = None  # (message, exit code), exception or None, valid for the current declaration tables
+
+
+class DeclarationTables:  # index of the first class declaring each name, prefix lookups become comparisons
+    def __init__(self, segments):
+        self.firstClass = {}
+        self.firstBuiltinChild = {}  # classes added to a builtin class list, what resolving 'super' looks for
+        self.firstMethod = {}
+        self.firstMethodWParams = {}
+        self.firstSelectorPart = {}
+        for k, segment in enumerate(segments):
+            facts = segment.facts
+            self.firstClass.setdefault(facts.className, k)
+            if facts.parentName in parse.knownClasses:
+                self.firstBuiltinChild.setdefault(facts.className, k)
+            for j, (kind, name, parts) in enumerate(facts.declarations):
+                methods = self.firstMethod if kind == "method" else self.firstMethodWParams
+                methods.setdefault(name, (k, j))
+                for part in parts:
+                    self.firstSelectorPart.setdefault(part, k)
+
+    def declarationError(self, k, facts):  # first declaration-pass error of class k, same as the full walk finds
+        if self.firstClass[facts.className] < k:
+            return (f"Semantic Error: Class redefinition '{facts.className}'", 35)
+        for j, (kind, name, parts) in enumerate(facts.declarations):
+            methods = self.firstMethod if kind == "method" else self.firstMethodWParams
+            if name in parse.knownMethods or methods[name] < (k, j):
+                return (f"Semantic Error: method redefinition {name}", 35)
+        for kind, value in facts.events:
+            if kind == "selector":
+                if value not in parse.knownSelectorParts and self.firstSelectorPart.get(value, unreached) > k:
+                    return (f"Semantic Error: Undefined method variable in expression selector '{value}'", 32)
+            elif kind == "class":
+                if value not in parse.knownClasses and self.firstClass.get(value, unreached) > k:
+                    return (f"Semantic Error: Undefined class '{value}'", 32)
+            elif kind == "super":
+                if self.firstBuiltinChild.get(facts.parentName, unreached) > k:
+                    return parse.unresolvedSuper(facts.parentName)
+            else:
+                return value
+        return None
+
+
+def checkDeclarations(segments):  # declaration tables of the segments, with the declaration error of every class
+    tables = DeclarationTables(segments)
+    for k, segment in enumerate(segments):
+        segment.declarationError = tables.declarationError(k, segment.facts)
+    return tables
+
+
+def firstError(segments, tables, withXML=True, comment=None):  # combines the class facts in the priority order parse.py reports errors in
+    for segment in segments:
+        if parse.keywordRank in segment.facts.errors:
+            return segment.facts.errors[parse.keywordRank]
+
+    insideMain = False
+    runInMain = False
+    for segment in segments:
+        insideMain = insideMain or segment.facts.className == "Main"
+        runInMain = runInMain or (insideMain and segment.facts.startsWithRun)
+    if not runInMain:
+        return ("Semantic Error Missing 'Main' class with 'run' instance method", 31)
+
+    for segment in segments:
+        if segment.declarationError is not None:
+            return segment.declarationError
+
+    for segment in segments:
+        parentName = segment.facts.parentName
+        if parentName not in tables.firstClass and parentName not in parse.knownClasses:
+            return (f"Semantic Error: Undefined class parent used{parentName}", 32)
+
+    for rank in (parse.arityRank, parse.collisionRank):
+        for segment in segments:
+            if rank in segment.facts.errors:
+                return segment.facts.errors[rank]
+
+    if withXML:
+        if comment:
+            try:
+                parse.checkValue(comment)  # the description is written before any class
+            except ValueError as e:
+                return e
+        for segment in segments:
+            if isinstance(segment.xml, ValueError):
+                return segment.xml  # raised by the XML writer once every check passed
+    return None
+
+
+def parseWhole(inputCode):  # reference path, parse.py on the full source
+    return parse.parseSource(inputCode)
+
+
+def renderClass(classDef):
+    buffer = io.StringIO()
+    writer = parse.XMLWriter(buffer)
+    writer.indent = "  "  # inside the program element
+    try:
+        writer.classDef(classDef)
+    except ValueError as e:
+        return e
+    writer.flush()
+    return buffer.getvalue()
+
+
+def scanClasses(source, start, end):  # class spans from start until a gap ends exactly at end, None if not segmentable
+    spans = []
+    position = start
+    while True:
+        position = gapPattern.match(source, position).end()
+        if position >= end:
+            return spans, position
+        match = classPattern.match(source, position)
+        if match is None:
+            return None, position
+        spans.append((position, match.end()))
+        position = match.end()
+
+
+def commonPrefixLength(first, second):
+    limit = min(len(first), len(second))
+    position = 0
+    while position < limit and first[position:position + compareStep] == second[position:position + compareStep]:
+        position += compareStep
+    position = min(position, limit)
+    while position < limit and first[position] == second[position]:
+        position += 1
+    return position
+
+
+def commonSuffixLength(first, second, limit):
+    length = 0
+    while length + compareStep <= limit and first[len(first) - length - compareStep:len(first) - length] == second[len(second) - length - compareStep:len(second) - length]:
+        length += compareStep
+    while length < limit and first[len(first) - length - 1] == second[len(second) - length - 1]:
+        length += 1
+    return length
+
+
+class IncrementalParser:
+    def __init__(self, source=""):
+        self.source = ""
+        self.segments = None  # None until the whole source segments and parses
+        self.tables = None
+        self.result = None
+        self.classesParsed = 0  # counters of the work done, for benchmarks and editors
+        self.fullParses = 0
+        self.update(source)
+
+    def update(self, newSource):  # new full text, the changed range is found by comparing with the old one
+        oldSource = self.source
+        prefix = commonPrefixLength(oldSource, newSource)
+        suffix = commonSuffixLength(oldSource, newSource, min(len(oldSource), len(newSource)) - prefix)
+        return self.applyEdit(newSource, prefix, len(oldSource) - suffix, len(newSource) - suffix)
+
+    def edit(self, start, end, text):  # replaces source[start:end] with text
+        if not 0 <= start <= end <= len(self.source):
+            raise ValueError(f"Edit range {start}:{end} outside of the source")
+        return self.applyEdit(self.source[:start] + text + self.source[end:], start, end, start + len(text))
+
+    def applyEdit(self, newSource, editStart, oldEditEnd, newEditEnd):
+        if self.segments is None or self.result is None:
+            self.source = newSource
+            return self.rebuild()
+        delta = newEditEnd - oldEditEnd
+        segments = self.segments
+        first = 0
+        while first < len(segments) and segments[first].end <= editStart:
+            first += 1  # linear like the offset shift below, both are cheap next to parsing a class
+        after = first
+        while after < len(segments) and segments[after].start < oldEditEnd:
+            after += 1
+
+        scanStart = segments[first - 1].end if first else 0
+        while True:
+            scanEnd = segments[after].start + delta if after < len(segments) else len(newSource)
+            spans, position = scanClasses(newSource, scanStart, scanEnd)
+            if spans is None or (position > scanEnd and after >= len(segments)):
+                self.source = newSource
+                return self.rebuild()
+            if position == scanEnd:
+                break
+            after += 1  # the rescanned text runs into the next class, it is rescanned as well
+
+        replaced = segments[first:after]
+        parsedSegments = self.parseSpans(newSource, spans)
+        if parsedSegments is None:
+            self.source = newSource
+            return self.rebuild()
+        for segment in segments[after:]:
+            segment.start += delta
+            segment.end += delta
+        segments[first:after] = parsedSegments
+        self.source = newSource
+
+        if len(replaced) != len(parsedSegments) or any(old.facts.signature() != new.facts.signature() for old, new in zip(replaced, parsedSegments)):
+            self.tables = checkDeclarations(segments)  # declarations moved, every class is checked against the new ones
+        else:
+            for k in range(first, first + len(parsedSegments)):
+                segments[k].declarationError = self.tables.declarationError(k, segments[k].facts)
+        self.result = self.evaluate()
+        return self.result
+
+    def parseSpans(self, source, spans):
+        segments = []
+        for start, end in spans:
+            try:
+                program = parse.getBackend().parse(source[start:end])
+            except parse.exceptions.LarkError:
+                return None  # the full parse reports the error with positions in the whole source
+            if len(program.classes) != 1:
+                return None
+            classDef = program.classes[0]
+            segments.append(ClassSegment(start, end, ClassFacts(classDef), renderClass(classDef)))
+            self.classesParsed += 1
+        return segments
+
+    def rebuild(self):
+        spans, position = scanClasses(self.source, 0, len(self.source))
+        segments = self.parseSpans(self.source, spans) if spans is not None and position == len(self.source) else None
+        if segments is None:
+            self.segments = None
+            self.tables = None
+            self.fullParses += 1
+            self.result = parseWhole(self.source)
+            return self.result
+        self.segments = segments
+        self.tables = checkDeclarations(segments)
+        self.result = self.evaluate()
+        return self.result
+
+    def evaluate(self):
+        error = firstError(self.segments, self.tables, True, parse.getFirstComment(self.source))
+        if error is not None:
+            return self.errorResult(error)
+        out = io.StringIO()
+        writer = parse.XMLWriter(out)
+        writer.startProgram(self.source)
+        for segment in self.segments:
+            writer.renderedElement(segment.xml)
+        writer.endProgram()
+        return EditResult(0, None, out.getvalue())
+
+    def errorResult(self, error):
+        if isinstance(error, Exception):
+            return EditResult(1, "".join(traceback.format_exception_only(error)).strip())
+        message, exitCode = error
+        return EditResult(exitCode, message)
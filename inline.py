@@ -0,0 +1,57 @@
+import parse
+import incremental
+
+# Inline mode of parse.py: lark runs ClassCollector while reducing, so a class is turned into its semantic
+# facts and XML element as soon as it is parsed and its AST is dropped right after. No tree of the whole
+# program ever exists, the class facts are combined the same way IncrementalParser combines them.
+
+
+class ClassCollector(parse.ASTBuilder):
+    def __init__(self, renderXML=True):
+        super().__init__()
+        self.renderXML = renderXML  # the XML of a program without output is never written
+
+    def class_def(self, children):
+        classDef = super().class_def(children)
+        xml = incremental.renderClass(classDef) if self.renderXML else None
+        return incremental.ClassSegment(None, None, incremental.ClassFacts(classDef), xml)
+
+    def program(self, children):
+        return children
+
+
+inlineParsers = {}  # renderXML -> parser, built on first use and never changed, so parses can run in parallel threads
+
+
+def getInlineParser(renderXML=True):
+    with parse.parserLock:
+        if renderXML not in inlineParsers:
+            inlineParsers[renderXML] = parse.buildParser(ClassCollector(renderXML))  # shares the cached tables with the tree building parser
+    return inlineParsers[renderXML]
+
+
+def checkSegments(segments, withXML, comment=None):  # comment is the program description, the XML output checks it first
+    return incremental.firstError(segments, incremental.checkDeclarations(segments), withXML, comment)
+
+
+def writeSegments(out, segments, inputCode):
+    writer = parse.XMLWriter(out)
+    writer.startProgram(inputCode)
+    for segment in segments:
+        writer.renderedElement(segment.xml)
+    writer.endProgram()
+
+
+def runInline(inputCode, out=None, profile=None):  # same contract as parse.runProgram, lark errors are left to it
+    parse.resetReservedUse()
+    segments = parse.runPhase(profile, "parse", getInlineParser(out is not None).parse, inputCode)  # class checks and XML included
+    if profile is not None:
+        profile.count("classes", len(segments))
+
+    error = parse.runPhase(profile, "check", checkSegments, segments, out is not None, parse.getFirstComment(inputCode) if out is not None else None)
+    if error is not None:
+        return error
+
+    if out is not None:
+        parse.runPhase(profile, "serialize", writeSegments, out, segments, inputCode)
+    return None
@@ -0,0 +1,202 @@
+import re
+import mmap
+import codecs
+
+import parse
+
+# Large-input mode of parse.py (--large-input) for programs of hundreds of megabytes: standard input is
+# memory-mapped and tokenized as bytes, string literals and the program description stay offsets into the
+# mapping until the XML writer copies them to the output in pieces. The heap then holds the tokens and the tree,
+# not the source text, its decoded copy, every literal token and its slice without the quotes.
+# Pages of the mapping are dropped from the resident set once a pass is past them, the kernel reads them again
+# when a literal is written. Input the descent parser rejects is decoded and parsed by lark, which reports the
+# error exactly as usual.
+tokenPattern = re.compile(parse.tokenPattern.pattern.encode("ascii"))
+commentPattern = re.compile(rb'"([^"]*)"')  # getFirstComment on the raw bytes
+nonASCII = re.compile(rb"[\x80-\xff]")
+controlBytes = bytes(code for code in range(32) if parse.invalidXMLCharacters.match(chr(code)))  # the rest are U+FFFE and U+FFFF
+pieceSize = 1 << 16  # bytes of a literal decoded and escaped at a time
+releaseSize = 1 << 24  # bytes of the mapping a pass reads before it drops their pages
+
+
+def release(data, start, end):  # drops the pages of [start, end) from the resident set, the mapping stays valid
+    start -= start % mmap.PAGESIZE
+    end -= end % mmap.PAGESIZE
+    if end > start and hasattr(mmap, "MADV_DONTNEED"):
+        data.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def invalidXML(data, start, end):  # parse.invalidXMLCharacters for [start, end) of valid UTF-8, without a regex pass
+    for pieceStart in range(start, end, pieceSize):
+        piece = data[pieceStart:min(pieceStart + pieceSize, end)]
+        if len(piece.translate(None, controlBytes)) != len(piece):
+            return True
+    return data.find(b"\xef\xbf\xbe", start, end) != -1 or data.find(b"\xef\xbf\xbf", start, end) != -1
+
+
+class MappedInput:  # what runProgram gets instead of the source text, see parse.xmlValuesPass
+    __slots__ = ("data", "invalidXML")
+
+    def __init__(self, data, invalidXML):
+        self.data = data  # mmap of the UTF-8 source
+        self.invalidXML = invalidXML  # any character the XML output cannot carry, found while scanning
+
+
+class MappedText:  # text between two offsets of the mapped input, decoded when it is written
+    __slots__ = ("data", "start", "end")
+
+    def __init__(self, data, start, end):
+        self.data = data
+        self.start = start
+        self.end = end
+
+    def __len__(self):  # bytes, zero only for empty text
+        return self.end - self.start
+
+    def __str__(self):
+        return self.data[self.start:self.end].decode("utf-8")
+
+    def pieces(self):  # decoded text in order, never a character split between two pieces
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        data = self.data
+        for start in range(self.start, self.end, pieceSize):
+            text = decoder.decode(data[start:min(start + pieceSize, self.end)])
+            if text:
+                yield text
+        decoder.decode(b"", True)
+
+
+def tokenize(data):  # parse.tokenize on the mapped bytes, string tokens are MappedText without the quotes
+    kinds = []
+    values = []
+    comment = None
+    commentKnown = False
+    match = tokenPattern.match
+    position = 0
+    length = len(data)
+    releasedTo = 0
+    while position < length:
+        if position - releasedTo >= releaseSize:
+            release(data, releasedTo, position)
+            releasedTo = position
+        token = match(data, position)
+        if token is None:
+            raise parse.DescentError(f"No token at position {position}")
+        position = token.end()
+        kind = token.lastgroup
+        if kind is None:
+            continue  # whitespace
+        if kind == "str":
+            start = token.start()
+            if not commentKnown and data.find(b'"', start, position) != -1:
+                comment = parse.notScanned  # the first comment is searched in the raw input like getFirstComment does
+                commentKnown = True
+            kinds.append(kind)
+            values.append(MappedText(data, start + 1, position - 1))
+            continue
+        if kind == "comment":
+            if not commentKnown:
+                comment = MappedText(data, token.start() + 1, position - 1)
+                commentKnown = True
+            continue
+        value = token.group().decode("ascii")  # ids, numbers and operators
+        if kind == "op":
+            kind = value
+        kinds.append(kind)
+        values.append(value)
+    release(data, releasedTo, length)
+    kinds.append("$END")
+    values.append("")
+    if comment is parse.notScanned:
+        found = commentPattern.search(data)
+        comment = MappedText(data, found.start(1), found.end(1)) if found else None
+        release(data, 0, found.end() if found else length)
+    return kinds, values, comment
+
+
+class MappedDescentParser(parse.DescentParser):
+    def parse(self, data):
+        self.kinds, self.values, comment = tokenize(data)
+        self.position = 0
+        classes = []
+        while self.startsClass():
+            classes.append(self.classDef())
+        self.expect("$END")
+        return parse.Program(classes, comment)
+
+    def exprBase(self):
+        position = self.position
+        if self.kinds[position] == "str":
+            self.position = position + 1
+            return parse.Literal("String", self.values[position])  # quotes are left out already
+        return super().exprBase()
+
+
+class MappedBackend:  # parses a MappedInput, lark gets the decoded text of input the descent parser rejects
+    def parse(self, mappedInput, table=None):
+        try:
+            return MappedDescentParser().parse(mappedInput.data)
+        except (parse.DescentError, RecursionError):
+            program = parse.LarkBackend().parse(bytes(mappedInput.data).decode("utf-8"), table)
+        if program.comment is parse.notScanned:  # lark leaves it to getFirstComment, which takes text only
+            found = commentPattern.search(mappedInput.data)
+            program.comment = MappedText(mappedInput.data, found.start(1), found.end(1)) if found else None
+        return program
+
+
+class MappedXMLWriter(parse.XMLWriter):  # writes MappedText attribute values from the mapping in pieces
+    def __init__(self, out, chunkSize=1 << 16):
+        super().__init__(out, chunkSize)
+        self.releasedTo = 0  # literals are written in source order, the pages before this offset were dropped
+
+    def startElement(self, tag, attributes=()):
+        if self.tagOpen:
+            self.write(">\n")
+        self.write(self.indent + "<" + tag)
+        for name, value in attributes:
+            if isinstance(value, MappedText):
+                if invalidXML(value.data, value.start, value.end):
+                    parse.checkValue(str(value))  # raises the error escapeAttribute gives for the whole value
+                self.write(f' {name}="')
+                for text in value.pieces():
+                    self.write(text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;"))
+                self.write('"')
+                if value.end - self.releasedTo >= releaseSize:
+                    release(value.data, self.releasedTo, value.end)
+                    self.releasedTo = value.end
+            else:
+                self.write(f' {name}="{parse.escapeAttribute(value)}"')
+        self.tagOpen = True
+        self.openTags.append(tag)
+        self.indent += "  "
+
+
+def scanInput(data):  # (carriage returns, invalid XML characters) of the input, raises UnicodeDecodeError like
+    # reading standard input as text would; one window at a time, without a decoded copy
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carriageReturns = invalidCharacters = False
+    length = len(data)
+    for start in range(0, length, releaseSize):
+        end = min(start + releaseSize, length)
+        carriageReturns = carriageReturns or data.find(b"\r", start, end) != -1
+        invalidCharacters = invalidCharacters or invalidXML(data, start, min(end + 2, length))  # U+FFFE may cross the window end
+        if nonASCII.search(data, start, end) is not None or decoder.getstate()[0]:  # or a character continues from the last window
+            for pieceStart in range(start, end, pieceSize):
+                decoder.decode(data[pieceStart:min(pieceStart + pieceSize, end)])
+        release(data, start, end)
+    decoder.decode(b"", True)
+    return carriageReturns, invalidCharacters
+
+
+def parseProgramMapped(data, out=None):  # same contract as parse.parseProgram, data is an mmap of UTF-8
+    carriageReturns, invalidCharacters = scanInput(data)
+    if carriageReturns:  # standard input translates line ends, inside literals and comments as well
+        parse.parseProgram(bytes(data).decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"), out)
+        return
+    profile = parse.PhaseProfile() if parse.profileOutput is not None or parse.profileHooks else None
+    try:
+        error = parse.runProgram(MappedInput(data, invalidCharacters), out, False, MappedBackend(), MappedXMLWriter, profile, False, parse.checkLevel)
+        parse.reportError(error)
+    finally:
+        if profile is not None:
+            profile.report()
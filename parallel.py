@@ -0,0 +1,148 @@
+import sys
+import os
+import re
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+
+import parse
+import inline
+import incremental
+
+# Parallel mode of parse.py for very large programs: the input is memory-mapped, scanned for class boundaries
+# without decoding it, and runs of whole classes are parsed as shards in a process pool. Every worker returns
+# the per-class facts and XML elements inline mode builds, the parent combines them in source order with the
+# same declaration tables, so checks, the first reported error and the XML equal the sequential path.
+# Input the scanner cannot split or a shard that does not parse goes to the sequential path, which reports
+# syntax errors with positions in the whole source.
+gapPattern = re.compile(incremental.gapPattern.pattern.encode("ascii"))
+classPattern = re.compile(incremental.classPattern.pattern.encode("ascii"))
+commentPattern = re.compile(rb'"([^"]*)"')  # getFirstComment on the raw bytes
+shardsPerJob = 4  # smaller shards than workers keep the pool busy when class sizes vary
+
+
+def mapInput(file):  # mmap of a regular file, None for pipes, terminals and empty files
+    try:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def scanBoundaries(data):  # class spans covering the whole input, None if it cannot be split
+    gaps, classes = (incremental.gapPattern, incremental.classPattern) if isinstance(data, str) else (gapPattern, classPattern)
+    spans = []
+    position = 0
+    end = len(data)
+    while True:
+        position = gaps.match(data, position).end()
+        if position >= end:
+            return spans
+        match = classes.match(data, position)
+        if match is None:
+            return None
+        spans.append((position, match.end()))
+        position = match.end()
+
+
+def makeShards(spans, shardCount):  # contiguous runs of classes of about equal size in bytes
+    if not spans:
+        return []
+    target = max(1, (spans[-1][1] - spans[0][0]) // shardCount)
+    shards = []
+    first = 0
+    for k in range(len(spans)):
+        if spans[k][1] - spans[first][0] >= target or k == len(spans) - 1:
+            shards.append(spans[first:k + 1])
+            first = k + 1
+    return shards
+
+
+def initWorker(backendName):
+    parse.backendName = backendName
+    parse.getBackend()
+    parse.getParser()  # fallback of the descent backend
+
+
+def parseShard(job):  # (shard text, class count, render XML) -> class segments, None if the shard does not parse alone
+    text, classCount, renderXML = job
+    if isinstance(text, bytes):
+        try:
+            text = text.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    try:
+        program = parse.getBackend().parse(text)
+    except parse.exceptions.LarkError:
+        return None
+    if len(program.classes) != classCount:
+        return None
+    segments = []
+    for classDef in program.classes:
+        xml = incremental.renderClass(classDef) if renderXML else None
+        segments.append(incremental.ClassSegment(None, None, incremental.ClassFacts(classDef), xml))
+    return segments
+
+
+def parseShards(data, out, jobs, profile):  # segments of every class in order, None when the sequential path has to run
+    spans = parse.runPhase(profile, "scan", scanBoundaries, data)
+    if spans is None:
+        return None
+    shards = makeShards(spans, jobs * shardsPerJob)
+    work = [(data[shard[0][0]:shard[-1][1]], len(shard), out is not None) for shard in shards]
+    if profile is not None:
+        profile.count("classes", len(spans))
+        profile.count("shards", len(shards))
+
+    def runPool():
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initWorker, initargs=(parse.backendName,)) as executor:
+            return list(executor.map(parseShard, work))
+
+    segments = []
+    for shardSegments in parse.runPhase(profile, "parse", runPool):
+        if shardSegments is None:
+            return None
+        segments.extend(shardSegments)
+    return segments
+
+
+def firstComment(data):
+    if isinstance(data, str):
+        return parse.getFirstComment(data)
+    match = commentPattern.search(data)
+    return match.group(1).decode("utf-8") if match else None
+
+
+def writeSegments(out, segments, comment):
+    writer = parse.XMLWriter(out)
+    writer.startProgram(None, comment)
+    for segment in segments:
+        writer.renderedElement(segment.xml)
+    writer.endProgram()
+
+
+def parseProgramParallel(data, out=None, jobs=None):  # same contract as parse.parseProgram, data is text or an mmap of UTF-8
+    jobs = jobs or os.cpu_count() or 1
+    profile = parse.PhaseProfile() if parse.profileOutput is not None or parse.profileHooks else None
+    try:
+        if not isinstance(data, str) and data.find(b"\r") != -1:
+            data = bytes(data).decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")  # as standard input translates them
+        segments = parseShards(data, out, jobs, profile)
+        if segments is None:
+            inputCode = data if isinstance(data, str) else bytes(data).decode("utf-8")
+            parse.parseProgram(inputCode, out)  # reports the error with positions in the whole source
+            return
+
+        comment = firstComment(data) if out is not None else None
+        error = parse.runPhase(profile, "check", inline.checkSegments, segments, out is not None, comment)
+        if isinstance(error, Exception):
+            raise error
+        if error is not None:
+            message, exitCode = error
+            print(message, file=sys.stderr)
+            sys.exit(exitCode)
+        if out is not None:
+            parse.runPhase(profile, "serialize", writeSegments, out, segments, comment)
+    finally:
+        if profile is not None:
+            profile.report()
@@ -1,8 +1,13 @@
 import sys
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from lark import Lark, Visitor, Transformer, exceptions, Tree, Token
+import os
+import hashlib
 import re
+import struct
+import threading
+from array import array
+from lark import Lark, Transformer, Tree, exceptions
+
+from grammar import grammar
 
 liveVersion = False
 enableUserInput = liveVersion
@@ -51,597 +56,1854 @@ inputTest = """
  class Main : Object {run [|]}
             class Main2 : Object {run [|]}
 """
-# A:(B C)* creates flat list with B, C
-# A: D*, D: B C create individual trees
-grammar = ''' 
-%import common.WS
-%ignore WS
-%import common.NEWLINE
-%ignore NEWLINE
-%ignore /"[^"]*"/
-
-program: class*                             
-class: "class" cid ":" cid "{" method "}"   -> class_def
-method: ( selector block )*                 -> method_def
-selector: id | selector_tail         
-selector_tail: ( id ":" )+
-
-block: "[" block_par "|" block_stat "]"
-block_par: ( ":" id )*
-block_stat: ( id ":=" expr "." )*
-
-expr: expr_base expr_tail
-expr_tail: id | expr_sel
-expr_sel: ( id ":" expr_base )*
-expr_base: int | str | id | cid | block | "(" expr ")"
-
-cid: /[A-Z][A-Za-z0-9_]*/
-id: /[a-z_][A-Za-z0-9_]*/
-int: /[+-]?[0-9]+(?![a-zA-Z_])/
-str: /'([^'\\]|\\['\\n])*'/
-'''
-
-class ReservedKeywordsUse(Visitor):
-    def block_stat(self, tree):
-        i = 0
-        while i < len(tree.children):
-            if len(tree.children[i].children) > 0:
-                firstIdName = tree.children[i].children[0].value
-                if firstIdName in reservedKeywords | builtinConstructors | builtinWParamConstructors:
-                    print(f"Syntactic Error: Reserved keyword in assignment", file=sys.stderr)
-                    sys.exit(22)
-            i += 2
-
-    def block_par(self, tree):
-        for child in tree.children:
-            paramName = child.children[0].value
-            if paramName in reservedKeywords | builtinConstructors | builtinWParamConstructors:
-                print(f"Syntactic Error: Reserved keyword in parameter", file=sys.stderr)
-                sys.exit(22)
-
-    def expr_sel(self, tree):
-        for i in range(0, len(tree.children), 2):
-            idPart = tree.children[i].children[0].value
-            basePart = tree.children[i + 1].children[0]
-
-            if idPart in reservedKeywords | builtinConstructors:
-                print(f"Syntactic Error: Reserved keyword in selector id ", file=sys.stderr)
-                sys.exit(22)
-            if basePart.data not in {'block', 'expr'}:
-                basePartFinal = basePart.children[0].value
-                if basePartFinal in reservedKeywords | builtinConstructors | builtinWParamConstructors:
-                    print(f"Syntactic Error: Reserved keyword in selector base", file=sys.stderr)
-                    sys.exit(22)
-
-    def expr_tail(self, tree):
-        tailPart = tree.children[0]
-        if tailPart.data == "id":
-            tailId = tailPart.children[0].value
-            if tailId in reservedKeywords | builtinWParamConstructors:
-                print(f"Syntactic Error: Reserved keyword in expression tale", file=sys.stderr)
-                sys.exit(22)
-
-    def selector(self, tree):
-        selectorPart = tree.children[0]
-        if selectorPart.data == "id":
-            selectorId = selectorPart.children[0].value
-            if selectorId in reservedKeywords | builtinConstructors | builtinWParamConstructors:
-                print(f"Syntactic Error: Reserved keyword in method selector", file=sys.stderr)
-                sys.exit(22)
-
-        if selectorPart.data == "selector_tail":
-            for child in selectorPart.children:
-                selectorId = child.children[0].value
-                if selectorId in reservedKeywords | builtinConstructors | builtinWParamConstructors:
-                    print(f"Syntactic Error: Reserved keyword in method selector tail", file=sys.stderr)
-                    sys.exit(22)
-class ClassMainRun(Visitor):  # check Main with its first id being instance method run
-    def __init__(self):
-        self.insideMain = False
-        self.runInMain = False
-        self.methodCount = 0
-
-    def class_def(self, tree):
-        cidTree = tree.children[0]
-        className = cidTree.children[0].value
-        if className == "Main":
-            self.insideMain = True
-
-    def method_def(self, tree):
-        if len(tree.children) > 0:
-            selectorTree = tree.children[0]
-            selectorTreeChild = selectorTree.children[0]
-            if selectorTreeChild.data == "id":
-                firstIdName = selectorTreeChild.children[0].value
-                if self.insideMain and firstIdName == "run":
-                    self.runInMain = True
-
-    def runInMainConfirm(self):
-        if not self.runInMain:
-            print(f"Semantic Error Missing 'Main' class with 'run' instance method", file=sys.stderr)
-            sys.exit(31)
-class ArityBlockSelector(Visitor):
-    def method_def(self, tree):
-        selectorTailIdCount = 0
-        blockParCount = 0
-        for child in tree.children:
-            if child.data == "selector":
-                if child.children[0].data == "selector_tail":
-                    selectorTailIdTree = child.children[0]
-                    selectorTailIdCount = len(selectorTailIdTree.children)
-
-            if child.data == "block":
-                blockParTree = child.children[0]
-                blockParCount = len(blockParTree.children)
-        if selectorTailIdCount != blockParCount:
-            print(f"Semantic Error: Incorrect arity in method definition", file=sys.stderr)
-            sys.exit(33)
-class CollisionVariable(Visitor):
-    def block(self, tree):
-        blockParametersSaved = set()
-        blockDefinedVariablesSaved = set()
-        blockParTree = tree.children[0]
-        blockParams = blockParTree.children
 
-        for param in blockParams:
-            paramName = param.children[0].value
-            if paramName in blockParametersSaved:
-                print("Semantic Error: Duplicate parameter in block", file=sys.stderr)
-                sys.exit(35)
-            blockParametersSaved.add(paramName)
+# AST the checks and the XML writer run on, one small slotted object per node and interned names
+class NotScanned:  # first comment of the source not known, getFirstComment searches for it
+    # one instance, copies and pickles of the tree keep pointing at it so 'is notScanned' holds for them as well
+    def __reduce__(self):
+        return "notScanned"  # pickled by reference to the module attribute
 
-        blockStatTree = tree.children[1]
-        for statement in blockStatTree.children:
-            if statement.data == "id":
-                variableName = statement.children[0].value
-                blockDefinedVariablesSaved.add(variableName)
-
-        if blockParametersSaved & blockDefinedVariablesSaved:  # intersection
-            print(f"Semantic Error: Variable collision in block", file=sys.stderr)
-            sys.exit(34)
-
-firstDefinedPassthrough = True
-definedClasses = set()
-definedMethods = set()  # callable before declaration
-definedMethodsWParams = set()  # callable before declaration
-classesSubclasses = [
-    ("Object", []),
-    ("Nil", []),
-    ("True", []),
-    ("False", []),
-    ("Integer", []),
-    ("String", []),
-    ("Block", [])
-]
-
-# 1st passthrough to save classes and methods
-class DefinedElementsAndTypes(Visitor):  # check defined variables, parameters, classes and class methods
-    # first interpretable expression base apart from 'expr' defines the type of id assigned id : == expr_base expr_tail
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "notScanned"
+
+notScanned = NotScanned()
+
+class Program:
+    __slots__ = ("classes", "comment")
+    kind = "program"
+
+    def __init__(self, classes, comment=notScanned):
+        self.classes = classes
+        self.comment = comment  # text of the first comment, found by the tokenizer of the descent backend
+
+class ClassDef:
+    __slots__ = ("name", "parent", "methods", "reserved")
+    kind = "class"
+
+    def __init__(self, name, parent, methods, reserved=True):
+        self.name = name
+        self.parent = parent
+        self.methods = methods
+        self.reserved = reserved  # False when the parser saw no reserved keyword where one is an error
+
+class Method:
+    __slots__ = ("parts", "unary", "block")
+    kind = "method"
+
+    def __init__(self, parts, unary, block):
+        self.parts = parts  # selector ids, a single one for unary selectors
+        self.unary = unary
+        self.block = block
+
+class Block:
+    __slots__ = ("params", "assigns")
+    kind = "block"
+
+    def __init__(self, params, assigns):
+        self.params = params
+        self.assigns = assigns
+
+class Assign:
+    __slots__ = ("var", "expr")
+    kind = "assign"
+
+    def __init__(self, var, expr):
+        self.var = var
+        self.expr = expr
+
+class Send:  # expression with a message, unary when there are no arguments
+    __slots__ = ("receiver", "parts", "args")
+    kind = "send"
+
+    def __init__(self, receiver, parts, args):
+        self.receiver = receiver
+        self.parts = parts
+        self.args = args
+
+class Primary:  # expression without a message, in an operand position it stands for a parenthesized expression
+    __slots__ = ("value",)
+    kind = "primary"
+
+    def __init__(self, value):
+        self.value = value
+
+class Var:  # identifiers, true, false and nil included
+    __slots__ = ("name",)
+    kind = "var"
+
+    def __init__(self, name):
+        self.name = name
+
+class ClassRef:
+    __slots__ = ("name",)
+    kind = "classRef"
+
+    def __init__(self, name):
+        self.name = name
+
+class Literal:
+    __slots__ = ("className", "value")
+    kind = "literal"
+
+    def __init__(self, className, value):
+        self.className = className
+        self.value = value  # strings without the quotes
+
+# optional structural sharing (--share): equal expressions and blocks become one node while the tree is built,
+# and the XML writer reuses the text it rendered for a shared subtree at the same indentation
+def shareKey(node):  # children are shared already, so they compare by identity
+    kind = node.kind
+    if kind == "send":
+        return kind, node.receiver, node.parts, node.args
+    if kind == "block":
+        return kind, node.params, tuple((assign.var, assign.expr) for assign in node.assigns)
+    if kind == "primary":
+        return kind, node.value
+    if kind == "literal":
+        return kind, node.className, node.value
+    return kind, node.name
+
+class SubtreeTable:  # bounded least recently used table, keys hold their children so no id is ever reused
+    def __init__(self, limit=1 << 12, weight=None):  # repeats in generated code are mostly close together
+        self.limit = limit  # entries, or the total weight when weight is given
+        self.weight = weight or (lambda value: 1)
+        self.entries = {}  # key -> value, least recently used first
+        self.size = 0
+        self.repeated = set()  # nodes share() returned more than once, the only ones worth recording output for
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.pop(key, None)
+        if value is not None:
+            self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.size += self.weight(value)
+        while self.size > self.limit:
+            oldest = next(iter(self.entries))
+            self.size -= self.weight(self.entries.pop(oldest))
+
+    def share(self, node):  # the node built for an equal subtree before, or node itself
+        key = shareKey(node)
+        shared = self.get(key)
+        if shared is None:
+            self.put(key, node)
+            return node
+        self.repeated.add(shared)
+        return shared
+
+class ReservedUse(threading.local):  # set by the callbacks of the class being reduced in this thread
+    found = False
+
+reservedUse = ReservedUse()  # a parse ending in an error can leave it set, parses start with resetReservedUse()
+
+def resetReservedUse():
+    reservedUse.found = False
+
+class ASTBuilder(Transformer):  # converts a parse tree, or runs inside lark to build the AST while parsing
+    # rules where an id must not be a reserved keyword flag the class, its diagnostic is found by SemanticAnalyzer
+    def program(self, children):
+        return Program(children)
+
+    def class_def(self, children):
+        reserved = reservedUse.found
+        reservedUse.found = False
+        return ClassDef(children[0].name, children[1].name, children[2], reserved)
+
+    def method_def(self, children):
+        return [Method(children[i][0], children[i][1], children[i + 1]) for i in range(0, len(children), 2)]
+
+    def selector(self, children):  # (parts, unary)
+        if isinstance(children[0], str):
+            if children[0] in reservedNames:
+                reservedUse.found = True
+            return (children[0],), True
+        return children[0], False
+
+    def selector_tail(self, children):
+        if not reservedNames.isdisjoint(children):
+            reservedUse.found = True
+        return tuple(children)
+
+    def block(self, children):
+        return Block(children[0], children[1])
+
+    def block_par(self, children):
+        if not reservedNames.isdisjoint(children):
+            reservedUse.found = True
+        return tuple(children)
+
+    def block_stat(self, children):
+        if not reservedNames.isdisjoint(children[0::2]):
+            reservedUse.found = True
+        return [Assign(children[i], children[i + 1]) for i in range(0, len(children), 2)]
+
+    def expr(self, children):
+        receiver, tail = children
+        if isinstance(tail, str):
+            if tail in reservedTailIds:
+                reservedUse.found = True
+            return Send(receiver, (tail,), ())
+        if tail[0]:
+            return Send(receiver, tail[0], tail[1])
+        return Primary(receiver)
+
+    def expr_tail(self, children):
+        return children[0]
+
+    def expr_sel(self, children):  # (parts, args)
+        parts = tuple(children[0::2])
+        args = tuple(children[1::2])
+        if not reservedSelectorIds.isdisjoint(parts) or any(arg.kind in ("var", "classRef") and arg.name in reservedNames for arg in args):
+            reservedUse.found = True
+        return parts, args
+
+    def expr_base(self, children):
+        if isinstance(children[0], str):
+            return Var(children[0])
+        return children[0]
+
+    def cid(self, children):
+        return ClassRef(sys.intern(children[0].value))
+
+    def id(self, children):
+        return sys.intern(children[0].value)
+
+    def int(self, children):
+        return Literal("Integer", children[0].value)
+
+    def str(self, children):
+        return Literal("String", children[0].value[1:-1])
+
+class SharingASTBuilder(ASTBuilder):  # every expression and block goes through a SubtreeTable
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def block(self, children):
+        return self.table.share(super().block(children))
+
+    def expr(self, children):
+        return self.table.share(super().expr(children))
+
+    def expr_base(self, children):
+        if isinstance(children[0], str):
+            return self.table.share(Var(children[0]))
+        return children[0]  # shared when it was built
+
+    def cid(self, children):
+        return self.table.share(super().cid(children))
+
+    def int(self, children):
+        return self.table.share(super().int(children))
+
+    def str(self, children):
+        return self.table.share(super().str(children))
+
+def toAST(tree, table=None):  # bottom-up with an explicit stack, ASTBuilder().transform(tree) recurses once per tree level
+    builder = ASTBuilder() if table is None else SharingASTBuilder(table)
+    resetReservedUse()
+    results = []
+    work = [(tree, False)]
+    while work:
+        node, childrenDone = work.pop()
+        if not isinstance(node, Tree):
+            results.append(node)  # token
+        elif childrenDone:
+            start = len(results) - len(node.children)
+            children = results[start:]
+            del results[start:]
+            results.append(getattr(builder, node.data)(children))
+        else:
+            work.append((node, True))
+            work.extend((child, False) for child in reversed(node.children))
+    return results[0]
+
+# hand-written backend: one regex pass for the tokens, recursive descent for the grammar above
+# terminals are matched as lark's lexer matches them, 'class' is an id wherever lark's contextual lexer takes it for one
+tokenPattern = re.compile(r"""[ \t\f\r\n]+|(?P<comment>"[^"]*")|(?P<id>[a-z_][A-Za-z0-9_]*)|(?P<cid>[A-Z][A-Za-z0-9_]*)|(?P<int>[+-]?[0-9]+(?![a-zA-Z_]))|(?P<str>'[^'\]|\[\n]*')|(?P<op>:=|[:{}\[\]|.()])""")
+
+class DescentError(Exception):  # raised on any error, the input is then parsed by lark which reports it exactly
+    pass
+
+def tokenize(inputCode):  # parallel lists of token kinds and values ending with '$END', and the first comment
+    kinds = []
+    values = []
+    comment = None
+    commentKnown = False
+    match = tokenPattern.match
+    position = 0
+    length = len(inputCode)
+    while position < length:
+        token = match(inputCode, position)
+        if token is None:
+            raise DescentError(f"No token at position {position}")
+        position = token.end()
+        kind = token.lastgroup
+        if kind is None:
+            continue  # whitespace
+        value = token.group()
+        if kind == "comment":
+            if not commentKnown:
+                comment = value[1:-1]
+                commentKnown = True
+            continue
+        if kind == "op":
+            kind = value
+        elif kind == "str" and '"' in value and not commentKnown:
+            comment = notScanned  # getFirstComment would start inside this string, it searches the raw text
+            commentKnown = True
+        kinds.append(kind)
+        values.append(value)
+    kinds.append("$END")
+    values.append("")
+    return kinds, values, comment
+
+class DescentParser:  # builds the same AST as ASTBuilder, every rule is a method
+    # rules where an id must not be a reserved keyword set self.reserved, ClassDef.reserved of the class parsed
+    def parse(self, inputCode):
+        self.kinds, self.values, comment = tokenize(inputCode)
+        self.position = 0
+        classes = []
+        while self.startsClass():
+            classes.append(self.classDef())
+        self.expect("$END")
+        return Program(classes, comment)
+
+    def startsClass(self):  # only the keyword can follow at this point, so the id 'class' is the keyword
+        position = self.position
+        if self.kinds[position] != "id":
+            return False
+        value = self.values[position]
+        if value[:5] == "class" and "A" <= value[5:6] <= "Z":  # lark lexes 'classMain' as 'class Main' where no id fits
+            self.kinds[position:position + 1] = ["class", "cid"]
+            self.values[position:position + 1] = ["class", value[5:]]
+            return True
+        return value == "class"
+
+    def expect(self, kind):
+        position = self.position
+        if self.kinds[position] != kind:
+            raise DescentError(f"Expected {kind} at token {position}")
+        self.position = position + 1
+        return self.values[position]
+
+    def classDef(self):
+        self.position += 1  # class
+        self.reserved = False
+        name = sys.intern(self.expect("cid"))
+        self.expect(":")
+        parent = sys.intern(self.expect("cid"))
+        self.expect("{")
+        methods = []
+        while self.kinds[self.position] == "id":
+            methods.append(self.method())
+        self.expect("}")
+        return ClassDef(name, parent, methods, self.reserved)
+
+    def method(self):
+        kinds = self.kinds
+        firstId = sys.intern(self.expect("id"))
+        if firstId in reservedNames:
+            self.reserved = True
+        if kinds[self.position] != ":":
+            return Method((firstId,), True, self.block())
+        self.position += 1
+        parts = [firstId]
+        while kinds[self.position] == "id":
+            parts.append(sys.intern(self.expect("id")))
+            self.expect(":")
+        if not reservedNames.isdisjoint(parts):
+            self.reserved = True
+        return Method(tuple(parts), False, self.block())
+
+    def block(self):
+        kinds = self.kinds
+        self.expect("[")
+        params = []
+        while kinds[self.position] == ":":
+            self.position += 1
+            params.append(sys.intern(self.expect("id")))
+        if params and not reservedNames.isdisjoint(params):
+            self.reserved = True
+        self.expect("|")
+        assigns = []
+        while kinds[self.position] == "id":
+            var = sys.intern(self.expect("id"))
+            if var in reservedNames:
+                self.reserved = True
+            self.expect(":=")
+            assigns.append(Assign(var, self.expr()))
+            self.expect(".")
+        self.expect("]")
+        return Block(tuple(params), assigns)
+
+    def expr(self):
+        kinds = self.kinds
+        receiver = self.exprBase()
+        if kinds[self.position] != "id":
+            return Primary(receiver)
+        if kinds[self.position + 1] != ":":
+            tail = sys.intern(self.expect("id"))
+            if tail in reservedTailIds:
+                self.reserved = True
+            return Send(receiver, (tail,), ())
+        values = self.values
+        parts = []
+        args = []
+        while kinds[self.position] == "id":
+            part = sys.intern(self.expect("id"))
+            if part in reservedSelectorIds:
+                self.reserved = True
+            parts.append(part)
+            self.expect(":")
+            if kinds[self.position] in ("id", "cid") and values[self.position] in reservedNames:  # var or class argument
+                self.reserved = True
+            args.append(self.exprBase())
+        return Send(receiver, tuple(parts), tuple(args))
+
+    def exprBase(self):
+        position = self.position
+        kind = self.kinds[position]
+        if kind == "id":
+            self.position = position + 1
+            return Var(sys.intern(self.values[position]))
+        if kind == "cid":
+            self.position = position + 1
+            return ClassRef(sys.intern(self.values[position]))
+        if kind == "int":
+            self.position = position + 1
+            return Literal("Integer", self.values[position])
+        if kind == "str":
+            self.position = position + 1
+            return Literal("String", self.values[position][1:-1])
+        if kind == "[":
+            return self.block()
+        if kind == "(":
+            self.position = position + 1
+            node = self.expr()
+            self.expect(")")
+            return node
+        raise DescentError(f"Unexpected {kind} at token {position}")
+
+class SharingDescentParser(DescentParser):  # every expression and block goes through a SubtreeTable
+    def __init__(self, table):
+        self.table = table
+
+    def block(self):
+        return self.table.share(super().block())
+
+    def expr(self):
+        return self.table.share(super().expr())
+
+    def exprBase(self):
+        if self.kinds[self.position] in ("[", "("):
+            return super().exprBase()  # shared when it was built
+        return self.table.share(super().exprBase())
+
+def internedSet(names):
+    return frozenset(sys.intern(name) for name in names)
+
+# lookup sets of the semantic checks, built once instead of on every node
+reservedNames: frozenset = internedSet(reservedKeywords | builtinConstructors | builtinWParamConstructors)
+reservedSelectorIds: frozenset = internedSet(reservedKeywords | builtinConstructors)
+reservedTailIds: frozenset = internedSet(reservedKeywords | builtinWParamConstructors)
+knownClasses: frozenset = internedSet(builtinClasses)
+knownMethods: frozenset = internedSet(builtinMethods)
+knownIdentifiers: frozenset = internedSet(availableIdentifiers | builtinConstructors)  # always usable as variables
+knownSelectorParts: frozenset = internedSet({part for var in builtinMethodsWParams for part in var.split(':')} | builtinConstructors | availableIdentifiers)
+
+class SymbolTable:  # declared names of one program, every lookup is a single set hit
+    def __init__(self):
+        self.classes = set()
+        self.methods = set()  # unary and single keyword selectors
+        self.methodsWParams = set()  # joined multi keyword selectors
+        self.selectorParts = set()  # every part of a keyword selector, kept in step with the declarations
+        self.variables = set()  # specific for block
+
+    def declareClass(self, className):  # False when the class is already declared
+        if className in self.classes:
+            return False
+        self.classes.add(sys.intern(className))
+        return True
+
+    def isClass(self, className):
+        return className in self.classes or className in knownClasses
+
+    def declareMethod(self, methodName, withParam):  # False when it redefines a declared or builtin method
+        if methodName in self.methods or methodName in knownMethods:
+            return False
+        methodName = sys.intern(methodName)
+        self.methods.add(methodName)
+        if withParam:
+            self.selectorParts.add(methodName)
+        return True
+
+    def declareMethodWParams(self, selectorIds):
+        methodNameJoined = ":".join(selectorIds)
+        if methodNameJoined in self.methodsWParams or methodNameJoined in knownMethods:
+            return False
+        self.methodsWParams.add(sys.intern(methodNameJoined))
+        self.selectorParts.update(sys.intern(selectorId) for selectorId in selectorIds)
+        return True
+
+    def isSelectorPart(self, idName):
+        return idName in self.selectorParts or idName in knownSelectorParts
+
+    def enterBlock(self):  # nested blocks do not restore the outer variables
+        self.variables = set()
+
+    def addVariable(self, varName):
+        self.variables.add(varName)
+
+    def isVariable(self, idName):
+        return idName in self.variables or idName in knownIdentifiers
+
+class ClassHierarchy:  # classes declared so far indexed by name: parent map for 'super' and the parent check
+    def __init__(self):
+        self.parents = {}  # class -> parent of its first declaration, in declaration order
+        self.builtinChildren = set()  # classes ever declared with a builtin parent, the only ones 'super' resolves for
+        self.cycles = []  # classes of every parent cycle, in declaration order, filled by check()
+
+    def declareClass(self, className, parentName):
+        if parentName in knownClasses:
+            self.builtinChildren.add(className)
+        if className in self.parents:
+            return
+        self.parents[className] = parentName
+
+    def resolvesSuper(self, parentName):
+        return parentName in self.builtinChildren
+
+    def check(self):  # one linear pass: (class, parent) pairs with undefined parents and the cycles, in declaration order
+        undefinedParents = []
+        cycles = []
+        resolved = set()  # classes whose chain is known to end or to run into a cycle
+        for className, parentName in self.parents.items():
+            if parentName not in self.parents and parentName not in knownClasses:
+                undefinedParents.append((className, parentName))
+            chain = {}  # class -> position on the chain walked from className
+            current = className
+            while current in self.parents and current not in resolved:
+                if current in chain:
+                    cycles.append(list(chain)[chain[current]:])
+                    break
+                chain[current] = len(chain)
+                current = self.parents[current]
+            resolved.update(chain)
+        self.cycles = cycles
+        return undefinedParents, cycles
+
+# error ranks follow the order in which the checks used to run as separate passes, lower rank is reported first
+keywordRank = 0  # Error 22
+mainRunRank = 1  # Error 31
+declarationRank = 2  # Errors 35 and 32, checked against classes and methods declared so far
+parentRank = 3  # Error 32, checked once every class is known
+arityRank = 4  # Error 33
+collisionRank = 5  # Errors 34, 35
+
+class UnresolvedSuper(Exception):  # 'super' in a class whose parent was not itself declared with a builtin parent, see ClassHierarchy.resolvesSuper
+    pass
+
+def unresolvedSuper(parentName):  # the error is raised, not reported: the CLI has always ended on it with exit code 1, kept for compatibility
+    return UnresolvedSuper(f"Cannot resolve 'super': parent class '{parentName}' does not directly inherit from a builtin class")
+
+class SemanticAnalyzer:  # all semantic checks in one preorder walk, one class at a time
     # self refers to current class, super to the parent of current class
     # variables visible only within block exclusively, methods usable outside
     def __init__(self):
+        self.errors = {}  # rank -> (message, exit code) or the exception the check ended with
+        self.errorPlaces = {}  # rank -> (node, index) the error is about, see errorSpan
+        self.classNode = None  # ClassDef being visited
+        self.classNodes = {}  # class name -> its first ClassDef, where undefined parents are reported
+        self.firstRank = collisionRank + 1  # only checks ranked below the first recorded error still matter
+        self.insideMain = False
+        self.runInMain = False
         self.currentClassType = None  # string
-        self.currentIdType = None  # string or None
-        self.currentIdIndex = 0  # helper for indexes of multi-level methods
-        self.classesSaved = set()
-        self.methodsSaved = set()
-        self.methodsWParamsSaved = set()
-        self.definedVariables = set()  # specific for block
-
-    def addToClassList(self, className, parentClass):
-        for classInfo in classesSubclasses:
-            if classInfo[0] == parentClass:
-                classInfo[1].append(className)
-                return
+        self.symbols = SymbolTable()  # methods are callable before declaration
+        self.hierarchy = ClassHierarchy()  # parents are checked when the program ends
 
-    def findClassList(self, className):
-        for classInfo in classesSubclasses:
-            if className in classInfo[1]:
-                return classInfo[1]
-        return None
+    def error(self, rank, message, exitCode, node=None, index=None):
+        if rank < self.firstRank:
+            self.errors[rank] = (message, exitCode)
+            self.errorPlaces[rank] = (node, index)
+            self.firstRank = rank
 
-    def findParentClass(self, className):
-        classList = self.findClassList(className)
-        index = classList.index(className)
-        if index > 0:
-            parentClass = classList[index - 1]
-            return parentClass
-        return classList[0]
+    def firstError(self):  # (message, exit code) or the exception of the highest ranked error, None without errors
+        if not self.errors:
+            return None
+        return self.errors[min(self.errors)]
+
+    def firstErrorPlace(self):  # (node, index) of the error firstError returns, None when it has no single place
+        if not self.errors:
+            return None
+        return self.errorPlaces.get(min(self.errors))
+
+    def visitProgram(self, program):
+        for classDef in program.classes:
+            if self.firstRank == keywordRank:
+                return  # nothing can be reported before a reserved keyword error
+            self.visitClass(classDef)
+
+    def finish(self):  # checks that need the whole program, then reports the first error
+        reportError(self.finishChecks())
+
+    def finishChecks(self):  # checks that need the whole program, returns the first error instead of reporting it
+        if mainRunRank < self.firstRank and not self.runInMain:
+            self.error(mainRunRank, "Semantic Error Missing 'Main' class with 'run' instance method", 31)
+        if parentRank < self.firstRank:
+            undefinedParents, _ = self.hierarchy.check()  # cycles are kept in hierarchy.cycles, they have always been accepted
+            if undefinedParents:
+                className, parentName = undefinedParents[0]
+                self.error(parentRank, f"Semantic Error: Undefined class parent used{parentName}", 32, self.classNodes.get(className))
+        return self.firstError()
 
     # Class
-    def class_def(self, tree):
-        className = tree.children[0].children[0]
-        classParentName = tree.children[1].children[0]
+    def visitClass(self, classDef):
+        if classDef.reserved:
+            self.checkReservedKeywords(classDef)
+            if self.firstRank == keywordRank:
+                return
+        className = classDef.name
+        methods = classDef.methods
+        self.classNode = classDef
+        self.classNodes.setdefault(className, classDef)
+        if className == "Main":
+            self.insideMain = True  # stays set for the following classes as well
+
+        if declarationRank < self.firstRank:
+            self.declareClass(className, classDef.parent, methods)
+
+        if methods and methods[0].unary and methods[0].parts[0] == "run" and self.insideMain:
+            self.runInMain = True
+        if arityRank < self.firstRank:
+            self.checkArity(methods)
+
+        for method in methods:
+            self.visitBlock(method.block)
+
+    def declareClass(self, className, classParentName, methods):
         self.currentClassType = classParentName
-        self.addToClassList(className, classParentName)
+        self.hierarchy.declareClass(className, classParentName)
+        if not self.symbols.declareClass(className):
+            self.error(declarationRank, f"Semantic Error: Class redefinition '{className}'", 35, self.classNode)
+        else:
+            self.declareMethods(methods)
 
-        if firstDefinedPassthrough:
-            if className in self.classesSaved:
-                print(f"Semantic Error: Class redefinition '{className}'", file=sys.stderr)
-                sys.exit(35)
-            definedClasses.add(className)
-            self.classesSaved.add(className)
-        elif not firstDefinedPassthrough:
-            if classParentName not in definedClasses | builtinClasses:
-                print(f"Semantic Error: Undefined class parent used{classParentName}", file=sys.stderr)
-                sys.exit(32)
+    # method
+    def declareMethods(self, methods):
+        for method in methods:
+            if method.unary:
+                methodName = method.parts[0]
+                if methodName not in specialMethods:
+                    if not self.symbols.declareMethod(methodName, False):
+                        self.error(declarationRank, f"Semantic Error: method redefinition {methodName}", 35, method)
+                        return
+            elif len(method.parts) == 1:
+                methodName = method.parts[0]
+                if not self.symbols.declareMethod(methodName, True):
+                    self.error(declarationRank, f"Semantic Error: method redefinition {methodName}", 35, method)
+                    return
+            elif not self.symbols.declareMethodWParams(method.parts):
+                self.error(declarationRank, f"Semantic Error: method redefinition {':'.join(method.parts)}", 35, method)
+                return
 
+    def checkArity(self, methods):  # only the last selector and block pair of the class is compared
+        selectorTailIdCount = 0
+        blockParCount = 0
+        for method in methods:
+            if not method.unary:
+                selectorTailIdCount = len(method.parts)
+            blockParCount = len(method.block.params)
+        if selectorTailIdCount != blockParCount:
+            self.error(arityRank, "Semantic Error: Incorrect arity in method definition", 33, self.classNode)
+
+    def checkReservedKeywords(self, classDef):  # only classes the parser flagged, in the order the checks used to walk them
+        for method in classDef.methods:
+            self.checkSelectorKeywords(method)
+            if self.firstRank == keywordRank:
+                return
+            work = [("block", method.block)]
+            while work:
+                action, node = work.pop()
+                kind = node.kind
+                if kind == "block":
+                    for order, paramName in enumerate(node.params):
+                        if paramName in reservedNames:
+                            self.error(keywordRank, "Syntactic Error: Reserved keyword in parameter", 22, node, order)
+                            return
+                    for assign in node.assigns:
+                        if assign.var in reservedNames:
+                            self.error(keywordRank, "Syntactic Error: Reserved keyword in assignment", 22, assign)
+                            return
+                    work.extend(("expr", assign.expr) for assign in reversed(node.assigns))
+                elif kind == "primary":
+                    work.append(("expr", node.value))
+                elif kind != "send":
+                    continue  # var, class or literal
+                elif action == "expr":
+                    work.append(("send", node))
+                    work.append(("expr", node.receiver))  # the receiver is checked before the message
+                elif not node.args:
+                    if node.parts[0] in reservedTailIds:
+                        self.error(keywordRank, "Syntactic Error: Reserved keyword in expression tale", 22, node, 0)
+                        return
+                else:
+                    self.checkSelectorKeywordsInSend(node)  # every part before any argument
+                    if self.firstRank == keywordRank:
+                        return
+                    work.extend(("expr", arg) for arg in reversed(node.args))
+
+    def checkSelectorKeywords(self, method):
+        if method.unary:
+            if method.parts[0] in reservedNames:
+                self.error(keywordRank, "Syntactic Error: Reserved keyword in method selector", 22, method)
+            return
+        for selectorId in method.parts:
+            if selectorId in reservedNames:
+                self.error(keywordRank, "Syntactic Error: Reserved keyword in method selector tail", 22, method)
+                return
 
     # Block
-    def block(self, tree):
-            self.definedVariables = set()  # reset defined variables
-            for child in tree.children:
-                if child.data == "block_par":
-                    for param in child.children:
-                        paramId = param.children[0].value
-                        self.definedVariables.add((paramId, None))
-
-            for child in tree.children:
-                if child.data == "block_stat":
-                    for statement in child.children:
-                        if statement.data == "id":
-                            if len(statement.children) > 0:
-                                varId = statement.children[0].value
-                                self.currentIdType = None  # reset stat
-                                self.definedVariables.add((varId, self.currentIdType))  # adding tuple
-                        if statement.data == "expr":
-                            self.exprCheck(statement)
-
-    def idCheckHelper(self, element, type):
-        idName = element.children[0].value
-        methodWParams = set(part for var in definedMethodsWParams for part in var.split(':'))
-        builtinMethodWParams = set(part for var in builtinMethodsWParams for part in var.split(':'))
+    def visitBlock(self, block):
+        self.walk("block", block)
+
+    def checkCollisions(self, block):
+        blockParametersSaved = set()
+        for order, paramName in enumerate(block.params):
+            if paramName in blockParametersSaved:
+                self.error(collisionRank, "Semantic Error: Duplicate parameter in block", 35, block, order)
+                return
+            blockParametersSaved.add(paramName)
+
+        for assign in block.assigns:  # intersection
+            if assign.var in blockParametersSaved:
+                self.error(collisionRank, "Semantic Error: Variable collision in block", 34, assign)
+                return
+
+    # Expression
+    def checkSelectorKeywordsInSend(self, node):
+        for order, (idPart, basePart) in enumerate(zip(node.parts, node.args)):
+            if idPart in reservedSelectorIds:
+                self.error(keywordRank, "Syntactic Error: Reserved keyword in selector id ", 22, node, order)
+                return
+            if basePart.kind in ("var", "classRef") and basePart.name in reservedNames:  # literals never match
+                self.error(keywordRank, "Syntactic Error: Reserved keyword in selector base", 22, basePart)
+                return
+
+    def walk(self, action, node):  # preorder walk on an explicit work stack, so nesting depth is bounded by memory only
+        work = [(action, node)]
+        pop = work.pop
+        push = work.append
+        while work:
+            action, node = pop()
+            if action == "base":
+                kind = node.kind
+                if kind == "var":
+                    if declarationRank < self.firstRank:
+                        self.checkId(node.name, 'base', node)
+                    continue
+                if kind == "classRef":
+                    if declarationRank < self.firstRank and not self.isClassDeclared(node.name):
+                        self.error(declarationRank, f"Semantic Error: Undefined class '{node.name}'", 32, node)
+                    continue
+                if kind == "block":
+                    action = "block"
+                elif kind in ("send", "primary"):
+                    action = "expr"
+                else:
+                    continue  # literal
+
+            if action == "block":
+                if collisionRank < self.firstRank:
+                    self.checkCollisions(node)
+                self.symbols.enterBlock()
+                for paramName in node.params:
+                    self.symbols.addVariable(paramName)
+                for assign in reversed(node.assigns):
+                    push(("expr", assign.expr))
+                    push(("variable", assign.var))  # visible in its own expression already
+            elif action == "variable":
+                self.symbols.addVariable(node)
+            elif action == "expr":
+                if node.kind == "primary":
+                    push(("base", node.value))
+                    continue
+                push(("send", node))
+                push(("base", node.receiver))
+            elif action == "send":
+                if not node.args:  # method without parameters
+                    if declarationRank < self.firstRank:
+                        self.checkId(node.parts[0], 'tail', node, 0)
+                    continue
+                for order in range(len(node.parts) - 1, -1, -1):
+                    push(("base", node.args[order]))
+                    push(("selectorId", (node, order)))
+            elif action == "selectorId":
+                if declarationRank < self.firstRank:
+                    node, order = node
+                    self.checkId(node.parts[order], 'selector', node, order)
+
+    # lookups that depend on the classes and methods declared before the current point
+    def isClassDeclared(self, className):
+        return self.symbols.isClass(className)
+
+    def isSelectorDeclared(self, idName):
+        return self.symbols.isSelectorPart(idName)
+
+    def resolveSuper(self, node=None):
+        if not self.hierarchy.resolvesSuper(self.currentClassType):  # raised only once no error ranked before it is found
+            self.errors[declarationRank] = unresolvedSuper(self.currentClassType)
+            self.errorPlaces[declarationRank] = (node, None)
+            self.firstRank = declarationRank
+
+    def checkId(self, idName, type, node=None, index=None):  # node and index only locate the error
         if type == 'selector':
-            if idName not in (methodWParams | builtinMethodWParams | builtinConstructors | availableIdentifiers):
-                print(f"Semantic Error: Undefined method variable in expression selector '{idName}'",file=sys.stderr)
-                sys.exit(32)
+            if not self.isSelectorDeclared(idName):
+                self.error(declarationRank, f"Semantic Error: Undefined method variable in expression selector '{idName}'", 32, node, index)
         elif type == 'tail':
-            if idName not in (
-                    {var[0] for var in self.definedVariables} | availableIdentifiers | builtinConstructors):
-                print(f"Semantic Error: Undefined method variable in expression tail '{idName}'",
-                      file=sys.stderr)
-                sys.exit(32)
-        elif idName not in {var[0] for var in self.definedVariables} | availableIdentifiers | builtinConstructors:
-            print(f"Semantic Error: Undefined variable in expression '{idName}'", file=sys.stderr)
-            sys.exit(32)
-        elif idName in availableIdentifierObjects:
-            if idName == 'true':
-                self.currentIdType = 'True'
-            elif idName == 'false':
-                self.currentIdType = 'False'
-            elif idName == 'nil':
-                self.currentIdType = 'Nil'
-        elif idName == 'self':
-            self.currentIdType = self.currentClassType
+            if not self.symbols.isVariable(idName):
+                self.error(declarationRank, f"Semantic Error: Undefined method variable in expression tail '{idName}'", 32, node, index)
+        elif not self.symbols.isVariable(idName):
+            self.error(declarationRank, f"Semantic Error: Undefined variable in expression '{idName}'", 32, node)
         elif idName == 'super':
-            self.currentIdType = self.findParentClass(self.currentClassType)
-
-    def exprCheck(self, tree):
-        exprBase = tree.children[0].children[0]
-        self.exprBaseCheck(exprBase)
-        exprTail = tree.children[1].children[0]
-        self.exprTailCheck(exprTail)
-
-    def exprBaseCheck(self, element):
-        if element.data == 'int':
-            if self.currentIdType is None:
-                self.currentIdType = 'Integer'
-        elif element.data == 'str':
-            if self.currentIdType is None:
-                self.currentIdType = 'String'
-        elif element.data == 'id':
-            self.idCheckHelper(element, 'base')
-        elif element.data == 'cid':
-            cidName = element.children[0].value
-            if cidName not in definedClasses | builtinClasses:
-                print(f"Semantic Error: Undefined class '{cidName}'", file=sys.stderr)
-                sys.exit(32)
-            self.currentIdType = cidName
-        elif element.data == 'block':
-            self.currentIdType = 'Block'
-            self.block(element)
-        elif element.data == 'expr':
-            self.exprCheck(element)
-
-    def exprTailCheck(self, tree):
-        if tree.data == "id":  # method without parameters
-            self.idCheckHelper(tree, 'tail')
-        elif tree.data == "expr_sel":
-            self.exprSelCheck(tree)  # method with parameter(s)
-
-    def exprSelCheck(self, tree):
-        for index, element in enumerate(tree.children):
-            if element.data == "id":
-                self.idCheckHelper(element, 'selector')
-            elif element.data == "expr_base":
-                exprBase = element.children[0]
-                self.exprBaseCheck(exprBase)
-
-    # method
-    def method_def(self, tree):
-        if firstDefinedPassthrough:
-            for element in tree.children:
-                if element.data == "selector":
-                    selectorPart = element.children[0]
-                    if selectorPart.data == "id":
-                        methodName = selectorPart.children[0].value
-                        if methodName not in specialMethods:
-                            if methodName in self.methodsSaved | builtinMethods:
-                                print(f"Semantic Error: method redefinition {methodName}", file=sys.stderr)
-                                sys.exit(35)
-                            definedMethods.add(methodName)
-                            self.methodsSaved.add(methodName)
-                    elif selectorPart.data == "selector_tail":
-                        selectorTail = element.children[0].children
-                        if len(selectorTail) == 1:
-                            methodName = selectorTail[0].children[0].value
-                            if methodName in self.methodsSaved | builtinMethods:
-                                print(f"Semantic Error: method redefinition {methodName}", file=sys.stderr)
-                                sys.exit(35)
-                            definedMethodsWParams.add(methodName)
-                            self.methodsSaved.add(methodName)
-                        elif len(selectorTail) > 1:
-                            methodIds = [methodId.children[0].value for methodId in selectorTail]
-                            methodNameJoined = ":".join(methodIds)
-                            if methodNameJoined in self.methodsWParamsSaved | builtinMethods:
-                                print(f"Semantic Error: method redefinition {methodNameJoined}", file=sys.stderr)
-                                sys.exit(35)
-                            definedMethodsWParams.add(methodNameJoined)
-                            self.methodsWParamsSaved.add(methodNameJoined)
-
-arguments = sys.argv[1:]  # take from 1st index, 0th being script directory
-argumentsLength = len(arguments)
-
-if (argumentsLength == 1 and arguments[0] == "--help") or (argumentsLength == 1 and arguments[0] == "-h"):
-    print("Use Interpreter script by passing code to standard input")
-    sys.exit(0)  # return with 0
-elif argumentsLength >= 1:
-    print("use '--help' as argument to show help message", file=sys.stderr)
-    sys.exit(10)  # return with ERROR 10
-
-if enableUserInput:
-    inputCode = sys.stdin.read()
-else:
-    inputCode = inputTest
+            self.resolveSuper(node)
 
 classLiterals: set = {"Integer", "String", "Nil", "True", "False"}
-class CodeTransformer(Transformer):
-    def __init__(self):
-        super().__init__()
-
-    def getFirstComment(self):
-        blockComment = re.search(r'"([^"]*)"', inputCode)
-        if blockComment:
-            comment = blockComment.group(1)
-            return comment
+literalIdentifiers: dict = {"true": "True", "false": "False", "nil": "Nil"}
+# characters expat refuses, the old minidom round-trip failed on them as well
+invalidXMLCharacters = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+def getFirstComment(inputCode):
+    blockComment = re.search(r'"([^"]*)"', inputCode)
+    if blockComment:
+        return blockComment.group(1)
+    return None
+
+def checkValue(value):  # values the XML output cannot carry fail the other output formats the same way
+    if invalidXMLCharacters.search(value):
+        raise ValueError(f"Character not allowed in XML in attribute value {value!r}")
+    return value
+
+def escapeAttribute(value):  # same escaping as minidom uses when writing attributes
+    return checkValue(value).replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+class XMLWriter:  # writes indented XML in chunks while walking the tree, output matches minidom toprettyxml(indent="  ")
+    def __init__(self, out, chunkSize=1 << 16):
+        self.out = out
+        self.chunkSize = chunkSize
+        self.chunks = []
+        self.chunksLength = 0
+        self.indent = ""
+        self.openTags = []  # tag names of open elements
+        self.tagOpen = False  # last start tag still waits for '>' or '/>'
+        self.textTable = None  # (action, repeated node, indentation) -> its rendered text, see shareText
+        self.repeated = ()
+        self.capturing = 0  # rendered subtrees being recorded, their chunks are not flushed yet
+
+    def shareText(self, repeated, limit=1 << 22, largest=1 << 13):  # reuse the text of repeated subtrees, up to limit characters
+        self.textTable = SubtreeTable(limit, len)
+        self.repeated = repeated  # SubtreeTable.repeated of the parse
+        self.largestRecorded = largest  # larger subtrees are written out again, joining them at every level would be quadratic
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.chunksLength += len(text)
+        if self.chunksLength >= self.chunkSize and not self.capturing:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            self.out.write("".join(self.chunks))
+            self.chunks = []
+            self.chunksLength = 0
+
+    def startElement(self, tag, attributes=()):
+        if self.tagOpen:
+            self.write(">\n")  # parent has children after all
+        self.write(self.indent + "<" + tag)
+        for name, value in attributes:
+            self.write(f' {name}="{escapeAttribute(value)}"')
+        self.tagOpen = True
+        self.openTags.append(tag)
+        self.indent += "  "
+
+    def endElement(self):
+        tag = self.openTags.pop()
+        self.indent = self.indent[:-2]
+        if self.tagOpen:
+            self.write("/>\n")
+            self.tagOpen = False
         else:
-            return None
-
-    def program(self, items):
-        programElem = ET.Element('program', language='SOL25')
-
-        comment = self.getFirstComment()
+            self.write(f"{self.indent}</{tag}>\n")
+
+    def emptyElement(self, tag, attributes=()):
+        self.startElement(tag, attributes)
+        self.endElement()
+
+    def renderedElement(self, text):  # element already written at the current indentation, e.g. a cached class
+        if self.tagOpen:
+            self.write(">\n")
+            self.tagOpen = False
+        self.write(text)
+
+    # Program
+    def program(self, program, inputCode):
+        self.startProgram(inputCode, program.comment)
+        for classDef in program.classes:
+            self.classDef(classDef)
+        self.endProgram()
+
+    def startProgram(self, inputCode, comment=notScanned):
+        self.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        programAttributes = [("language", "SOL25")]
+        if comment is notScanned:
+            comment = getFirstComment(inputCode)
         if comment:
-            programElem.set('description', comment)
-
-        for item in items:
-            programElem.append(item)
+            programAttributes.append(("description", comment))
+        self.startElement("program", programAttributes)
 
-        return programElem
+    def endProgram(self):
+        self.endElement()
+        self.flush()
 
-    def class_def(self, items):
-        className = items[0]
-        parentName = items[1]
-        methods = items[2]
-        classElem = ET.Element('class', name=className, parent=parentName)
+    # Class
+    def classDef(self, classDef):
+        self.startElement("class", [("name", classDef.name), ("parent", classDef.parent)])
+        if classDef.methods:  # all blocks of the class share one method element named by its last selector
+            self.startElement("method", [("selector", classDef.methods[-1].parts[0])])  # only the first keyword is kept
+            for method in classDef.methods:
+                self.block(method.block)
+            self.endElement()
+        self.endElement()
 
-        if isinstance(methods, list):
-            for method in methods:
-                if method.attrib.get('selector') or len(method) > 0:
-                    classElem.append(method)
-        else:
-            if methods.attrib.get('selector') or len(methods) > 0:
-                classElem.append(methods)
-        return classElem
-
-    def selector(self, items):
-        return items[0]
-
-    def selector_tail(self, items):
-        return items[0]
-
-    def method_def(self, items):
-        methodElem = ET.Element('method')
-        for i in range(0, len(items), 2):
-            methodElem.set('selector', items[i])
-            blockElem = items[i + 1]
-            methodElem.append(blockElem)
-        return methodElem
-
-    def block(self, items):
-        blockElem = ET.Element('block', arity=str(len(items[0])))
-        if items[0]:
-            for paramElem in items[0]:
-                blockElem.append(paramElem)
-
-        if len(items) > 1:
-            for stat in items[1]:
-                blockElem.append(stat)
-
-        return blockElem
-
-    def helperDetermineExp(self, item):
-        exprElem = ET.Element('expr')
-
-        if not item or (isinstance(item, str) and item.strip() == ""):
-            return item
-
-        if isinstance(item, str):
-            if item.type == "id":
-                if item == "true":
-                    literalElem = ET.Element('literal')
-                    literalElem.set('class', 'True')
-                    literalElem.set('value', item)
-                    exprElem.append(literalElem)
-                elif item == "false":
-                    literalElem = ET.Element('literal')
-                    literalElem.set('class', 'False')
-                    literalElem.set('value', item)
-                    exprElem.append(literalElem)
-                elif item == "nil":
-                    literalElem = ET.Element('literal')
-                    literalElem.set('class', 'Nil')
-                    literalElem.set('value', item)
-                    exprElem.append(literalElem)
+    # Block
+    def block(self, block):
+        self.walk("block", block)
+
+    # Expression
+    def expr(self, node):
+        self.walk("expr", node)
+
+    def isBareBlock(self, node):  # empty blocks and expressions reducing to them are written without an expr wrapper
+        while node.kind == "primary":
+            node = node.value
+        return node.kind == "block" and not node.params and not node.assigns
+
+    def operand(self, node):
+        self.walk("operand", node)
+
+    def walk(self, action, node):  # elements in document order from an explicit work stack, any nesting depth
+        work = [(action, node)]
+        pop = work.pop
+        push = work.append
+        end = ("end", None)
+        textTable = self.textTable
+        repeated = self.repeated
+        while work:
+            action, node = pop()
+            if action == "end":
+                self.endElement()
+                continue
+            if action == "argument":
+                self.startElement("arg", [("order", str(node))])
+                continue
+            if action == "recorded":
+                key, start, startLength = node
+                self.capturing -= 1
+                if self.chunksLength - startLength <= self.largestRecorded:
+                    textTable.put(key, "".join(self.chunks[start:]))
+                continue
+            if textTable is not None and node in repeated and action in ("operand", "expr", "block") and node.kind not in ("var", "literal", "classRef"):
+                key = (action, node, self.indent)
+                text = textTable.get(key)
+                if text is not None:
+                    self.renderedElement(text)
+                    continue
+                if self.tagOpen:
+                    self.write(">\n")  # the parent start tag is not part of the recorded text
+                    self.tagOpen = False
+                self.capturing += 1
+                push(("recorded", (key, len(self.chunks), self.chunksLength)))
+
+            if action == "operand" or action == "innerOperand":  # inner operands are known not to be bare blocks
+                if action == "operand" and self.isBareBlock(node):
+                    self.emptyElement("block", [("arity", "0")])
+                    continue
+                self.startElement("expr")
+                push(end)
+                kind = node.kind
+                if kind == "primary":
+                    push(("innerOperand", node.value))  # a parenthesized expression, same check as its value
+                    continue
+                if kind == "block":
+                    action = "block"
+                elif kind == "send":
+                    action = "expr"
                 else:
-                    varElem = ET.Element('var', name=item)
-                    exprElem.append(varElem)
-            elif item.type == "int":
-                literalElem = ET.Element('literal')
-                literalElem.set('class', 'Integer')
-                literalElem.set('value', item)
-                exprElem.append(literalElem)
-            elif item.type == "str":
-                literalElem = ET.Element('literal')
-                literalElem.set('class', 'String')
-                literalElem.set('value', item[1:-1])
-                exprElem.append(literalElem)
-            elif item.type == "cid":
-                if item in classLiterals:
-                    literalElem = ET.Element('literal')
-                    literalElem.set('class', "class")
-                    literalElem.set('value', item)
-                    exprElem.append(literalElem)
+                    if kind == "var":
+                        if node.name in literalIdentifiers:
+                            self.emptyElement("literal", [("class", literalIdentifiers[node.name]), ("value", node.name)])
+                        else:
+                            self.emptyElement("var", [("name", node.name)])
+                    elif kind == "literal":
+                        self.emptyElement("literal", [("class", node.className), ("value", node.value)])
+                    elif node.name in classLiterals:
+                        self.emptyElement("literal", [("class", "class"), ("value", node.name)])
+                    else:
+                        self.emptyElement("var", [("name", node.name)])
+                    continue
+
+            if action == "block":
+                self.startElement("block", [("arity", str(len(node.params)))])
+                for order, paramName in enumerate(node.params, start=1):
+                    self.emptyElement("parameter", [("name", paramName), ("order", str(order))])
+                push(end)
+                for order in range(len(node.assigns), 0, -1):
+                    push(("assign", (order, node.assigns[order - 1])))
+            elif action == "assign":
+                order, assign = node
+                self.startElement("assign", [("order", str(order))])
+                self.emptyElement("var", [("name", assign.var)])
+                push(end)
+                push(("expr", assign.expr))
+            elif action == "expr":
+                if node.kind == "primary":
+                    push(("operand", node.value))
+                    continue
+                if node.args:
+                    selector = "".join(part + ":" for part in node.parts)
                 else:
-                    varElem = ET.Element('var', name=item)
-                    exprElem.append(varElem)
+                    selector = node.parts[0]
+                self.startElement("expr")
+                self.startElement("send", [("selector", selector)])
+                push(end)
+                push(end)
+                for order in range(len(node.args), 0, -1):
+                    push(end)
+                    push(("operand", node.args[order - 1]))
+                    push(("argument", order))
+                push(("operand", node.receiver))
+
+class JSONWriter(XMLWriter):  # elements of the XML output as nested objects, see astformat.py
+    def __init__(self, out, chunkSize=1 << 16):
+        super().__init__(out, chunkSize)
+        from json.encoder import encode_basestring  # deferred, only this format needs it
+        self.encode = encode_basestring
+        self.childrenOpen = []  # per open element, whether its children list has been started
+
+    def startProgram(self, inputCode, comment=notScanned):
+        if comment is notScanned:
+            comment = getFirstComment(inputCode)
+        self.startElement("program", [("language", "SOL25")] + ([("description", comment)] if comment else []))
+
+    def endProgram(self):
+        self.endElement()
+        self.write("\n")
+        self.flush()
+
+    def startElement(self, tag, attributes=()):
+        if self.childrenOpen:
+            if self.childrenOpen[-1]:
+                self.write(",")
+            else:
+                self.write(',"children":[')
+                self.childrenOpen[-1] = True
+        encode = self.encode
+        self.write('{"tag":"' + tag + '"' + "".join(f',"{name}":{encode(checkValue(value))}' for name, value in attributes))
+        self.childrenOpen.append(False)
+
+    def endElement(self):
+        self.write("]}" if self.childrenOpen.pop() else "}")
+
+    def renderedElement(self, text):
+        raise ValueError("Rendered XML elements cannot be written as JSON")
+
+    def shareText(self, repeated, limit=None, largest=None):
+        pass  # commas depend on the siblings, shared subtrees are written out every time
+
+class BinaryWriter(XMLWriter):  # elements of the XML output in the length-prefixed layout of astformat.py, out takes bytes
+    def __init__(self, out):
+        super().__init__(out)
+        import astformat  # deferred, only this format needs it
+        self.format = astformat
+        self.nodes = bytearray()  # node section, written after the string table once every string is known
+        self.strings = {}  # string -> index in the table
+        self.openNodes = []  # [offset, child count] of open elements
+
+    def stringIndex(self, value):
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def startProgram(self, inputCode, comment=notScanned):
+        if comment is notScanned:
+            comment = getFirstComment(inputCode)
+        self.startElement("program", [("language", "SOL25")] + ([("description", comment)] if comment else []))
+
+    def endProgram(self):
+        self.endElement()
+        blob = bytearray()
+        offsets = [0]
+        for value in self.strings:  # dicts keep insertion order, which is the index order
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        astformat = self.format
+        self.out.write(astformat.header.pack(astformat.magic, astformat.version, 0, len(self.strings), len(blob), len(self.nodes)))
+        self.out.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        self.out.write(bytes(blob) + bytes(-len(blob) % 4))
+        self.out.write(self.nodes)
+
+    def startElement(self, tag, attributes=()):
+        if self.openNodes:
+            self.openNodes[-1][1] += 1
+        astformat = self.format
+        self.openNodes.append([len(self.nodes), 0])
+        self.nodes += astformat.nodeHeader.pack(astformat.tagIds[tag], len(attributes), 0, 0, 0)
+        for name, value in attributes:
+            self.nodes += astformat.attributeRecord.pack(astformat.attributeIds[name], self.stringIndex(checkValue(value)))
+
+    def endElement(self):
+        offset, childCount = self.openNodes.pop()
+        struct.pack_into("<II", self.nodes, offset + 4, childCount, len(self.nodes) - offset)  # count and length fields
+
+    def renderedElement(self, text):
+        raise ValueError("Rendered XML elements cannot be written in the binary format")
+
+    def shareText(self, repeated, limit=None, largest=None):
+        pass  # attribute values are stored once in the string table already
+
+writers = {"xml": XMLWriter, "json": JSONWriter, "bin": BinaryWriter}  # output format -> writer class
+outputFormat = "xml"
+shareSubtrees = False  # --share
+
+# serialized LALR tables live next to the bytecode, keyed by the grammar hash, so only the first run builds them
+grammarCacheDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+
+def buildParser(transformer=None):  # with a transformer lark calls it while reducing, no tree is returned
+    grammarHash = hashlib.sha256(grammar.encode("utf-8")).hexdigest()[:16]
+    cachePath = os.path.join(grammarCacheDir, f"sol25-grammar-{grammarHash}.lark")
+    try:
+        os.makedirs(grammarCacheDir, exist_ok=True)
+    except OSError:
+        cachePath = True  # read-only checkout, lark falls back to its temp directory cache
+    return Lark(grammar, start="program", parser="lalr", lexer="contextual", cache=cachePath, transformer=transformer)
+
+parser = None  # built on first use, shared by every program parsed in this process
+parserLock = threading.Lock()  # parsers are built once, parsing keeps its state per call and needs no lock
+
+def getParser():  # parses straight into the AST, buildParser() without a transformer returns lark trees
+    global parser
+    with parserLock:
+        if parser is None:
+            parser = buildParser(ASTBuilder())
+    return parser
+
+treeParser = None  # lark trees for toAST, only structural sharing needs them
+
+def getTreeParser():
+    global treeParser
+    with parserLock:
+        if treeParser is None:
+            treeParser = buildParser()
+    return treeParser
+
+# parser backends, each turns source text into the AST and reports errors as lark exceptions
+# parse(inputCode, table) is called with a SubtreeTable when subtrees are shared
+class LarkBackend:  # LALR parser building the AST in its callbacks
+    def parse(self, inputCode, table=None):
+        if table is None:
+            resetReservedUse()
+            return getParser().parse(inputCode)
+        return toAST(getTreeParser().parse(inputCode), table)  # the callbacks of the shared parser keep no table
+
+class DescentBackend:  # hand-written tokenizer and recursive descent, lark only parses inputs it rejects
+    def parse(self, inputCode, table=None):
+        try:
+            # one per call, the parser keeps its position on itself
+            return (DescentParser() if table is None else SharingDescentParser(table)).parse(inputCode)
+        except (DescentError, RecursionError):
+            return LarkBackend().parse(inputCode, table)  # raises the error the lark backend reports
+
+backends = {"lark": LarkBackend, "descent": DescentBackend}  # name -> factory, see registerBackend
+backendName = os.environ.get("SOL25_BACKEND") or "descent"  # 6x faster than lark, see benchmarks/backend_comparison.py
+backendInstances = {}
+
+def registerBackend(name, factory):
+    backends[name] = factory
+    backendInstances.pop(name, None)
+
+def getBackend(name=None):
+    name = name or backendName
+    if name not in backendInstances:
+        if name not in backends:
+            raise ValueError(f"Unknown parser backend '{name}', available: {', '.join(sorted(backends))}")
+        backendInstances.setdefault(name, backends[name]())  # backends keep no state, a racing thread's instance is as good
+    return backendInstances[name]
+
+# profiling, off unless --profile, SOL25_PROFILE or a hook asks for it
+# SOL25_PROFILE=1 (or stderr) writes the JSON report on stderr, any other value is a file the reports are appended to
+profileOutput = os.environ.get("SOL25_PROFILE") or None
+profileHooks = []  # called with every phase record as soon as the phase ends
+
+def addProfileHook(hook):
+    profileHooks.append(hook)
+
+def removeProfileHook(hook):
+    profileHooks.remove(hook)
+
+class PhaseProfile:  # wall time, CPU time, allocated memory and counts of every phase of one parse
+    def __init__(self):
+        import time
+        import tracemalloc
+        self.time = time
+        self.tracemalloc = tracemalloc
+        self.ownsTracing = not tracemalloc.is_tracing()
+        if self.ownsTracing:
+            tracemalloc.start()
+        self.records = []
+
+    def run(self, name, function, *args):
+        self.tracemalloc.reset_peak()
+        memoryBefore = self.tracemalloc.get_traced_memory()[0]
+        wallBefore = self.time.perf_counter()
+        cpuBefore = self.time.process_time()
+        record = {"phase": name}
+        try:
+            return function(*args)
+        except SystemExit as e:
+            record["exitCode"] = e.code
+            raise
+        except Exception as e:
+            record["exception"] = type(e).__name__
+            raise
+        finally:
+            memoryAfter, peak = self.tracemalloc.get_traced_memory()
+            record["wallSeconds"] = round(self.time.perf_counter() - wallBefore, 6)
+            record["cpuSeconds"] = round(self.time.process_time() - cpuBefore, 6)
+            record["allocatedBytes"] = memoryAfter - memoryBefore  # still held when the phase ended
+            record["peakBytes"] = peak - memoryBefore
+            self.records.append(record)
+            for hook in profileHooks:
+                hook(record)
+
+    def count(self, name, value):  # attached to the last phase
+        self.records[-1][name] = value
+
+    def report(self):
+        if self.ownsTracing:
+            self.tracemalloc.stop()
+        if profileOutput is None:
+            return
+        import json
+        document = json.dumps({"phases": self.records, "wallSeconds": round(sum(record["wallSeconds"] for record in self.records), 6)})
+        if profileOutput in ("1", "stderr"):
+            print(document, file=sys.stderr)
         else:
-            exprElem.append(item)
-        return exprElem
-
-    def expr(self, items):
-        baseItem = items[0]
-        tailItem = items[1]
-
-        exprElem = self.helperDetermineExp(baseItem)
-        if not tailItem:
-            return exprElem
-
-        sendElem = ET.Element('send')
-        sendElem.append(exprElem)
-
-        selParts = []
-        argIndex = 0
-
-        if isinstance(tailItem, str):
-            selParts.append(tailItem)
-        elif isinstance(tailItem, list):
-            i = 0
-            while i < len(tailItem):
-                sel = tailItem[i]
-                selParts.append(f"{sel}:")
-
-                if i + 1 < len(tailItem):
-                    arg = tailItem[i + 1]
-                    argIndex += 1
-                    argExpElem = self.helperDetermineExp(arg)
-                    argElem = ET.Element('arg', order=str(argIndex))
-                    argElem.append(argExpElem)
-                    sendElem.append(argElem)
-                i += 2
-
-        selectorStr = "".join(selParts)
-        sendElem.set('selector', selectorStr)
-        outExprElem = ET.Element('expr')
-        outExprElem.append(sendElem)
-
-        return outExprElem
-
-    def expr_base(self, items):
-        if len(items) == 1:
-            return items[0]
-        return items
-
-    def expr_tail(self, items):
-        return items[0]
-
-    def expr_sel(self, items):
-        return items
-
-    def block_par(self, items):
-        parameters = []
-        for i, param in enumerate(items, start=1):
-            paramElem = ET.Element('parameter', name=param, order=str(i))
-            parameters.append(paramElem)
-
-        return parameters
-
-    def block_stat(self, items):
-        assigns = []
-        order = 1
-
-        for i in range(0, len(items), 2):
-            varName = items[i]
-            exprElem = items[i + 1]
-
-            assignElem = ET.Element('assign', order=str(order))
-            varElem = ET.Element('var', name=varName)
-            assignElem.append(varElem)
-            assignElem.append(exprElem)
-            assigns.append(assignElem)
-            order += 1
-        return assigns
-
-    def id(self, token):
-        token[0].type = "id"
-        return token[0]
-
-    def cid(self, token):
-        token[0].type = "cid"  # access with token 0
-        return token[0]
-
-    def int(self, token):
-        token[0].type = "int"
-        return token[0]
-
-    def str(self, token):
-        token[0].type = "str"
-        return token[0]
-
-parser = Lark(grammar, start="program", parser="lalr", lexer="contextual")
-syntacticReservedKeywordsUse = ReservedKeywordsUse()
-semanticClassMainRun = ClassMainRun()
-semanticArityBlockSelector = ArityBlockSelector()
-semanticCollisionVariable = CollisionVariable()
-semanticDefinedElements = DefinedElementsAndTypes()
-xmlTransformer = CodeTransformer()
-
-# order of exceptions matters, first invoked is activated
-try:
-    finalTree = parser.parse(inputCode)
-
-    syntacticReservedKeywordsUse.visit_topdown(finalTree)  # Error 22
-    semanticClassMainRun.visit_topdown(finalTree)  # Error 31
-    semanticClassMainRun.runInMainConfirm()
-    semanticDefinedElements.visit_topdown(finalTree)
-    firstDefinedPassthrough = False
-    semanticDefinedElements.visit_topdown(finalTree)  # Error 32
-    semanticArityBlockSelector.visit_topdown(finalTree)  # Error 33
-    semanticCollisionVariable.visit_topdown(finalTree)  # Error 34, 35
-
-    xmlRoot = xmlTransformer.transform(finalTree)
-    xmlString = ET.tostring(xmlRoot, encoding="utf-8").decode("utf-8")
-    xmlHeader = '<?xml version="1.0" encoding="UTF-8"?>'
-    finalXML = xmlHeader + xmlString
-
-    domXML = minidom.parseString(finalXML)
-    prettyXML = domXML.toprettyxml(indent="  ", encoding="utf-8").decode("utf-8")
-    if printTree: sys.stdout.write(prettyXML)
-
-
-except exceptions.UnexpectedCharacters as e:
-    print(f"UnexpectedCharacters: {e}", file=sys.stderr)
-    sys.exit(21)
-except exceptions.UnexpectedToken as e:
-    print(f"UnexpectedToken: {e}", file=sys.stderr)
-    sys.exit(22)
+            try:
+                with open(profileOutput, "a", encoding="utf-8") as profileFile:
+                    profileFile.write(document + "\n")
+            except OSError as e:
+                print(f"Cannot write profile file: {e}", file=sys.stderr)
+
+def runPhase(profile, name, function, *args):
+    if profile is None:
+        return function(*args)
+    return profile.run(name, function, *args)
+
+def countTokens(inputCode):  # None when the lexer stops on the input, the parse reports the error
+    if not isinstance(inputCode, str):
+        return None  # mapped input of largeinput.py, lark lexes text only
+    try:
+        return sum(1 for _ in getParser().lex(inputCode))
+    except exceptions.LarkError:
+        return None
+
+def countNodes(program):  # AST nodes, lists and tuples of nodes are followed but not counted
+    nodes = 0
+    stack = [program]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        kind = node.kind
+        if kind == "program":
+            stack.extend(node.classes)
+        elif kind == "class":
+            stack.extend(node.methods)
+        elif kind == "method":
+            stack.append(node.block)
+        elif kind == "block":
+            stack.extend(node.assigns)
+        elif kind == "assign":
+            stack.append(node.expr)
+        elif kind == "send":
+            stack.append(node.receiver)
+            stack.extend(node.args)
+        elif kind == "primary":
+            stack.append(node.value)
+    return nodes
+
+def reportError(error, location=None):  # reports a first error like the command line: prints the message and exits, exceptions are raised
+    if error is None:
+        return
+    if isinstance(error, Exception):
+        raise error
+    message, exitCode = error
+    print(message, file=sys.stderr)
+    if location is not None:  # (line, column) with --positions only, the message itself stays as it was
+        print(f"  at line {location[0]}, column {location[1]}", file=sys.stderr)
+    sys.exit(exitCode)
+
+# source positions, built only when asked for: spans of the AST nodes, of the XML elements and of the first error
+# offsets count characters of the source text, every span is [start, end)
+def tokenSpans(inputCode):  # starts and ends of the tokens tokenize returns, for input that parsed
+    starts = array("q")
+    ends = array("q")
+    for token in tokenPattern.finditer(inputCode):
+        if token.lastgroup is not None and token.lastgroup != "comment":
+            starts.append(token.start())
+            ends.append(token.end())
+    return starts, ends
+
+def indexSpans(program, inputCode):  # node -> (start, end, starts of its parameters or selector parts)
+    # the tokens are matched up with the tree any backend built; operands in parentheses span them as well
+    starts, ends = tokenSpans(inputCode)
+    spans = {}
+    partStarts = {}  # send -> starts of its selector parts so far, block -> starts of its parameters
+    position = 0
+    work = [("class", classDef) for classDef in reversed(program.classes)]
+    pop = work.pop
+    push = work.append
+    while work:
+        action, node = pop()
+        if action == "end":
+            node, start = node
+            spans[node] = (start, ends[position - 1]) + tuple(partStarts.pop(node, ()))
+            continue
+        if action == "skip":  # ] ) } or .
+            position += 1
+            continue
+        if action == "part":  # unary message or one part of a keyword message
+            partStarts.setdefault(node, []).append(starts[position])
+            position += 2 if node.args else 1
+            continue
+        if action == "base":
+            kind = node.kind
+            if kind in ("send", "primary"):  # ( expr )
+                push(("end", (node, starts[position])))
+                push(("skip", None))
+                push(("body", node))
+                position += 1
+                continue
+            if kind != "block":
+                spans[node] = (starts[position], ends[position])
+                position += 1
+                continue
+            action = "block"
+
+        if action == "class":
+            push(("end", (node, starts[position])))
+            push(("skip", None))
+            work.extend(("method", method) for method in reversed(node.methods))
+            position += 5 if ends[position] - starts[position] == 5 else 4  # class Name : Parent {, 'classMain' is one token
+        elif action == "method":
+            push(("end", (node, starts[position])))
+            push(("block", node.block))
+            position += 1 if node.unary else 2 * len(node.parts)
+        elif action == "block":
+            push(("end", (node, starts[position])))
+            push(("skip", None))
+            work.extend(("assign", assign) for assign in reversed(node.assigns))
+            if node.params:
+                partStarts[node] = starts[position + 2:position + 2 + 2 * len(node.params):2].tolist()
+            position += 2 + 2 * len(node.params)  # [ :param ... |
+        elif action == "assign":  # spans the variable and the expression, not the closing dot
+            push(("skip", None))
+            push(("end", (node, starts[position])))
+            push(("expr", node.expr))
+            position += 2
+        elif action == "expr":
+            push(("end", (node, starts[position])))
+            push(("body", node))
+        elif action == "body":
+            if node.kind == "primary":
+                push(("base", node.value))
+                continue
+            if node.args:
+                for order in range(len(node.args) - 1, -1, -1):
+                    push(("base", node.args[order]))
+                    push(("part", node))
+            else:
+                push(("part", node))
+            push(("base", node.receiver))
+    return spans
+
+def elementIndex(program, inputCode, spans):  # start, end and number of every element of the XML output, flat
+    # elements are numbered in document order, which is already the order of the sidecar: by start, enclosing ones first
+    elements = array("I", (0, len(inputCode), 0))
+
+    def append(span):
+        elements.extend((span[0], span[1], len(elements) // 3))
+
+    work = [("class", classDef) for classDef in reversed(program.classes)]
+    pop = work.pop
+    push = work.append
+    while work:
+        action, node = pop()
+        if action == "class":
+            append(spans[node])
+            if node.methods:  # one method element for every block of the class
+                append((spans[node.methods[0]][0], spans[node.methods[-1]][1]))
+                work.extend(("block", method.block) for method in reversed(node.methods))
+            continue
+        if action == "argument":
+            node, order = node
+            append((spans[node][2 + order], spans[node.args[order]][1]))
+            continue
+        if action == "operand" or action == "innerOperand":  # the same elements XMLWriter.walk writes
+            bare = node
+            while bare.kind == "primary":
+                bare = bare.value
+            if action == "operand" and bare.kind == "block" and not bare.params and not bare.assigns:
+                append(spans[bare])  # written as the empty block alone
+                continue
+            span = spans[node]
+            append(span)  # expr
+            kind = node.kind
+            if kind == "primary":
+                push(("innerOperand", node.value))
+                continue
+            if kind == "block":
+                action = "block"
+            elif kind == "send":
+                action = "expr"
+            else:
+                append(span)  # var or literal
+                continue
+
+        if action == "block":
+            span = spans[node]
+            append(span)
+            for paramName, start in zip(node.params, span[2:]):
+                append((start, start + len(paramName)))
+            work.extend(("assign", assign) for assign in reversed(node.assigns))
+        elif action == "assign":
+            start, end = spans[node]
+            append((start, end))
+            append((start, start + len(node.var)))
+            push(("expr", node.expr))
+        elif action == "expr":
+            if node.kind == "primary":
+                push(("operand", node.value))
+                continue
+            span = spans[node]
+            append(span)  # expr
+            append(span)  # send
+            for order in range(len(node.args) - 1, -1, -1):
+                push(("operand", node.args[order]))
+                push(("argument", (node, order)))
+            push(("operand", node.receiver))
+    return elements
+
+def errorSpan(spans, place):  # (start, end) of the node an error is about, see SemanticAnalyzer.errorPlaces
+    if place is None or place[0] is None:
+        return None
+    node, index = place
+    span = spans[node]
+    if node.kind == "assign":
+        return span[0], span[0] + len(node.var)
+    if index is not None:  # parameter of a block or selector part of a send
+        start = span[2 + index]
+        return start, start + len(node.params[index] if node.kind == "block" else node.parts[index])
+    return span[0], span[1]
+
+def exceptionSpan(e, inputCode):  # (start, end) lark reports an error at
+    if isinstance(e, exceptions.UnexpectedCharacters):
+        return e.pos_in_stream, e.pos_in_stream + 1
+    start = e.token.start_pos
+    if start is None:
+        return len(inputCode), len(inputCode)
+    return start, e.token.end_pos if e.token.end_pos is not None else start
+
+class SourcePositions:  # filled by runProgram(positions=...), see --positions
+    def __init__(self, inputCode):
+        self.inputCode = inputCode
+        self.errorSpan = None  # what the first error is about, None without errors or when it has no single place
+        self.elements = None  # elementIndex of the XML output the program gives: start, end, number, start, ...
+
+    def lineColumn(self, offset):  # both counted from 1, columns in characters
+        return self.inputCode.count("\n", 0, offset) + 1, offset - self.inputCode.rfind("\n", 0, offset)
+
+    def errorLocation(self):
+        return None if self.errorSpan is None else self.lineColumn(self.errorSpan[0])
+
+def writePositions(path, positions):  # JSON, or the binary layout of astformat.py when the name ends with .bin
+    import astformat  # deferred, only the sidecar needs it
+    elements = positions.elements if positions.elements is not None else array("I")
+    errorStart, errorEnd = positions.errorSpan or (-1, -1)
+    if path.endswith(".bin"):
+        with open(path, "wb") as positionsFile:
+            positionsFile.write(astformat.positionsHeader.pack(astformat.positionsMagic, astformat.positionsVersion, 0, len(elements) // 3, errorStart, errorEnd))
+            if elements.itemsize == 4 and sys.byteorder == "little":
+                positionsFile.write(elements.tobytes())
+            else:
+                positionsFile.write(struct.pack(f"<{len(elements)}I", *elements))
+        return
+    import json
+    error = None
+    if positions.errorSpan is not None:
+        line, column = positions.errorLocation()
+        error = {"start": errorStart, "end": errorEnd, "line": line, "column": column}
+    with open(path, "w", encoding="utf-8") as positionsFile:
+        positionsFile.write(f'{{"version":{astformat.positionsVersion},"error":{json.dumps(error, separators=(",", ":"))},"elements":[')
+        step = 3 << 12  # elements written in chunks, no list of them is built
+        for chunk in range(0, len(elements), step):
+            values = elements[chunk:chunk + step]
+            positionsFile.write(("," if chunk else "") + ",".join(f"[{values[k]},{values[k + 1]},{values[k + 2]}]" for k in range(0, len(values), 3)))
+        positionsFile.write("]}\n")
+
+# passes of one program, each runs once the passes it requires have run and returns the first error or None
+class PassContext:  # what the passes of one runProgram call hand to each other
+    def __init__(self, inputCode, out, backend, writer, profile, share, positions=None):
+        self.inputCode = inputCode
+        self.out = out
+        self.backend = backend
+        self.writer = writer
+        self.profile = profile
+        self.share = share
+        self.positions = positions  # SourcePositions to fill, None when positions are not tracked
+        self.program = None
+        self.repeated = None  # nodes the parse shared, see SubtreeTable
+        self.analyzer = None  # the one that found the first error, if any
+        self.spans = None  # see nodeSpans
+
+    def nodeSpans(self):  # indexSpans of the program, built on first use
+        if self.spans is None:
+            self.spans = runPhase(self.profile, "positions", indexSpans, self.program, self.inputCode)
+        return self.spans
+
+def parsePass(context):
+    profile = context.profile
+    table = SubtreeTable() if context.share else None
+    if table is None:
+        context.program = runPhase(profile, "parse", context.backend.parse, context.inputCode)
+    else:
+        context.program = runPhase(profile, "parse", context.backend.parse, context.inputCode, table)
+        context.repeated = table.repeated  # the keys are not needed once the tree is built
+    if profile is not None:
+        profile.count("nodes", countNodes(context.program))
+        if table is not None:
+            profile.count("sharedNodes", len(table))
+    return None
+
+def keywordsPass(context):  # reserved keyword errors (22), only the classes the parser flagged are walked
+    analyzer = context.analyzer = SemanticAnalyzer()
+    for classDef in context.program.classes:
+        if classDef.reserved:
+            analyzer.checkReservedKeywords(classDef)
+            if analyzer.firstRank == keywordRank:
+                return analyzer.firstError()
+    return None
+
+def checkPass(context):
+    context.analyzer = SemanticAnalyzer()
+    runPhase(context.profile, "check", context.analyzer.visitProgram, context.program)
+    return None
+
+def finishPass(context):  # Errors 22, 31, 32, 33, 34, 35 in this priority
+    return runPhase(context.profile, "finish", context.analyzer.finishChecks)
+
+def xmlValuesPass(context):  # the error writing the output would end with, without writing it
+    inputCode = context.inputCode
+    if not (invalidXMLCharacters.search(inputCode) if isinstance(inputCode, str) else inputCode.invalidXML):  # MappedInput of largeinput.py
+        return None  # every attribute value is taken from the source or is a constant
+    runPhase(context.profile, "serialize", context.writer(discardOutput).program, context.program, context.inputCode)
+    return None
+
+def serializePass(context):
+    if context.out is not None:
+        programWriter = context.writer(context.out)
+        if context.share:
+            programWriter.shareText(context.repeated)
+        runPhase(context.profile, "serialize", programWriter.program, context.program, context.inputCode)
+    return None
+
+def positionsPass(context):  # spans of the XML elements, only asked for when positions are tracked
+    spans = context.nodeSpans()
+    context.positions.elements = runPhase(context.profile, "positions", elementIndex, context.program, context.inputCode, spans)
+    return None
+
+class DiscardOutput:
+    def write(self, data):
+        pass
+
+discardOutput = DiscardOutput()
+passes = {}  # name -> (names of the passes it requires, function of the PassContext)
+
+def registerPass(name, function, requires=()):
+    passes[name] = (tuple(requires), function)
+
+registerPass("parse", parsePass)
+registerPass("keywords", keywordsPass, ["parse"])
+registerPass("check", checkPass, ["keywords"])
+registerPass("finish", finishPass, ["check"])
+registerPass("xmlValues", xmlValuesPass, ["finish"])
+registerPass("serialize", serializePass, ["finish"])
+registerPass("positions", positionsPass, ["parse"])  # runs after the passes of the level, see runProgram
+# analysis levels, --syntax-only, --check and the default, by the passes they end with
+checkLevels = {"syntax": ("keywords",), "check": ("xmlValues",), "xml": ("serialize",)}
+checkLevel = "xml"
+
+def passOrder(targets):  # the targets and every pass they require, each after its requirements
+    order = []
+    work = [(name, False) for name in reversed(targets)]
+    while work:
+        name, requirementsDone = work.pop()
+        if name in order:
+            continue
+        if requirementsDone:
+            order.append(name)
+            continue
+        work.append((name, True))
+        work.extend((required, False) for required in reversed(passes[name][0]))
+    return order
+
+def runProgram(inputCode, out=None, inline=False, backend=None, writer=XMLWriter, profile=None, share=False, level="xml", positions=None):  # returns the first error, nothing is printed
+    # positions, a SourcePositions, is filled unless inline or share is set: shared nodes and inline mode have no single place
+    # order of exceptions matters, first invoked is activated
+    try:
+        if profile is not None:
+            profile.count("tokens", profile.run("lex", countTokens, inputCode))  # extra run, lark lexes while parsing
+        if inline:
+            import inline as inlineMode  # deferred, inline.py builds on this module
+            return inlineMode.runInline(inputCode, out, profile)
+        context = PassContext(inputCode, out, backend or getBackend(), writer, profile, share, positions)
+        targets = checkLevels[level] if positions is None or share else checkLevels[level] + ("positions",)
+        for name in passOrder(targets):
+            error = passes[name][1](context)
+            if error is not None:  # cheapest passes run first, nothing after the first error is computed
+                if profile is not None and not isinstance(error, Exception):
+                    profile.count("exitCode", error[1])
+                if positions is not None and not share and context.analyzer is not None:
+                    positions.errorSpan = errorSpan(context.nodeSpans(), context.analyzer.firstErrorPlace())
+                return error
+
+    except exceptions.UnexpectedCharacters as e:
+        if positions is not None:
+            positions.errorSpan = exceptionSpan(e, inputCode)
+        return f"UnexpectedCharacters: {e}", 21
+    except exceptions.UnexpectedToken as e:
+        if positions is not None:
+            positions.errorSpan = exceptionSpan(e, inputCode)
+        return f"UnexpectedToken: {e}", 22
+    return None
+
+positionsOutput = None  # --positions=FILE
+
+def parseProgram(inputCode, out=None, inline=False):  # writes pretty XML (or outputFormat) into out, errors are reported on stderr with sys.exit
+    profile = PhaseProfile() if profileOutput is not None or profileHooks else None
+    positions = SourcePositions(inputCode) if positionsOutput is not None else None
+    try:
+        error = runProgram(inputCode, out, inline, getBackend(), writers[outputFormat], profile, shareSubtrees, checkLevel, positions)
+        location = None
+        if positions is not None:
+            try:
+                writePositions(positionsOutput, positions)
+            except OSError as e:
+                print(f"Cannot write positions file: {e}", file=sys.stderr)
+                sys.exit(12)
+            location = positions.errorLocation()
+        reportError(error, location)
+    finally:
+        if profile is not None:
+            profile.report()
+
+class ParseResult:  # outcome of one parse, the exit code, stderr message and output parse.py would give for the source
+    def __init__(self, exitCode, diagnostics=None, xml=None, positions=None):
+        self.exitCode = exitCode
+        self.diagnostics = diagnostics  # message parse.py prints on stderr, None on success
+        self.xml = xml  # str, bytes for the bin format, None on errors or without output
+        self.positions = positions  # SourcePositions of the parse when the session tracks them
+
+    def writeXML(self, out):
+        if self.xml is not None:
+            out.write(self.xml)
+
+class ParseSession:  # parses in process without printing or exiting; safe to use from many threads at once
+    # every parse keeps its state in its own objects, the compiled lark tables are built once and shared
+    # profiling (tracemalloc) is process wide and best left off while threads parse
+    def __init__(self, backend=None, outputFormat="xml", inline=False, output=True, share=False, level="xml", positions=False):
+        if outputFormat not in writers:
+            raise ValueError(f"Unknown output format '{outputFormat}', available: {', '.join(sorted(writers))}")
+        if level not in checkLevels:
+            raise ValueError(f"Unknown check level '{level}', available: {', '.join(checkLevels)}")
+        if inline and outputFormat != "xml":
+            raise ValueError("Inline mode writes xml only")
+        if inline and level != "xml":
+            raise ValueError("Inline mode runs every check and writes the output")
+        if positions and (inline or share):
+            raise ValueError(f"Positions cannot be tracked in {'inline mode' if inline else 'shared subtrees'}")
+        self.backend = getBackend(backend)
+        self.outputFormat = outputFormat
+        self.inline = inline
+        self.output = output and level == "xml"  # False only checks the program, the result carries no XML
+        self.level = level  # syntax, check or xml, see checkLevels
+        self.share = share and not inline  # inline mode keeps no tree to share subtrees in
+        self.positions = positions  # results carry SourcePositions
+
+    def parse(self, inputCode):
+        import io
+        out = None
+        if self.output:
+            out = io.BytesIO() if self.outputFormat == "bin" else io.StringIO()
+        profile = PhaseProfile() if profileOutput is not None or profileHooks else None
+        positions = SourcePositions(inputCode) if self.positions else None
+        try:
+            error = runProgram(inputCode, out, self.inline, self.backend, writers[self.outputFormat], profile, self.share, self.level, positions)
+        except Exception as e:
+            error = e
+        finally:
+            if profile is not None:
+                profile.report()
+        if isinstance(error, Exception):
+            import traceback
+            return ParseResult(1, "".join(traceback.format_exception_only(error)).strip(), None, positions)  # same code an uncaught exception ends the CLI with
+        if error is not None:
+            message, exitCode = error
+            return ParseResult(exitCode, message.rstrip("\n") or None, None, positions)
+        return ParseResult(0, None, out.getvalue() if out is not None else None, positions)
+
+def parseSource(inputCode, **settings):  # one parse with a throwaway session, settings as for ParseSession
+    return ParseSession(**settings).parse(inputCode)
+
+def main():
+    arguments = sys.argv[1:]  # take from 1st index, 0th being script directory
+    global profileOutput, backendName, outputFormat, shareSubtrees, checkLevel, positionsOutput
+    inline = "--inline" in arguments  # opt-in, checks and output are built while parsing
+    if inline:
+        arguments.remove("--inline")
+    shareSubtrees = "--share" in arguments
+    if shareSubtrees:
+        arguments.remove("--share")
+    largeInput = "--large-input" in arguments  # standard input is memory-mapped, see largeinput.py
+    if largeInput:
+        arguments.remove("--large-input")
+    levelOptions = [option for option in ("--syntax-only", "--check") if option in arguments]
+    for option in levelOptions:
+        arguments.remove(option)
+    if len(levelOptions) > 1:
+        print("--syntax-only and --check cannot be combined", file=sys.stderr)
+        sys.exit(10)
+    if levelOptions:
+        checkLevel = "syntax" if levelOptions[0] == "--syntax-only" else "check"
+    jobs = None  # parallel mode when set
+    for argument in list(arguments):
+        if argument == "--jobs" or argument.startswith("--jobs="):
+            value = argument.partition("=")[2]
+            if value and (not value.isdigit() or int(value) < 1):
+                print(f"Invalid number of jobs '{value}'", file=sys.stderr)
+                sys.exit(10)
+            jobs = int(value) if value else 0  # 0 stands for the CPU count
+            arguments.remove(argument)
+        elif argument == "--profile" or argument.startswith("--profile="):
+            profileOutput = argument.partition("=")[2] or "stderr"
+            arguments.remove(argument)
+        elif argument.startswith("--backend="):
+            backendName = argument.partition("=")[2]
+            arguments.remove(argument)
+            if backendName not in backends:
+                print(f"Unknown parser backend '{backendName}', available: {', '.join(sorted(backends))}", file=sys.stderr)
+                sys.exit(10)
+        elif argument.startswith("--format="):
+            outputFormat = argument.partition("=")[2]
+            arguments.remove(argument)
+        elif argument.startswith("--positions="):
+            positionsOutput = argument.partition("=")[2]
+            arguments.remove(argument)
+            if not positionsOutput:
+                print("Missing file name for '--positions'", file=sys.stderr)
+                sys.exit(10)
+    if "--format" in arguments:  # value as the next argument
+        index = arguments.index("--format")
+        outputFormat = arguments[index + 1] if index + 1 < len(arguments) else ""
+        del arguments[index:index + 2]
+    if outputFormat not in writers:
+        print(f"Unknown output format '{outputFormat}', available: {', '.join(writers)}", file=sys.stderr)
+        sys.exit(10)
+    if (inline or jobs is not None) and outputFormat != "xml":
+        print(f"{'--inline' if inline else '--jobs'} writes XML only", file=sys.stderr)
+        sys.exit(10)
+    if inline and jobs is not None:
+        print("--inline and --jobs cannot be combined", file=sys.stderr)
+        sys.exit(10)
+    if levelOptions and (inline or jobs is not None):
+        print(f"{levelOptions[0]} cannot be combined with {'--inline' if inline else '--jobs'}", file=sys.stderr)
+        sys.exit(10)
+    if shareSubtrees and (inline or jobs is not None):
+        print(f"--share cannot be combined with {'--inline' if inline else '--jobs'}", file=sys.stderr)
+        sys.exit(10)
+    if largeInput and (inline or shareSubtrees or jobs is not None or positionsOutput is not None or outputFormat != "xml"):
+        conflict = "--inline" if inline else "--share" if shareSubtrees else "--jobs" if jobs is not None else "--positions" if positionsOutput is not None else "--format " + outputFormat
+        print(f"--large-input cannot be combined with {conflict}", file=sys.stderr)
+        sys.exit(10)
+    if largeInput and backendName != "descent":
+        print("--large-input parses with the descent backend only", file=sys.stderr)
+        sys.exit(10)
+    if positionsOutput is not None and (inline or shareSubtrees or jobs is not None):
+        print(f"--positions cannot be combined with {'--inline' if inline else '--share' if shareSubtrees else '--jobs'}", file=sys.stderr)
+        sys.exit(10)
+    argumentsLength = len(arguments)
+
+    if (argumentsLength == 1 and arguments[0] == "--help") or (argumentsLength == 1 and arguments[0] == "-h"):
+        print("Use Interpreter script by passing code to standard input")
+        print("  --inline  build the checks and XML while parsing, without the parse tree of the whole program")
+        print("  --profile[=FILE]  report time, memory and counts of every phase as JSON on stderr or appended to FILE")
+        print("  --backend=NAME    parser backend, descent (default) or lark, also set by SOL25_BACKEND")
+        print("  --format NAME     output format, xml (default), json or bin, see astformat.py for readers")
+        print("  --jobs[=N]        parse classes of a large program in N processes (default: CPU count), input is memory-mapped")
+        print("  --share           build repeated expressions and blocks once and reuse their XML, for repetitive generated code")
+        print("  --syntax-only     only report lexical and syntactic errors (21, 22), nothing is written")
+        print("  --check           run every check and exit with the code the full run would, nothing is written")
+        print("  --positions=FILE  write the source span of every XML element and of the first error into FILE (JSON, binary when")
+        print("                    FILE ends with .bin, see astformat.py), errors are followed by their line and column")
+        print("  --large-input     memory-map standard input and copy string literals from it only while writing, for huge programs")
+        sys.exit(0)  # return with 0
+    elif argumentsLength >= 1:
+        print("use '--help' as argument to show help message", file=sys.stderr)
+        sys.exit(10)  # return with ERROR 10
+
+    out = (sys.stdout.buffer if outputFormat == "bin" else sys.stdout) if printTree and checkLevel == "xml" else None
+    if jobs is not None:
+        import parallel  # deferred, parallel.py builds on this module
+        inputData = parallel.mapInput(sys.stdin) if enableUserInput else None
+        if inputData is None:
+            inputData = sys.stdin.read() if enableUserInput else inputTest
+        parallel.parseProgramParallel(inputData, out, jobs)
+        return
+    if largeInput and enableUserInput:
+        import parallel
+        import largeinput  # deferred, largeinput.py builds on this module
+        inputData = parallel.mapInput(sys.stdin)
+        if inputData is not None:  # pipes and empty input are read as usual
+            largeinput.parseProgramMapped(inputData, out)
+            return
+
+    if enableUserInput:
+        inputCode = sys.stdin.read()
+    else:
+        inputCode = inputTest
+    parseProgram(inputCode, out, inline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import sys
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+
+import grammar
+
+# Content-addressed cache of parse.py results: exit code, diagnostics and zlib-compressed XML keyed by a hash of
+# the source bytes, the grammar text and the parser version. Only the standard library and grammar.py are
+# imported, so hits are served without loading lark. Every process opens its own connection to one SQLite file
+# in the cache directory, SQLite locking keeps concurrent readers and writers consistent, and the least recently
+# used entries are evicted once the stored bytes exceed the size bound.
+defaultMaxBytes = 256 << 20
+cacheFileName = "results.sqlite3"
+entryOverhead = 128  # bytes counted per entry on top of its key, diagnostics and XML
+counterNames = ("hits", "misses", "stores", "evictions", "bytes")
+helpMessage = """Usage: python resultcache.py DIR [--stats | --clear]
+
+  --stats   print hit/miss statistics and the size of the cache in DIR as JSON (default)
+  --clear   remove every entry and reset the statistics"""
+
+
+def cacheKey(sourceBytes):  # every part is length-prefixed so no two combinations hash the same bytes
+    digest = hashlib.sha256()
+    for part in (grammar.parserVersion.encode("utf-8"), grammar.grammar.encode("utf-8"), sourceBytes):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class CachedResult:
+    __slots__ = ("exitCode", "diagnostics", "compressedXML")
+
+    def __init__(self, exitCode, diagnostics, compressedXML):
+        self.exitCode = exitCode
+        self.diagnostics = diagnostics
+        self.compressedXML = compressedXML
+
+    @property
+    def xml(self):  # None when the parse ended with an error
+        if self.compressedXML is None:
+            return None
+        return zlib.decompress(self.compressedXML).decode("utf-8")
+
+
+class ResultCache:
+    def __init__(self, directory, maxBytes=defaultMaxBytes, timeout=60.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.maxBytes = maxBytes
+        # autocommit mode, every change runs in an explicit BEGIN IMMEDIATE transaction
+        self.connection = sqlite3.connect(os.path.join(directory, cacheFileName), timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # readers do not block the writer
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction():
+            self.connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, exitCode INTEGER NOT NULL, "
+                                    "diagnostics TEXT, xml BLOB, size INTEGER NOT NULL, lastUsed REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entriesByUse ON entries (lastUsed)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self.connection.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [(name,) for name in counterNames])
+
+    def transaction(self):
+        return Transaction(self.connection)
+
+    def count(self, name, value=1):
+        self.connection.execute("UPDATE counters SET value = value + ? WHERE name = ?", (value, name))
+
+    def get(self, key):  # CachedResult or None, a hit marks the entry as most recently used
+        with self.transaction():
+            row = self.connection.execute("SELECT exitCode, diagnostics, xml FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.count("misses")
+                return None
+            self.connection.execute("UPDATE entries SET lastUsed = ? WHERE key = ?", (time.time(), key))
+            self.count("hits")
+        return CachedResult(*row)
+
+    def put(self, key, exitCode, diagnostics=None, xml=None):
+        compressedXML = None if xml is None else zlib.compress(xml.encode("utf-8"), 6)
+        size = entryOverhead + len(key) + len((diagnostics or "").encode("utf-8")) + len(compressedXML or b"")
+        if size > self.maxBytes:
+            return  # would evict everything else and still not fit
+        with self.transaction():
+            row = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                    (key, exitCode, diagnostics, compressedXML, size, time.time()))
+            self.count("bytes", size - (row[0] if row else 0))
+            self.count("stores")
+            self.evict()
+
+    def evict(self):  # least recently used entries first, until the stored bytes fit the bound again
+        storedBytes = self.connection.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()[0]
+        if storedBytes <= self.maxBytes:
+            return
+        evictedKeys = []
+        for key, size in self.connection.execute("SELECT key, size FROM entries ORDER BY lastUsed"):
+            evictedKeys.append((key,))
+            storedBytes -= size
+            if storedBytes <= self.maxBytes:
+                break
+        self.connection.executemany("DELETE FROM entries WHERE key = ?", evictedKeys)
+        self.connection.execute("UPDATE counters SET value = ? WHERE name = 'bytes'", (storedBytes,))
+        self.count("evictions", len(evictedKeys))
+
+    def stats(self):
+        statistics = dict(self.connection.execute("SELECT name, value FROM counters"))
+        statistics["entries"] = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        statistics["maxBytes"] = self.maxBytes
+        lookups = statistics["hits"] + statistics["misses"]
+        statistics["hitRate"] = round(statistics["hits"] / lookups, 4) if lookups else None
+        return statistics
+
+    def clear(self):
+        with self.transaction():
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("UPDATE counters SET value = 0")
+
+    def close(self):
+        self.connection.close()
+
+
+class Transaction:  # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers wait instead of failing
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, excType, excValue, traceback):
+        self.connection.execute("COMMIT" if excType is None else "ROLLBACK")
+
+
+def main():
+    arguments = sys.argv[1:]
+    if arguments[:1] in (["-h"], ["--help"]):
+        print(helpMessage)
+        sys.exit(0)
+    if not arguments or arguments[1:] not in ([], ["--stats"], ["--clear"]):
+        print("Expected a cache directory and --stats or --clear, use '--help' to show help message", file=sys.stderr)
+        sys.exit(10)
+    try:
+        cache = ResultCache(arguments[0])
+    except (OSError, sqlite3.Error) as e:
+        print(f"Cannot open result cache: {e}", file=sys.stderr)
+        sys.exit(11)
+    if arguments[1:] == ["--clear"]:
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
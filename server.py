@@ -0,0 +1,238 @@
+import sys
+import os
+import io
+import gc
+import json
+import time
+import signal
+import socket
+import contextlib
+import traceback
+
+import parse
+
+# Server front-end of parse.py: the Lark parser and builtin tables are loaded once, requests are JSON lines
+#   request:  {"id": any, "source": "SOL25 text"}
+#   response: {"id": any, "exitCode": int, "diagnostics": str or null, "xml": str or null, "seconds": float}
+# On a Unix socket pre-forked workers share the warm state copy-on-write and accept connections themselves,
+# with --stdio one process answers requests from standard input on standard output
+timeoutExitCode = 99  # internal error, the request ran out of time
+helpMessage = """Usage: python server.py (--socket PATH | --stdio) [options]
+
+  -s, --socket PATH        listen on a Unix socket at PATH
+      --stdio              read requests from standard input, write responses to standard output
+  -w, --workers N          number of pre-forked worker processes (default: CPU count)
+  -t, --timeout SECONDS    time limit of one request, 0 disables it (default: 10)
+  -m, --max-requests N     requests a worker serves before it is replaced, 0 disables it (default: 1000)
+  -h, --help               show this help message
+
+A worker that reaches --max-requests closes its connection after the response, clients reconnect"""
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+parsing = False  # set only while a request is parsed, an alarm arriving outside of it is ignored
+
+
+def raiseTimeout(signum, frame):
+    if parsing:
+        raise RequestTimeout()
+
+
+def parseRequest(source, timeout):  # same exit codes and messages as running parse.py on the source
+    global parsing
+    response = {"exitCode": 0, "diagnostics": None, "xml": None}
+    out = io.StringIO()
+    diagnostics = io.StringIO()
+    try:
+        with contextlib.redirect_stderr(diagnostics):
+            parsing = True
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            try:
+                parse.parseProgram(source, out)
+            finally:
+                parsing = False  # first after the parse, a late alarm cannot replace its outcome
+                if timeout:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        response["xml"] = out.getvalue()
+    except SystemExit as e:
+        response["exitCode"] = e.code if isinstance(e.code, int) else 1
+        response["diagnostics"] = diagnostics.getvalue().rstrip("\n") or None
+    except RequestTimeout:
+        response["exitCode"] = timeoutExitCode
+        response["diagnostics"] = f"Request timed out after {timeout} s"
+    except Exception as e:
+        response["exitCode"] = 1  # same code an uncaught exception ends the CLI with
+        response["diagnostics"] = "".join(traceback.format_exception_only(e)).strip()
+    return response
+
+
+def handleLine(line, timeout):
+    start = time.perf_counter()
+    try:
+        request = json.loads(line)
+        source = request["source"]
+        if not isinstance(source, str):
+            raise TypeError("'source' is not a string")
+    except (ValueError, KeyError, TypeError) as e:
+        return {"id": None, "exitCode": 10, "diagnostics": f"Invalid request: {e}", "xml": None, "seconds": 0.0}
+    response = {"id": request.get("id")}
+    response.update(parseRequest(source, timeout))
+    response["seconds"] = round(time.perf_counter() - start, 6)
+    return response
+
+
+def serveStream(reader, writer, timeout, maxRequests=0):  # returns the number of requests answered
+    served = 0
+    for line in reader:
+        if not line.strip():
+            continue
+        writer.write(json.dumps(handleLine(line, timeout)).encode("utf-8") + b"\n")
+        writer.flush()
+        served += 1
+        if maxRequests and served >= maxRequests:
+            break
+    return served
+
+
+def workerLoop(listener, timeout, maxRequests):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops the workers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGALRM, raiseTimeout)
+    served = 0
+    while not maxRequests or served < maxRequests:
+        connection, _ = listener.accept()
+        with connection, connection.makefile("rwb") as stream:
+            try:
+                served += serveStream(stream, stream, timeout, maxRequests - served if maxRequests else 0)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away, the next connection gets the worker
+
+
+def spawnWorker(listener, timeout, maxRequests):
+    pid = os.fork()
+    if pid == 0:
+        exitCode = 0
+        try:
+            workerLoop(listener, timeout, maxRequests)
+        except BaseException:
+            traceback.print_exc()
+            exitCode = 1
+        finally:
+            os._exit(exitCode)  # never return into the parent's code
+    return pid
+
+
+def stopServer(signum, frame):
+    raise SystemExit(0)
+
+
+def serveSocket(path, workers, timeout, maxRequests):
+    parse.getParser()  # warm state is built before forking and shared by every worker
+    gc.freeze()  # keep the collector from touching, and so copying, the shared objects in the workers
+
+    if os.path.exists(path):
+        os.remove(path)  # stale socket of a previous server
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(128)
+    print(f"Listening on {path} with {workers} workers", file=sys.stderr)
+
+    children = set()
+    signal.signal(signal.SIGTERM, stopServer)
+    try:
+        for _ in range(workers):
+            children.add(spawnWorker(listener, timeout, maxRequests))
+        while True:
+            pid, _ = os.wait()
+            if pid in children:  # recycled or crashed worker is replaced
+                children.discard(pid)
+                children.add(spawnWorker(listener, timeout, maxRequests))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        listener.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def serveStdio(timeout):
+    parse.getParser()
+    signal.signal(signal.SIGALRM, raiseTimeout)
+    serveStream(sys.stdin.buffer, sys.stdout.buffer, timeout)
+
+
+def main():
+    arguments = sys.argv[1:]
+    socketPath = None
+    stdio = False
+    workers = os.cpu_count() or 1
+    timeout = 10.0
+    maxRequests = 1000
+
+    optionsWithValue = {"-s", "--socket", "-w", "--workers", "-t", "--timeout", "-m", "--max-requests"}
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if argument in ("-h", "--help"):
+            print(helpMessage)
+            sys.exit(0)
+        elif argument == "--stdio":
+            stdio = True
+            i += 1
+        elif argument in optionsWithValue:
+            if i + 1 >= len(arguments):
+                print(f"Missing value for '{argument}', use '--help' to show help message", file=sys.stderr)
+                sys.exit(10)
+            value = arguments[i + 1]
+            if argument in ("-s", "--socket"):
+                socketPath = value
+            elif argument in ("-t", "--timeout"):
+                try:
+                    timeout = float(value)
+                except ValueError:
+                    timeout = -1.0
+                if timeout < 0:
+                    print(f"Invalid timeout '{value}'", file=sys.stderr)
+                    sys.exit(10)
+            else:
+                if not value.isdigit() or (argument in ("-w", "--workers") and int(value) < 1):
+                    print(f"Invalid number '{value}' for '{argument}'", file=sys.stderr)
+                    sys.exit(10)
+                if argument in ("-w", "--workers"):
+                    workers = int(value)
+                else:
+                    maxRequests = int(value)
+            i += 2
+        else:
+            print(f"Unknown option '{argument}', use '--help' to show help message", file=sys.stderr)
+            sys.exit(10)
+
+    if stdio == (socketPath is not None):
+        print("Exactly one of '--socket' and '--stdio' is required, use '--help' to show help message", file=sys.stderr)
+        sys.exit(10)
+    if stdio:
+        serveStdio(timeout)
+    else:
+        try:
+            serveSocket(socketPath, workers, timeout, maxRequests)
+        except OSError as e:
+            print(f"Cannot listen on socket: {e}", file=sys.stderr)
+            sys.exit(12)
+
+
+if __name__ == "__main__":
+    main()
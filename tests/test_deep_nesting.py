@@ -0,0 +1,48 @@
+# Deeply nested parentheses, blocks and keyword sends go through every stage without RecursionError
+# the checks run at depth 100k; indentation makes the XML quadratic in depth (about 20 GB at 100k),
+# so well-formedness is checked at a depth whose output fits in memory
+# usage: python -m pytest tests
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+
+depth = 100000
+xmlDepth = 500
+backends = ("descent", "lark")
+
+shapes = {  # innermost operand -> program nesting it depth times
+    "parentheses": lambda depth, operand: "class Main : Object { run [ | x := " + "(" * depth + operand + ")" * depth + ". ] }",
+    "blocks": lambda depth, operand: "class Main : Object { run [ | " + "x := [ | " * depth + f"x := {operand}. " + "] . " * depth + "] }",
+    "sends": lambda depth, operand: "class Main : Object { run [ | x := " + "1 plus: (" * depth + operand + ")" * depth + ". ] }",
+}
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("shape", shapes)
+def test_checks_pass_at_depth(backend, shape):
+    result = parse.ParseSession(backend=backend, level="check").parse(shapes[shape](depth, "1"))
+    assert result.diagnostics is None
+    assert result.exitCode == 0
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("shape", shapes)
+def test_innermost_error_reported_at_depth(backend, shape):  # the checks reach the bottom of the nesting
+    result = parse.ParseSession(backend=backend, level="check").parse(shapes[shape](depth, "undefinedName"))
+    assert "RecursionError" not in (result.diagnostics or "")
+    assert result.exitCode == 32
+
+
+@pytest.mark.parametrize("backend", backends)
+@pytest.mark.parametrize("shape", shapes)
+def test_xml_well_formed(backend, shape):
+    result = parse.ParseSession(backend=backend).parse(shapes[shape](xmlDepth, "1"))
+    assert result.exitCode == 0
+    root = ET.fromstring(result.xml)
+    assert root.tag == "program"
+    assert len(list(root.iter("literal"))) == (xmlDepth + 1 if shape == "sends" else 1)
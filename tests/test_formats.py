@@ -0,0 +1,48 @@
+# --format json and --format bin outputs read back by astformat.py give the XML output of the same program
+# usage: python -m pytest tests
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import astformat
+import parse
+
+source = """"a <program> & its description"
+class Counter : Object {
+    add: [ :n | total := n plus: 1. text := 'x < y & z > w'. ]
+}
+class Main : Object {
+    run [ | c := Counter new. r := c add: 2. b := [ :a | w := a. inner := [ | v := 1. ]. ]. ]
+}
+"""
+
+
+@pytest.mark.parametrize("outputFormat", ("json", "bin"))
+def test_round_trip(outputFormat):
+    xml = parse.parseSource(source).xml
+    result = parse.parseSource(source, outputFormat=outputFormat)
+    assert result.exitCode == 0
+    assert astformat.toXML(astformat.loads(result.xml)) == xml
+
+
+def test_bin_records_and_strings():
+    xml = parse.parseSource(source).xml
+    document = astformat.BinaryDocument(parse.parseSource(source, outputFormat="bin").xml)
+    elements = list(ET.fromstring(xml).iter())
+    records = list(document.records())
+    assert [tag for tag, _, _ in records] == [element.tag for element in elements]
+    assert [dict(attributes) for _, attributes, _ in records] == [element.attrib for element in elements]
+    assert [count for _, _, count in records] == [len(element) for element in elements]
+    document.release()
+
+
+@pytest.mark.parametrize("outputFormat", ("json", "bin"))
+def test_load_from_file(outputFormat, tmp_path):
+    path = tmp_path / f"program.{outputFormat}"
+    output = parse.parseSource(source, outputFormat=outputFormat).xml
+    path.write_bytes(output if isinstance(output, bytes) else output.encode("utf-8"))
+    root = astformat.load(str(path))
+    assert astformat.toXML(root) == parse.parseSource(source).xml
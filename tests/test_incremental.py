@@ -0,0 +1,53 @@
+# IncrementalParser reparses only the classes an edit touches and reports what parse.py reports for the full source
+# usage: python -m pytest tests
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import incremental
+import parse
+
+source = """class A : Object { foo [ | x := 1. ] }
+class B : Object { bar [ | y := 2. ] }
+class Main : Object { run [ | z := 3. ] }
+"""
+
+
+def outcome(result):
+    return result.exitCode, result.diagnostics, result.xml
+
+
+def test_edit_reparses_touched_class():
+    parser = incremental.IncrementalParser(source)
+    assert parser.classesParsed == 3
+    start = source.index("y := 2") + 5
+    result = parser.edit(start, start + 1, "7")
+    assert parser.classesParsed == 4
+    assert parser.fullParses == 0
+    assert outcome(result) == outcome(parse.parseSource(parser.source))
+    assert 'value="7"' in result.xml
+
+
+def test_edit_reports_semantic_error():
+    parser = incremental.IncrementalParser(source)
+    start = source.index("y := 2") + 5
+    result = parser.edit(start, start + 1, "w")
+    assert result.exitCode == 32
+    assert outcome(result) == outcome(parse.parseSource(parser.source))
+    result = parser.edit(start, start + 1, "2")  # undoing the edit clears the error
+    assert outcome(result) == outcome(parse.parseSource(source))
+
+
+def test_unsegmentable_edit_falls_back_to_whole_parse():
+    parser = incremental.IncrementalParser(source)
+    result = parser.update(source.replace("class Main", "clas Main"))
+    assert parser.fullParses == 1
+    assert outcome(result) == outcome(parse.parseSource(parser.source))
+
+
+def test_edit_outside_source():
+    parser = incremental.IncrementalParser(source)
+    with pytest.raises(ValueError):
+        parser.edit(0, len(source) + 1, "")
@@ -0,0 +1,44 @@
+# parseSource(positions=True) maps every XML element and the first error to its span of the source
+# usage: python -m pytest tests
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parse
+
+source = "class Main : Object {\n  run [ | x := 1 plus: 2. ]\n}\n"
+
+
+def spans(result):  # (tag, source text) of every element, in document order
+    elements = result.positions.elements
+    tags = [element.tag for element in ET.fromstring(result.xml).iter()]
+    return [(tags[elements[k + 2]], source[elements[k]:elements[k + 1]]) for k in range(0, len(elements), 3)]
+
+
+@pytest.mark.parametrize("backend", ("descent", "lark"))
+def test_element_spans(backend):
+    result = parse.parseSource(source, backend=backend, positions=True)
+    assert result.exitCode == 0
+    found = spans(result)
+    assert len(found) == len(list(ET.fromstring(result.xml).iter()))
+    assert found[0] == ("program", source)
+    assert ("class", source.rstrip("\n")) in found
+    assert ("block", "[ | x := 1 plus: 2. ]") in found
+    assert ("send", "1 plus: 2") in found
+    assert ("var", "x") in found
+
+
+def test_error_location():
+    result = parse.parseSource(source.replace("plus: 2", "plus: y"), positions=True)
+    assert result.exitCode == 32
+    assert result.positions.errorSpan == (45, 46)
+    assert result.positions.errorLocation() == (2, 24)
+    assert result.positions.elements is None
+
+
+def test_positions_rejected_in_inline_mode():
+    with pytest.raises(ValueError):
+        parse.ParseSession(inline=True, positions=True)